@@ -0,0 +1,334 @@
+"""
+性能基准测试：用可复现的合成数据测量各脚本中耗时的步骤，结果保存为JSON，便于对比前后两次运行、及时发现性能退化
+    1. 合成数据按随机种子生成，同样的参数每次完全相同，不依赖Cleaned Data_Source.csv、1-MAM.nc、样点数据2.csv等私有文件：
+       物源/风沙指纹因子表、含u10/v10的nc文件、度分秒坐标CSV、箱线图数据
+    2. 每个测试沿其关键维度分别取多个规模（其余维度固定为基准值）：样品数1e2–1e6、物源区数2–20、
+       指纹因子数2–44、网格大小与时次数等
+    3. 测试项目：贡献率求解solve_normalized（MixingModel.py）、异常值剔除与Kruskal-Wallis检验（Code.py）、
+       streamplot_data（Streamplot.py）、dms_to_decimal（坐标转换.py）、boxplot_stats（Boxplot.py）
+    4. 生成数据、读取CSV与标准化在计时前完成，只有计算函数本身计入耗时（streamplot_data按显示范围裁剪读取nc文件，
+       读取是它的一部分，因此计入）；每个测试重复repeat次，记录每次的耗时、最小值与中位数
+    5. compare_benchmarks按(测试项目, 参数)对比两次结果，最小耗时增加超过阈值的项目视为退化
+
+以下是宝可能要修改的代码部分：
+    1. preset：'quick'为小规模（几分钟内完成），'full'为全部规模（100万个样品等，耗时较长）
+    2. output_path：本次结果的保存路径；baseline_path：用于对比的上一次结果，None时不对比
+    3. data_dir：合成数据的保存位置，已生成的数据下次直接使用
+    4. repeat：每个测试重复的次数
+"""
+
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import time
+import traceback
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')  # 导入的绘图脚本不弹出窗口
+import numpy as np
+import pandas as pd
+import scipy
+from netCDF4 import Dataset
+
+import Boxplot
+import Code
+import MixingModel
+import Streamplot
+import 坐标转换
+
+# 合成数据每次写入的行数，生成100万行的表时内存占用与行数无关
+WRITE_BLOCK = 100000
+
+
+def _write_blocks(path, n_rows, make_block):
+    # 按WRITE_BLOCK分块生成并写入CSV，先写临时文件，中断时不会留下不完整的数据
+    with open(path + '.tmp', 'w', encoding='utf-8', newline='') as f:
+        for start in range(0, n_rows, WRITE_BLOCK):
+            make_block(start, min(WRITE_BLOCK, n_rows - start)).to_csv(f, index=False, header=start == 0)
+    os.replace(path + '.tmp', path)
+
+
+def make_fingerprint_tables(data_dir, n_specimens, n_sources, n_factors, samples_per_source=30, seed=0):
+    """
+    生成物源样品表（ID, Source, F1…Fn，与TraceFinder从第3列开始读取元素的格式一致）和风沙样品表（Specimen, F1…Fn）
+    各物源区每个因子的浓度服从对数正态分布；风沙样品为各物源区均值按Dirichlet分布的贡献率混合，再乘以10%左右的噪声
+    返回(物源样品文件, 风沙样品文件, 指纹因子列表)，文件已存在时直接返回
+    """
+    factors = [f'F{i + 1}' for i in range(n_factors)]
+    source_path = os.path.join(data_dir, f'source_{n_sources}x{n_factors}x{samples_per_source}_{seed}.csv')
+    sand_path = os.path.join(data_dir, f'sand_{n_specimens}x{n_sources}x{n_factors}_{seed}.csv')
+    rng = np.random.default_rng(seed)
+    centers = np.exp(rng.normal(2, 1, (n_sources, n_factors)))
+    if not os.path.exists(source_path):
+        labels = np.repeat([f'S{j + 1}' for j in range(n_sources)], samples_per_source)
+        values = np.repeat(centers, samples_per_source, axis=0) * rng.lognormal(0, 0.2, (len(labels), n_factors))
+        source = pd.DataFrame(values, columns=factors)
+        source.insert(0, 'Source', labels)
+        source.insert(0, 'ID', np.arange(1, len(labels) + 1))
+        source.to_csv(source_path, index=False)
+    if not os.path.exists(sand_path):
+        def block(start, size):
+            block_rng = np.random.default_rng([seed, start])  # 每块使用独立的种子，结果与分块方式无关
+            P = block_rng.dirichlet(np.full(n_sources, 0.5), size)
+            sand = pd.DataFrame(P @ centers * block_rng.lognormal(0, 0.1, (size, n_factors)), columns=factors)
+            sand.insert(0, 'Specimen', [f'X{i}' for i in range(start, start + size)])
+            return sand
+        _write_blocks(sand_path, n_specimens, block)
+    return source_path, sand_path, factors
+
+
+def make_wind_netcdf(data_dir, n_lon, n_lat, n_time, xrange=(115, 130), yrange=(43, 50), seed=0):
+    """
+    生成ERA5格式的nc文件：一维经纬度（纬度降序）、u10/v10为float32的(时次, 纬度, 经度)变量，约0.1%为缺测值
+    经纬度范围比显示范围外扩1度，测试按显示范围裁剪读取的路径
+    """
+    path = os.path.join(data_dir, f'wind_{n_lon}x{n_lat}x{n_time}_{seed}.nc')
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(seed)
+    lon = np.linspace(xrange[0] - 1, xrange[1] + 1, n_lon)
+    lat = np.linspace(yrange[1] + 1, yrange[0] - 1, n_lat)
+    with Dataset(path + '.tmp', mode='w', format='NETCDF4') as nc_data:
+        nc_data.createDimension('time', n_time)
+        nc_data.createDimension('latitude', n_lat)
+        nc_data.createDimension('longitude', n_lon)
+        nc_data.createVariable('latitude', 'f4', ('latitude',))[:] = lat
+        nc_data.createVariable('longitude', 'f4', ('longitude',))[:] = lon
+        base = {'u10': 3 + 2 * np.sin(np.radians(lat))[:, None] * np.cos(np.radians(4 * lon))[None, :],
+                'v10': 1 + np.cos(np.radians(6 * lat))[:, None] * np.sin(np.radians(3 * lon))[None, :]}
+        for name in ('u10', 'v10'):
+            variable = nc_data.createVariable(name, 'f4', ('time', 'latitude', 'longitude'), fill_value=np.float32(-32767))
+            for start in range(0, n_time, 240):
+                size = min(240, n_time - start)
+                values = base[name] + rng.normal(0, 2, (size, n_lat, n_lon))
+                variable[start:start + size] = np.ma.masked_where(rng.random(values.shape) < 0.001, values)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def _format_dms(values, hemispheres, style):
+    # 按style把十进制度数写成坐标转换.py支持的各种度分秒格式
+    letters = np.where(values >= 0, hemispheres[0], hemispheres[1])
+    # 先取整到0.01秒再拆分，避免四舍五入后出现60.00秒
+    centiseconds = np.round(np.abs(values) * 360000).astype(np.int64)
+    degrees, centiseconds = np.divmod(centiseconds, 360000)
+    minutes, centiseconds = np.divmod(centiseconds, 6000)
+    seconds = centiseconds / 100
+    formats = {
+        0: lambda d, m, s, h: f'{d}°{m}′{s:.2f}″{h}',
+        1: lambda d, m, s, h: f'{d}°{m}\'{s:.2f}"{h}',
+        2: lambda d, m, s, h: f'{d}°{m + s / 60:.4f}′{h}',
+        3: lambda d, m, s, h: f'{d} {m} {s:.2f} {h}',
+        4: lambda d, m, s, h: f'{d}度{m}分{s:.2f}秒{h}',
+        5: lambda d, m, s, h: f'{h}{d}°{m}′{s:.2f}″',
+    }
+    return [formats[k](d, m, s, h) for k, d, m, s, h in zip(style, degrees, minutes, seconds, letters)]
+
+
+def make_dms_csv(data_dir, n_rows, seed=0):
+    # 生成样点坐标表（Name, Longitude, Latitude），混合多种度分秒写法，约0.5%的行为无法解析的坐标
+    path = os.path.join(data_dir, f'dms_{n_rows}_{seed}.csv')
+    if not os.path.exists(path):
+        def block(start, size):
+            block_rng = np.random.default_rng([seed, start])
+            lon = _format_dms(block_rng.uniform(73, 135, size), 'EW', block_rng.integers(0, 6, size))
+            lat = _format_dms(block_rng.uniform(18, 53, size), 'NS', block_rng.integers(0, 6, size))
+            bad = block_rng.random(size) < 0.005
+            lat = np.where(bad, '未测', lat)
+            return pd.DataFrame({'Name': [f'P{i}' for i in range(start, start + size)], 'Longitude': lon, 'Latitude': lat})
+        _write_blocks(path, n_rows, block)
+    return path
+
+
+def make_boxplot_data(data_dir, n_rows, n_vars, seed=0):
+    # 生成Boxplot.py的输入表（No, Type, 各变量），Type为S（物源）与A（风沙），数值为带长尾的对数正态分布
+    path = os.path.join(data_dir, f'box_{n_rows}x{n_vars}_{seed}.csv')
+    if not os.path.exists(path):
+        def block(start, size):
+            block_rng = np.random.default_rng([seed, start])
+            data = pd.DataFrame(block_rng.lognormal(1, 0.6, (size, n_vars)), columns=[f'V{i + 1}' for i in range(n_vars)])
+            data.insert(0, 'Type', np.where(block_rng.random(size) < 0.5, 'S', 'A'))
+            data.insert(0, 'No', np.arange(start + 1, start + size + 1))
+            return data
+        _write_blocks(path, n_rows, block)
+    return path
+
+
+# 各测试项目：参数为合成数据的规模，读取数据后返回一个无参数的函数，只有调用它的时间计入耗时
+def case_contributions(data_dir, n_specimens, n_sources, n_factors, method='batch'):
+    source_path, sand_path, factors = make_fingerprint_tables(data_dir, n_specimens, n_sources, n_factors)
+    normalized = MixingModel.normalize_data(pd.read_csv(source_path), pd.read_csv(sand_path), factors)
+    return lambda: MixingModel.solve_normalized(*normalized, method=method)
+
+
+def case_outliers(data_dir, n_specimens, n_sources, n_factors):
+    source_path, sand_path, factors = make_fingerprint_tables(data_dir, n_specimens, n_sources, n_factors)
+    df_source, df_aeolian = pd.read_csv(source_path), pd.read_csv(sand_path)
+    return lambda: Code.remove_outliers(df_source, df_aeolian, factors, iqr_multiplier=2.2, group_column='Source')
+
+
+def case_kruskal(data_dir, samples_per_source, n_sources, n_factors):
+    source_path, _, factors = make_fingerprint_tables(data_dir, 1, n_sources, n_factors, samples_per_source)
+    df_source = pd.read_csv(source_path)
+    return lambda: Code.kruskal_screening(df_source, 'Source', factors, alpha=0.05)
+
+
+def case_streamplot_data(data_dir, n_lon, n_lat, n_time):
+    path = make_wind_netcdf(data_dir, n_lon, n_lat, n_time)
+    return lambda: Streamplot.streamplot_data(path, xrange=(115, 130), yrange=(43, 50))
+
+
+def case_dms(data_dir, n_rows):
+    sites = pd.read_csv(make_dms_csv(data_dir, n_rows), dtype=str)
+
+    def run():
+        坐标转换.dms_to_decimal(sites['Longitude'], 'lon')
+        坐标转换.dms_to_decimal(sites['Latitude'], 'lat')
+    return run
+
+
+def case_boxplot(data_dir, n_rows, n_vars):
+    data = pd.read_csv(make_boxplot_data(data_dir, n_rows, n_vars))
+    return lambda: Boxplot.boxplot_stats(data, data.columns[2:])
+
+
+CASES = {
+    'solve_normalized': case_contributions,
+    'remove_outliers': case_outliers,
+    'kruskal_screening': case_kruskal,
+    'streamplot_data': case_streamplot_data,
+    'dms_to_decimal': case_dms,
+    'boxplot_stats': case_boxplot,
+}
+
+
+def sweep(base, **axes):
+    # 沿每个维度分别取值、其余维度固定为base，返回参数字典的列表（重复的组合只保留一次）
+    grid = [dict(base)]
+    for key, values in axes.items():
+        grid.extend({**base, key: value} for value in values)
+    unique = []
+    for params in grid:
+        if params not in unique:
+            unique.append(params)
+    return unique
+
+
+PRESETS = {
+    'quick': [
+        ('solve_normalized', sweep({'n_specimens': 1000, 'n_sources': 4, 'n_factors': 8},
+                                          n_specimens=[100, 10000], n_sources=[2, 10], n_factors=[2, 20])),
+        ('solve_normalized', sweep({'n_specimens': 100, 'n_sources': 4, 'n_factors': 8, 'method': 'slsqp'},
+                                          n_specimens=[1000])),
+        ('remove_outliers', sweep({'n_specimens': 10000, 'n_sources': 4, 'n_factors': 20}, n_specimens=[100000])),
+        ('kruskal_screening', sweep({'samples_per_source': 30, 'n_sources': 4, 'n_factors': 20},
+                                    n_sources=[10], n_factors=[44])),
+        ('streamplot_data', sweep({'n_lon': 81, 'n_lat': 41, 'n_time': 92}, n_time=[744])),
+        ('dms_to_decimal', sweep({'n_rows': 10000}, n_rows=[100000])),
+        ('boxplot_stats', sweep({'n_rows': 10000, 'n_vars': 6}, n_rows=[100000])),
+    ],
+    'full': [
+        ('solve_normalized', sweep({'n_specimens': 10000, 'n_sources': 5, 'n_factors': 10},
+                                          n_specimens=[100, 1000, 100000, 1000000], n_sources=[2, 10, 20],
+                                          n_factors=[2, 20, 44])),
+        # SLSQP逐个样品求解，规模只到1e4
+        ('solve_normalized', sweep({'n_specimens': 1000, 'n_sources': 5, 'n_factors': 10, 'method': 'slsqp'},
+                                          n_specimens=[100, 10000], n_sources=[2, 20], n_factors=[2, 44])),
+        ('remove_outliers', sweep({'n_specimens': 10000, 'n_sources': 5, 'n_factors': 44},
+                                  n_specimens=[100, 1000, 100000, 1000000], n_sources=[2, 20], n_factors=[2, 20])),
+        ('kruskal_screening', sweep({'samples_per_source': 30, 'n_sources': 5, 'n_factors': 44},
+                                    samples_per_source=[10, 300, 3000], n_sources=[2, 10, 20], n_factors=[2, 20])),
+        ('streamplot_data', sweep({'n_lon': 81, 'n_lat': 41, 'n_time': 744},
+                                  n_lon=[161, 321], n_lat=[81, 161], n_time=[92, 2208, 8760])),
+        ('dms_to_decimal', sweep({'n_rows': 10000}, n_rows=[100, 1000, 100000, 1000000])),
+        ('boxplot_stats', sweep({'n_rows': 10000, 'n_vars': 9},
+                                          n_rows=[1000, 100000, 1000000], n_vars=[3, 18])),
+    ],
+}
+
+
+def environment():
+    # 运行环境，对比不同机器或依赖版本的结果时参考
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'scipy': scipy.__version__, 'matplotlib': matplotlib.__version__}
+
+
+def run_benchmarks(plan, output_path='benchmark.json', data_dir='Benchmark data', repeat=3):
+    """
+    运行plan中的全部测试，plan为[(测试项目, [参数字典, ...]), ...]（如PRESETS['quick']）
+    在data_dir中运行，各脚本的打印输出不显示
+    某个测试出错时记录错误信息并继续；返回结果字典并保存为JSON
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    data_dir = os.path.abspath(data_dir)
+    output_path = os.path.abspath(output_path)
+    results = []
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        for name, grid in plan:
+            for params in grid:
+                record = {'name': name, 'params': params}
+                try:
+                    run = CASES[name](data_dir, **params)
+                    times = []
+                    for _ in range(repeat):
+                        gc.collect()
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            start = time.perf_counter()
+                            run()
+                            times.append(time.perf_counter() - start)
+                    record.update({'times': times, 'min': min(times), 'median': statistics.median(times)})
+                    print(f"{name} {params}: {record['min']:.4f} s")
+                except Exception:
+                    record['error'] = traceback.format_exc()
+                    print(f"{name} {params}: 出错\n{record['error']}")
+                results.append(record)
+    finally:
+        os.chdir(cwd)
+
+    report = {'created': datetime.now().isoformat(timespec='seconds'), 'repeat': repeat,
+              'environment': environment(), 'results': results}
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    return report
+
+
+def compare_benchmarks(baseline_path, current_path, threshold=1.25):
+    """
+    按(测试项目, 参数)对比两次结果的最小耗时，打印比值，返回比值超过threshold的项目列表（性能退化）
+    最小耗时受系统负载的影响最小，适合作为对比的依据
+    """
+    def load(path):
+        with open(path, encoding='utf-8') as f:
+            return {(r['name'], json.dumps(r['params'], sort_keys=True)): r for r in json.load(f)['results'] if 'min' in r}
+
+    baseline, current = load(baseline_path), load(current_path)
+    regressions = []
+    for key in sorted(baseline.keys() & current.keys()):
+        ratio = current[key]['min'] / baseline[key]['min']
+        flag = '  <- 变慢' if ratio > threshold else ''
+        print(f"{key[0]} {key[1]}: {baseline[key]['min']:.4f} s -> {current[key]['min']:.4f} s ({ratio:.2f}x){flag}")
+        if ratio > threshold:
+            regressions.append({'name': key[0], 'params': json.loads(key[1]), 'ratio': ratio})
+    return regressions
+
+
+# 示例调用放在__main__判断内，被其他脚本导入时不运行
+if __name__ == '__main__':
+    preset = 'quick'  # 'quick'或'full'
+    output_path = 'benchmark.json'  # 本次结果
+    baseline_path = None  # 上一次的结果，如'benchmark_baseline.json'
+    data_dir = 'Benchmark data'  # 合成数据的保存位置
+    repeat = 3  # 每个测试重复的次数
+
+    run_benchmarks(PRESETS[preset], output_path, data_dir, repeat)
+    if baseline_path is not None:
+        regressions = compare_benchmarks(baseline_path, output_path)
+        print(f"\n{len(regressions)}个测试变慢")
@@ -1,14 +1,199 @@
+import inspect
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
+from matplotlib.axes import Axes
+from matplotlib.patches import Patch
 import string
 
-def plot_optimized_boxplots(data_path, output_image_path):
-    # Load the dataset
-    data = pd.read_csv(data_path)
-    
+# Box colours and y tick labels for each Type, in the order the types first appear in the data
+PALETTE = {'S': 'skyblue', 'A': 'lightgreen'}
+TYPE_LABELS = {'S': '物源', 'A': '风沙'}
+LINE_COLOR = '#444444'
+
+# Matplotlib 3.10 replaced bxp's vert argument with orientation
+HORIZONTAL = {'orientation': 'horizontal'} if 'orientation' in inspect.signature(Axes.bxp).parameters else {'vert': False}
+
+
+def _thin_fliers(values, max_fliers):
+    # Keep at most max_fliers outliers, evenly spaced in sorted order so that the extremes are always kept
+    values = np.sort(np.asarray(values, dtype=float))
+    if max_fliers is not None and len(values) > max_fliers:
+        values = values[np.unique(np.linspace(0, len(values) - 1, max_fliers).round().astype(int))]
+    return values
+
+
+def _assemble_stats(q1, med, q3, whislo, whishi, mean, count, fliers, n_fliers):
+    """
+    Builds {column: {group: stats}} from per-(group, column) DataFrames; each stats dict can be passed to Axes.bxp.
+    fliers maps (group, column) to the (capped) outlier values, n_fliers gives the uncapped number of outliers.
+    """
+    stats = {}
+    for column in q1.columns:
+        stats[column] = {}
+        for group in q1.index:
+            if count.at[group, column] == 0:
+                continue
+            stats[column][group] = {
+                'label': group, 'q1': q1.at[group, column], 'med': med.at[group, column], 'q3': q3.at[group, column],
+                'whislo': whislo.at[group, column], 'whishi': whishi.at[group, column],
+                'mean': mean.at[group, column], 'n': int(count.at[group, column]),
+                'fliers': fliers.get((group, column), np.empty(0)),
+                'n_fliers': int(n_fliers.get((group, column), 0)),
+            }
+    return stats
+
+
+def boxplot_stats(data, columns, group_column='Type', whis=1.5, max_fliers=200):
+    """
+    Computes quartiles, whiskers (Tukey, whis × IQR, as in seaborn/matplotlib) and capped fliers
+    for every column and every group in one groupby pass over the DataFrame.
+
+    Returns:
+        dict: {column: {group: stats}}, groups in the order they first appear in the data.
+    """
+    keys = data[group_column]
+    values = data[list(columns)].apply(pd.to_numeric, errors='coerce')
+    grouped = values.groupby(keys, sort=False)
+    quartiles = grouped.quantile([0.25, 0.5, 0.75])
+    q1, med, q3 = (quartiles.xs(q, level=-1) for q in (0.25, 0.5, 0.75))
+
+    # Fences of each row's group, aligned with the rows so whiskers and fliers are found for all columns at once
+    iqr = q3 - q1
+    low = (q1 - whis * iqr).reindex(keys).to_numpy()
+    high = (q3 + whis * iqr).reindex(keys).to_numpy()
+    inside = (values >= low) & (values <= high)
+    whislo = values.where(inside).groupby(keys, sort=False).min()
+    whishi = values.where(inside).groupby(keys, sort=False).max()
+
+    outside = values.where(values.notna() & ~inside)
+    outside.index = keys.to_numpy()
+    outside = outside.stack().dropna()
+    fliers, n_fliers = {}, {}
+    for key, group_fliers in outside.groupby(level=[0, 1], sort=False):
+        fliers[key] = _thin_fliers(group_fliers.to_numpy(), max_fliers)
+        n_fliers[key] = len(group_fliers)
+    return _assemble_stats(q1, med, q3, whislo, whishi, grouped.mean(), grouped.count(), fliers, n_fliers)
+
+
+def stream_boxplot_stats(data_path, group_column='Type', columns=None, chunksize=200000, bins=4096,
+                         whis=1.5, max_fliers=200, **read_csv_kwargs):
+    """
+    Computes the same statistics as boxplot_stats from a CSV read in chunks, for files too big to load.
+    Three passes over the file: range and mean, histograms for the quartiles, whiskers and fliers.
+    Quartiles are interpolated within histogram bins, so they are accurate to a few multiples of (max - min) / bins.
+
+    Returns:
+        tuple: (columns, stats), with the default columns being those after the first two ('No' and 'Type').
+    """
+    def chunks():
+        return pd.read_csv(data_path, chunksize=chunksize, **read_csv_kwargs)
+
+    # Pass 1: count, sum, minimum and maximum of every (group, column), combined over the chunks at the end
+    parts = {'count': [], 'sum': [], 'min': [], 'max': []}
+    for chunk in chunks():
+        if columns is None:
+            columns = list(chunk.columns[2:])
+        grouped = chunk[columns].apply(pd.to_numeric, errors='coerce').groupby(chunk[group_column], sort=False)
+        for name, frames in parts.items():
+            frames.append(getattr(grouped, name)())
+    count = pd.concat(parts['count']).groupby(level=0, sort=False).sum()
+    total = pd.concat(parts['sum']).groupby(level=0, sort=False).sum()
+    minimum = pd.concat(parts['min']).groupby(level=0, sort=False).min()
+    maximum = pd.concat(parts['max']).groupby(level=0, sort=False).max()
+    groups = count.index
+    mean = total / count.where(count > 0)
+    group_code = pd.Series(np.arange(len(groups)), index=groups)
+    width = (maximum - minimum).where(maximum > minimum, 1.0).to_numpy()
+
+    # Pass 2: one histogram per (group, column), all filled with a single bincount per chunk
+    hist = np.zeros(len(groups) * len(columns) * bins)
+    cells = np.arange(len(columns))
+    for chunk in chunks():
+        chunk = chunk[chunk[group_column].isin(groups)]
+        values = chunk[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        code = group_code[chunk[group_column]].to_numpy()
+        valid = ~np.isnan(values)
+        position = (values - minimum.to_numpy()[code]) / width[code] * bins
+        index = (code[:, None] * len(columns) + cells) * bins + np.clip(np.nan_to_num(position), 0, bins - 1).astype(int)
+        hist += np.bincount(index[valid], minlength=len(hist))
+    hist = hist.reshape(len(groups), len(columns), bins)
+    cumulative = np.cumsum(hist, axis=2)
+
+    def quantile(p):
+        # Linear-interpolation rank as in pandas/numpy, located in its bin and spread uniformly within the bin
+        rank = p * (count.to_numpy() - 1)
+        bin_index = np.minimum((cumulative <= rank[..., None]).sum(axis=2), bins - 1)
+        before = np.take_along_axis(cumulative, bin_index[..., None], axis=2)[..., 0] \
+            - np.take_along_axis(hist, bin_index[..., None], axis=2)[..., 0]
+        in_bin = np.take_along_axis(hist, bin_index[..., None], axis=2)[..., 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = np.where(in_bin > 0, (rank - before + 0.5) / in_bin, 0.5)
+        result = minimum.to_numpy() + (bin_index + np.clip(fraction, 0, 1)) / bins * width
+        return pd.DataFrame(np.clip(result, minimum.to_numpy(), maximum.to_numpy()), index=groups, columns=columns)
+
+    q1, med, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    low, high = (q1 - whis * (q3 - q1)).to_numpy(), (q3 + whis * (q3 - q1)).to_numpy()
+
+    # Pass 3: whiskers (extreme values inside the fences) and capped fliers
+    whislo = np.full((len(groups), len(columns)), np.inf)
+    whishi = np.full((len(groups), len(columns)), -np.inf)
+    fliers, n_fliers = {}, {}
+    for chunk in chunks():
+        chunk = chunk[chunk[group_column].isin(groups)]
+        values = chunk[columns].apply(pd.to_numeric, errors='coerce')
+        keys = chunk[group_column]
+        code = group_code[keys].to_numpy()
+        inside = (values >= low[code]) & (values <= high[code])
+        part_low = values.where(inside).groupby(keys, sort=False).min().reindex(groups)[columns].to_numpy()
+        part_high = values.where(inside).groupby(keys, sort=False).max().reindex(groups)[columns].to_numpy()
+        whislo, whishi = np.fmin(whislo, part_low), np.fmax(whishi, part_high)
+        outside = values.where(values.notna() & ~inside)
+        outside.index = keys.to_numpy()
+        for key, group_fliers in outside.stack().dropna().groupby(level=[0, 1], sort=False):
+            n_fliers[key] = n_fliers.get(key, 0) + len(group_fliers)
+            fliers[key] = _thin_fliers(np.concatenate([fliers.get(key, np.empty(0)), group_fliers.to_numpy()]), max_fliers)
+    whislo = pd.DataFrame(np.where(np.isinf(whislo), np.nan, whislo), index=groups, columns=columns)
+    whishi = pd.DataFrame(np.where(np.isinf(whishi), np.nan, whishi), index=groups, columns=columns)
+    return columns, _assemble_stats(q1, med, q3, whislo, whishi, mean, count, fliers, n_fliers)
+
+
+def draw_boxplot(ax, column_stats, groups=None):
+    """
+    Draws the boxes of one variable from precomputed statistics with Axes.bxp, horizontally,
+    the first group at the top (same layout and colours as the former seaborn plot).
+    """
+    groups = list(column_stats) if groups is None else [group for group in groups if group in column_stats]
+    positions = np.arange(len(groups))
+    artists = ax.bxp([column_stats[group] for group in groups], positions=positions, widths=0.8, capwidths=0.4,
+                     patch_artist=True, manage_ticks=False, **HORIZONTAL,
+                     boxprops={'edgecolor': LINE_COLOR}, medianprops={'color': LINE_COLOR},
+                     whiskerprops={'color': LINE_COLOR}, capprops={'color': LINE_COLOR},
+                     flierprops={'marker': 'd', 'markeredgecolor': LINE_COLOR, 'markerfacecolor': LINE_COLOR, 'markersize': 4})
+    for box, group in zip(artists['boxes'], groups):
+        box.set_facecolor(PALETTE.get(group, 'lightgray'))
+    ax.set_yticks(positions)
+    ax.set_ylim(len(groups) - 0.5, -0.5)
+    return groups
+
+
+def plot_optimized_boxplots(data_path, output_image_path, stats=None, streaming=False, chunksize=200000, max_fliers=200):
+    """
+    data_path: CSV path, or an already loaded DataFrame (e.g. shared between figures by FigureBuilder.py).
+    stats: precomputed {column: {group: stats}} (e.g. from stream_boxplot_stats); computed from data_path if None.
+    streaming: compute the statistics with stream_boxplot_stats instead of loading the whole file.
+    """
+    if stats is None and streaming:
+        _, stats = stream_boxplot_stats(data_path, chunksize=chunksize, max_fliers=max_fliers)
+    elif stats is None:
+        # Load the dataset
+        data = data_path if isinstance(data_path, pd.DataFrame) else pd.read_csv(data_path)
+        stats = boxplot_stats(data, data.columns[2:], max_fliers=max_fliers)
+        del data
+
     # List of variables to plot, excluding 'No' and 'Type'
-    plot_vars = data.columns[2:]
+    plot_vars = list(stats)
     
     # Calculate number of rows (each row will have three plots)
     n_vars = len(plot_vars)
@@ -42,12 +227,12 @@ def plot_optimized_boxplots(data_path, output_image_path):
         else:
             var_display = var
         
-        sns.boxplot(x=var, y='Type', data=data, orient='h', ax=axs[i], palette={'S': 'skyblue', 'A': 'lightgreen'})
+        groups = draw_boxplot(axs[i], stats[var])
         var_title = f"({column_labels[i]}) {var_display}"
         axs[i].set_title(var_title, loc='left', fontdict={'fontsize': 10, 'fontweight': 'bold', 'fontname': 'Times New Roman'})
         axs[i].set_xlabel('')
         axs[i].set_ylabel('')
-        axs[i].set_yticklabels(['物源', '风沙'], fontdict={'fontsize': 10, 'fontname': 'SimSun'})
+        axs[i].set_yticklabels([TYPE_LABELS.get(group, group) for group in groups], fontdict={'fontsize': 10, 'fontname': 'SimSun'})
         for label in axs[i].get_xticklabels():
             label.set_fontname('Times New Roman')
             label.set_fontsize(10)
@@ -58,13 +243,15 @@ def plot_optimized_boxplots(data_path, output_image_path):
     
     # Adjust layout and add a legend
     plt.tight_layout()
-    handles, labels = axs[0].get_legend_handles_labels()
-    fig.legend(handles, ['物源', '风沙'], loc='upper right', fontsize=8)
+    handles = [Patch(facecolor=PALETTE.get(group, 'lightgray'), edgecolor=LINE_COLOR) for group in groups]
+    fig.legend(handles, [TYPE_LABELS.get(group, group) for group in groups], loc='upper right', fontsize=8)
     
     # Save the plot to the specified output path
     plt.savefig(output_image_path, dpi=600)
     plt.close()
 
-# Execute the updated function and save the image to a new path
-plot_optimized_boxplots('Data1_Zonal.csv', 'Zonal.png')
-plot_optimized_boxplots('Data2_Sedimental.csv', 'Sedimental.png')
\ No newline at end of file
+
+if __name__ == '__main__':
+    # Execute the updated function and save the image to a new path
+    plot_optimized_boxplots('Data1_Zonal.csv', 'Zonal.png')
+    plot_optimized_boxplots('Data2_Sedimental.csv', 'Sedimental.png')
@@ -0,0 +1,150 @@
+"""
+由多年逐小时（或逐日）的ERA5 u10/v10 nc文件生成季节平均风场，输出的1-MAM.nc、2-JJA.nc、3-SON.nc、4-DJF.nc
+可以直接作为Streamplot.py中file_path列表的输入
+
+以下是宝可能要修改的代码部分：
+    1. input_dir：存放原始nc文件（按月或按年分文件均可）的文件夹
+    2. output_dir：季节平均nc文件的输出文件夹
+"""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from netCDF4 import Dataset, num2date
+
+from Streamplot import extent_slice
+
+# 季节的划分，DJF的12月归入下一年的冬季（跨年）
+SEASONS = ['MAM', 'JJA', 'SON', 'DJF']
+MONTH_TO_SEASON = {3: 'MAM', 4: 'MAM', 5: 'MAM', 6: 'JJA', 7: 'JJA', 8: 'JJA',
+                   9: 'SON', 10: 'SON', 11: 'SON', 12: 'DJF', 1: 'DJF', 2: 'DJF'}
+
+
+def _time_variable(nc_data):
+    # ERA5旧版文件的时间变量名为time，新版CDS下载的文件为valid_time
+    for name in ('time', 'valid_time'):
+        if name in nc_data.variables:
+            return nc_data.variables[name]
+    raise KeyError('nc文件中没有time或valid_time变量')
+
+
+def reduce_file(data_path, xrange=None, yrange=None, margin=0.5, time_chunk=240):
+    """
+    读取单个nc文件，解码时间轴，按(年, 月)累加u10、v10的和与有效值个数
+    返回经度、纬度和{(年, 月): (u的和, v的和, u的个数, v的个数)}
+    """
+    with Dataset(data_path, mode='r') as nc_data:
+        lat = np.asarray(nc_data.variables['latitude'][:])
+        lon = np.asarray(nc_data.variables['longitude'][:])
+        lat_slice = extent_slice(lat, yrange, margin)
+        lon_slice = extent_slice(lon, xrange, margin)
+        times = _time_variable(nc_data)
+        dates = num2date(times[:], units=times.units, calendar=getattr(times, 'calendar', 'standard'))
+        year_month = np.array([(date.year, date.month) for date in np.ravel(dates)])
+
+        partial = {}
+        u10, v10 = nc_data.variables['u10'], nc_data.variables['v10']
+        for start in range(0, len(year_month), time_chunk):
+            stop = start + time_chunk
+            u_block = np.ma.masked_invalid(u10[start:stop, lat_slice, lon_slice])
+            v_block = np.ma.masked_invalid(v10[start:stop, lat_slice, lon_slice])
+            keys = year_month[start:stop]
+            for key in np.unique(keys, axis=0):
+                rows = (keys == key).all(axis=1)
+                sums = (u_block[rows].sum(axis=0, dtype=float).filled(0), v_block[rows].sum(axis=0, dtype=float).filled(0),
+                        u_block[rows].count(axis=0), v_block[rows].count(axis=0))
+                key = (int(key[0]), int(key[1]))
+                partial[key] = sums if key not in partial else tuple(a + b for a, b in zip(partial[key], sums))
+
+    return lon[lon_slice], lat[lat_slice], partial
+
+
+def _season_year(year, month):
+    # 12月归入下一年的冬季
+    return year + 1 if month == 12 else year
+
+
+def build_seasonal_climatology(file_paths, xrange=None, yrange=None, complete_winters_only=True, n_workers=None,
+                               margin=0.5, time_chunk=240):
+    """
+    在进程池中逐个文件按月累加，再在主进程中合并为四个季节的平均风场
+    complete_winters_only=True时，只统计12月、1月、2月都存在的冬季（去掉序列首尾不完整的DJF）
+    每个季节只保存一组累加值，未凑齐三个月的冬季暂存，内存占用与年数无关
+    返回经度、纬度和{季节: (u平均值, v平均值)}
+    """
+    totals = {}
+    pending_winters = {}  # 冬季年份 -> (累加值, 已出现的月份)
+    lon = lat = None
+
+    def add(season, sums):
+        totals[season] = sums if season not in totals else tuple(a + b for a, b in zip(totals[season], sums))
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        reduced = executor.map(reduce_file, file_paths, [xrange] * len(file_paths), [yrange] * len(file_paths),
+                               [margin] * len(file_paths), [time_chunk] * len(file_paths))
+        for file_lon, file_lat, partial in reduced:
+            if lon is None:
+                lon, lat = file_lon, file_lat
+            elif not (np.array_equal(lon, file_lon) and np.array_equal(lat, file_lat)):
+                raise ValueError('各nc文件的经纬网格不一致')
+            for (year, month), sums in sorted(partial.items()):
+                season = MONTH_TO_SEASON[month]
+                if season != 'DJF' or not complete_winters_only:
+                    add(season, sums)
+                    continue
+                winter = _season_year(year, month)
+                winter_sums, months = pending_winters.get(winter, (None, set()))
+                winter_sums = sums if winter_sums is None else tuple(a + b for a, b in zip(winter_sums, sums))
+                months = months | {month}
+                if months == {12, 1, 2}:
+                    add('DJF', winter_sums)
+                    del pending_winters[winter]
+                else:
+                    pending_winters[winter] = (winter_sums, months)
+
+    if pending_winters:
+        print(f"以下冬季月份不完整，未计入DJF：{', '.join(str(w) for w in sorted(pending_winters))}")
+
+    means = {}
+    for season, (u_sum, v_sum, u_count, v_count) in totals.items():
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means[season] = (np.where(u_count > 0, u_sum / u_count, np.nan),
+                             np.where(v_count > 0, v_sum / v_count, np.nan))
+    return lon, lat, means
+
+
+def write_season_files(output_dir, lon, lat, means):
+    """
+    将季节平均风场写为1-MAM.nc、2-JJA.nc、3-SON.nc、4-DJF.nc（时间维长度为1），返回按季节顺序排列的文件路径列表
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for i, season in enumerate(SEASONS):
+        if season not in means:
+            continue
+        path = os.path.join(output_dir, f'{i + 1}-{season}.nc')
+        with Dataset(path, mode='w') as nc_data:
+            nc_data.createDimension('time', 1)
+            nc_data.createDimension('latitude', len(lat))
+            nc_data.createDimension('longitude', len(lon))
+            nc_data.createVariable('latitude', 'f4', ('latitude',))[:] = lat
+            nc_data.createVariable('longitude', 'f4', ('longitude',))[:] = lon
+            for name, values in zip(('u10', 'v10'), means[season]):
+                variable = nc_data.createVariable(name, 'f4', ('time', 'latitude', 'longitude'), fill_value=np.float32(np.nan))
+                variable[0] = values
+        paths.append(path)
+    return paths
+
+
+# 子进程会重新导入本文件，因此示例调用需放在__main__判断内
+if __name__ == '__main__':
+    input_dir = 'ERA5 hourly'  # 存放原始nc文件的文件夹
+    output_dir = '.'  # 季节平均nc文件的输出文件夹
+    file_paths = sorted(glob.glob(os.path.join(input_dir, '*.nc')))
+    print(f"共{len(file_paths)}个nc文件\n")
+
+    lon, lat, means = build_seasonal_climatology(file_paths)
+    season_paths = write_season_files(output_dir, lon, lat, means)
+    print(f"季节平均风场已保存到：{', '.join(season_paths)}")
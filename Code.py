@@ -6,59 +6,260 @@ Created on Sat Mar  2 09:57:40 2024
 """
 
 import pandas as pd
-from scipy.stats import kruskal
+from scipy.stats import rankdata, chi2, norm
 import numpy as np
 from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
 from sklearn.feature_selection import RFE
 from sklearn.preprocessing import LabelEncoder
-from scipy.optimize import minimize
-
-def calculate_contributions(filepath_source, filepath_sand, factors):
-    # 读取数据
-    aeolian_sand_data = pd.read_csv(filepath_sand)
-    source_data = pd.read_csv(filepath_source)
-
-    # 自动判断物源区数量 m
-    m = len(source_data['Source'].unique())
-
-    # 标准化指纹因子浓度
-    max_values = pd.concat([aeolian_sand_data[factors], source_data[factors]]).max()
-    aeolian_sand_data_norm = aeolian_sand_data[factors].div(max_values)
-    source_data_norm = source_data.pivot_table(index='Source', values=factors, aggfunc='mean').div(max_values)
-
-    # 定义目标函数和约束条件
-    def objective_function(P, C_ssi, C_si):
-        R_es = np.sum(((C_ssi - np.dot(C_si, P)) / C_ssi) ** 2)
-        return R_es
-    cons = [{'type': 'eq', 'fun': lambda P: np.sum(P) - 1},  # 确保P_s的和为1
-            {'type': 'ineq', 'fun': lambda P: P}]            # 确保P_s的值非负
-
-    # 初始化结果列表
-    results_list = []
-
-    # 遍历每个风沙样品进行计算
-    for index, row in aeolian_sand_data_norm.iterrows():
-        C_ssi = row.values
-        C_si = source_data_norm.values.T
-        initial_guess = np.ones(m) / m  # 初始猜测，根据物源区数量 m 分配
-
-        # 执行最小化过程
-        res = minimize(objective_function, initial_guess, args=(C_ssi, C_si), constraints=cons, method='SLSQP')
-
-        # 创建结果字典并添加到列表中
-        result_dict = {
-            'Specimen': aeolian_sand_data.loc[index, 'Specimen'],
-            **{f'Contribution_{source}': p for source, p in zip(source_data_norm.index, res.x)},
-            'GOF': 1 - (1 / len(factors)) * np.sum(np.abs((C_ssi - np.dot(C_si, res.x)) / C_ssi))
-        }
-        results_list.append(result_dict)
-
-    # 转换结果列表为DataFrame并保存
-    results_df = pd.DataFrame(results_list)
+from sklearn.model_selection import LeaveOneOut, cross_val_predict
+from MixingModel import solve_contributions, solve_contributions_monte_carlo, solve_contributions_streaming, SolveProfile
+
+def calculate_contributions(filepath_source, filepath_sand, factors, method='slsqp', n_workers=1, chunk_size=1000,
+                            n_realizations=0, percentiles=(5, 95), seed=None,
+                            streaming=False, read_chunk_size=10000, sand_max_path=None, resume=False,
+                            diagnostics=False, hook=None):
+    # method='slsqp'：逐个样品调用SLSQP求解（原始方法）
+    # method='batch'：全部样品作为一个批量问题，用解析梯度的投影梯度法+有效集求解，速度快一个数量级以上
+    # n_workers：并行进程数（1为串行，None为全部CPU核心），chunk_size：每个并行任务包含的样品数
+    # n_realizations > 0 时启用蒙特卡洛模式：按物源区各因子的分布抽样n_realizations次，
+    # 输出各物源区贡献率的均值、中位数及percentiles百分位数区间（该模式固定使用批量求解）
+    # streaming=True 时启用流式模式：每次读取read_chunk_size个风沙样品，求解后立即追加写入结果文件，
+    # sand_max_path为风沙样最大值的缓存文件，resume=True时从已写出的结果之后继续计算
+    # diagnostics=True 时结果中增加每个样品的迭代次数、函数计算次数、求解耗时、是否收敛等列（蒙特卡洛模式不支持），
+    # 用于找出求解很慢或不收敛的样品；hook为监控回调hook(事件, 耗时, 附加信息)，见MixingModel.SolveProfile
+    # 返回各阶段（load、normalize、solve、write）的耗时字典
     results_path = 'Aeolian_Sand_Contributions_GOF.csv'
-    results_df.to_csv(results_path, index=False)
+    profile = SolveProfile(hook)
+    if streaming:
+        n_new = solve_contributions_streaming(filepath_source, filepath_sand, factors, results_path, method=method,
+                                              read_chunk_size=read_chunk_size, n_workers=n_workers, chunk_size=chunk_size,
+                                              sand_max_path=sand_max_path, resume=resume,
+                                              diagnostics=diagnostics, profile=profile)
+        print(f'本次计算{n_new}个样品，结果已保存到{results_path}')
+        print(f'耗时：{profile.summary()}')
+        return profile.timings
+
+    if n_realizations > 0:
+        results_df = solve_contributions_monte_carlo(filepath_source, filepath_sand, factors, n_realizations=n_realizations,
+                                                     percentiles=percentiles, seed=seed, profile=profile)
+    else:
+        results_df = solve_contributions(filepath_source, filepath_sand, factors, method=method,
+                                         n_workers=n_workers, chunk_size=chunk_size,
+                                         diagnostics=diagnostics, profile=profile)
+
+    # 保存结果
+    with profile.stage('write'):
+        results_df.to_csv(results_path, index=False)
     print(f'结果已保存到{results_path}')
+    if diagnostics and 'Converged' in results_df:
+        slowest = results_df.nlargest(5, 'Solve_Time')[['Specimen', 'Iterations', 'Solve_Time', 'Min_C_ssi']]
+        print(f"未收敛的样品：{int((~results_df['Converged'].astype(bool)).sum())}个；求解最慢的样品：\n{slowest.to_string(index=False)}")
+    print(f'耗时：{profile.summary()}')
+    return profile.timings
+
+
+def compute_outlier_limits(df_source, columns, iqr_multiplier=2.2, group_column=None):
+    # 一次quantile调用得到全部列的Q1/Q3，返回(lower, upper)两张表：
+    # 行为物源区（group_column为None时只有一行'All'），列为指纹因子
+    if group_column is None:
+        quantiles = df_source[columns].quantile([0.25, 0.75])
+        Q1 = quantiles.loc[[0.25]].set_axis(['All'])
+        Q3 = quantiles.loc[[0.75]].set_axis(['All'])
+    else:
+        quantiles = df_source.groupby(group_column)[columns].quantile([0.25, 0.75])
+        Q1 = quantiles.xs(0.25, level=-1)
+        Q3 = quantiles.xs(0.75, level=-1)
+    IQR = Q3 - Q1
+    return Q1 - iqr_multiplier * IQR, Q3 + iqr_multiplier * IQR
+
+
+def outlier_mask(df, lower, upper, group_column=None):
+    # 返回与df[columns]同形的布尔表，True表示该值超出临界值（缺失值同样视为超出，与原逐列筛选一致）
+    columns = lower.columns
+    if group_column is not None and group_column in df.columns and len(lower) > 1:
+        # 物源样按各自物源区的临界值判断
+        lo = lower.reindex(df[group_column]).values
+        hi = upper.reindex(df[group_column]).values
+    else:
+        # 不分组，或风沙样（不属于任何物源区）按各物源区临界值的外包络判断
+        lo = lower.min().values
+        hi = upper.max().values
+    values = df[columns]
+    return ~((values <= hi) & (values >= lo))
+
+
+def remove_outliers(df_source, df_aeolian, columns, iqr_multiplier=2.2, group_column=None, limits=None):
+    """
+    按物源样的IQR临界值同时剔除物源样与风沙样中的异常值
+    所有临界值由原始物源样一次算出，结果与列的顺序无关；group_column='Source'时按各物源区分别计算临界值
+    limits可传入上次返回的(lower, upper)以跳过临界值计算
+    返回(剔除后的物源样, 剔除后的风沙样, 剔除记录, (lower, upper))，剔除记录每行为一个超出临界值的数据
+    """
+    columns = list(columns)
+    if limits is None:
+        limits = compute_outlier_limits(df_source, columns, iqr_multiplier, group_column)
+    lower, upper = limits
+
+    reports = []
+    cleaned = []
+    for name, df in (('Source', df_source), ('AeolianSand', df_aeolian)):
+        mask = outlier_mask(df, lower, upper, group_column)
+        cleaned.append(df[~mask.any(axis=1)])
+        # 剔除记录：数据集、行号、变量、数值
+        flagged = mask.stack()
+        flagged = flagged[flagged].index
+        report = pd.DataFrame({'Dataset': name, 'Index': flagged.get_level_values(0), 'Variable': flagged.get_level_values(1)})
+        report['Value'] = df[columns].stack().reindex(flagged).values
+        reports.append(report)
+    report = pd.concat(reports, ignore_index=True)
+    return cleaned[0], cleaned[1], report, limits
+
+def _rank_columns(df, group_column, columns):
+    # 对全部列一次性求秩（缺失值不参与），返回秩、并列秩的t³-t之和及各组的样品数与秩和
+    df = df[df[group_column].notna()]
+    values = df[list(columns)].to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    ranks = rankdata(values, axis=0, nan_policy='omit')
+    # 每个值所在并列组的大小t = 最大秩 - 最小秩 + 1，Σ(t²-1)即各并列组的Σ(t³-t)
+    ties = rankdata(values, method='max', axis=0, nan_policy='omit') - rankdata(values, method='min', axis=0, nan_policy='omit') + 1
+    tie_sum = np.nansum(ties ** 2 - 1, axis=0)
+    groups, codes = np.unique(df[group_column].to_numpy(), return_inverse=True)
+    onehot = np.eye(len(groups))[codes]  # (样品数, 组数)
+    n_g = onehot.T @ valid  # (组数, 列数)
+    R_g = onehot.T @ np.nan_to_num(ranks)
+    return groups, codes, valid, np.nan_to_num(ranks), tie_sum, n_g, R_g
+
+
+def _h_statistic(R_g, n_g, tie_sum):
+    n = n_g.sum(axis=-2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        H = 12 / (n * (n + 1)) * np.sum(R_g ** 2 / n_g, axis=-2) - 3 * (n + 1)
+        return H / (1 - tie_sum / (n ** 3 - n))
+
 
+def kruskal_screening(df, group_column, columns, alpha=0.05, n_permutations=0, permutation_block=200, seed=None):
+    """
+    对全部指纹因子一次性进行Kruskal-Wallis H检验（含并列秩校正），返回Variable/H-Statistic/P-Value/Significant表
+    只有所有组都有数据的列参与检验；n_permutations > 0 时增加置换检验的P值列，置换按permutation_block批量计算
+    """
+    columns = list(columns)
+    groups, codes, valid, ranks, tie_sum, n_g, R_g = _rank_columns(df, group_column, columns)
+    tested = (n_g > 0).all(axis=0)
+    H = _h_statistic(R_g, n_g, tie_sum)
+    p = chi2.sf(H, len(groups) - 1)
+    results = pd.DataFrame({'Variable': columns, 'H-Statistic': H, 'P-Value': p,
+                            'Significant': np.where(p < alpha, 'Yes', 'No')})
+
+    if n_permutations > 0:
+        # 打乱分组标签，秩保持不变，批量计算置换后的H统计量
+        rng = np.random.default_rng(seed)
+        exceed = np.zeros(len(columns))
+        eye = np.eye(len(groups))
+        for start in range(0, n_permutations, permutation_block):
+            b = min(permutation_block, n_permutations - start)
+            onehot = eye[rng.permuted(np.tile(codes, (b, 1)), axis=1)]  # (b, 样品数, 组数)
+            H_perm = _h_statistic(np.einsum('bnk,nc->bkc', onehot, ranks),
+                                  np.einsum('bnk,nc->bkc', onehot, valid.astype(float)), tie_sum)
+            exceed += np.sum(H_perm >= H - 1e-12, axis=0)
+        results['Permutation P-Value'] = (exceed + 1) / (n_permutations + 1)
+
+    return results[tested].reset_index(drop=True)
+
+
+def dunn_test(df, group_column, columns, p_adjust='bonferroni'):
+    # Dunn两两比较（含并列秩校正），返回Variable/Group1/Group2/Z/P-Value/P-Adjusted长表
+    # p_adjust为'bonferroni'或None，校正次数为每个变量的组对数
+    columns = list(columns)
+    groups, codes, valid, ranks, tie_sum, n_g, R_g = _rank_columns(df, group_column, columns)
+    n = n_g.sum(axis=0)
+    i, j = np.triu_indices(len(groups), k=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_rank = R_g / n_g
+        sigma2 = n * (n + 1) / 12 - tie_sum / (12 * (n - 1))
+        Z = (mean_rank[i] - mean_rank[j]) / np.sqrt(sigma2 * (1 / n_g[i] + 1 / n_g[j]))  # (组对数, 列数)
+    p = 2 * norm.sf(np.abs(Z))
+    p_adjusted = np.minimum(p * len(i), 1) if p_adjust == 'bonferroni' else p
+    return pd.DataFrame({'Variable': np.tile(columns, len(i)),
+                         'Group1': np.repeat(groups[i], len(columns)),
+                         'Group2': np.repeat(groups[j], len(columns)),
+                         'Z': Z.ravel(), 'P-Value': p.ravel(), 'P-Adjusted': p_adjusted.ravel()})
+
+def _sweep(A, k):
+    # 对称矩阵的扫描算子（原地）：对已扫描的变量再次扫描即可将其移出
+    d = A[k, k]
+    col = A[:, k].copy()
+    A -= np.outer(col, col) / d
+    sign = 1 if d > 0 else -1  # d > 0 为引入变量，d < 0 为移出变量
+    A[k, :] = sign * col / d
+    A[:, k] = sign * col / d
+    A[k, k] = -1 / d
+
+
+def stepwise_dfa(df, group_column, columns, f_enter=3.84, f_remove=2.71, tolerance=0.001, cross_validate=True):
+    """
+    以Wilks' lambda最小为准则的逐步判别分析（与SPSS的Stepwise方法一致，默认F-to-enter 3.84、F-to-remove 2.71）
+    组内离差矩阵W与总离差矩阵T用扫描算子逐步更新（Schur补），每步只需O(变量数²)的运算
+    返回(最佳指纹因子列表, 逐步过程表, 判别准确率字典)
+    """
+    columns = list(columns)
+    data = df[[group_column] + columns].dropna()
+    X = data[columns].to_numpy(dtype=float)
+    labels = data[group_column].to_numpy()
+    n, p = X.shape
+    g = len(np.unique(labels))
+
+    # 组内离差矩阵W与总离差矩阵T
+    Xc = X - X.mean(axis=0)
+    T = Xc.T @ Xc
+    group_means = data.groupby(group_column)[columns].transform('mean').to_numpy()
+    Xw = X - group_means
+    W = Xw.T @ Xw
+    W_diag = np.diag(W).copy()
+
+    selected = []
+    wilks = 1.0
+    steps = []
+    for _ in range(2 * p):
+        # 移出：已选变量中偏Wilks' lambda对应的F值最小且低于f_remove者
+        if len(selected) > 1:
+            partial = np.array([T[j, j] / W[j, j] for j in selected])
+            F = (n - g - len(selected) + 1) / (g - 1) * (1 - partial) / partial
+            k = int(np.argmin(F))
+            if F[k] < f_remove:
+                j = selected.pop(k)
+                _sweep(W, j)
+                _sweep(T, j)
+                wilks /= partial[k]
+                steps.append({'Step': len(steps) + 1, 'Action': 'Removed', 'Variable': columns[j],
+                              "Wilks' Lambda": wilks, 'F': F[k]})
+                continue
+        # 引入：未选变量中偏Wilks' lambda最小（F值最大）且高于f_enter者，容差过小（共线）的变量不参与
+        candidates = [j for j in range(p) if j not in selected and W[j, j] / W_diag[j] > tolerance]
+        if not candidates:
+            break
+        partial = np.array([W[j, j] / T[j, j] for j in candidates])
+        F = (n - g - len(selected)) / (g - 1) * (1 - partial) / partial
+        k = int(np.argmax(F))
+        if F[k] < f_enter:
+            break
+        j = candidates[k]
+        _sweep(W, j)
+        _sweep(T, j)
+        selected.append(j)
+        wilks *= partial[k]
+        steps.append({'Step': len(steps) + 1, 'Action': 'Entered', 'Variable': columns[j],
+                      "Wilks' Lambda": wilks, 'F': F[k]})
+
+    factors = [columns[j] for j in selected]
+    accuracy = {}
+    if factors:
+        # 以所选因子建立线性判别函数，给出回代与留一交叉验证的判别准确率
+        lda = LinearDiscriminantAnalysis().fit(data[factors], labels)
+        accuracy['Original'] = float(lda.score(data[factors], labels))
+        if cross_validate:
+            predicted = cross_val_predict(LinearDiscriminantAnalysis(), data[factors], labels, cv=LeaveOneOut())
+            accuracy['Cross-validated'] = float(np.mean(predicted == labels))
+    return factors, pd.DataFrame(steps), accuracy
 
 """
 ###########################下述代码进行异常值剔除###########################
@@ -71,22 +272,12 @@ df_aeolian = pd.read_excel(file_path, sheet_name=sheet_name_aeolian)  # 风沙
 
 # 提取数据
 data_columns_source = df_source.columns[5:49]
-data_columns_aeolian = df_aeolian.columns[5:49]
 
-# 初始化两个空的DataFrame来存放没有异常值的数据
-cleaned_df_source = df_source.copy()
-cleaned_df_aeolian = df_aeolian.copy()
-
-for column in data_columns_source:
-    Q1 = cleaned_df_source[column].quantile(0.25)
-    Q3 = cleaned_df_source[column].quantile(0.75)
-    IQR = Q3 - Q1
-    upper_limit = Q3 + 2.2 * IQR  # 计算物源样的最高临界值
-    lower_limit = Q1 - 2.2 * IQR  # 计算物源样的最低临界值
-    
-    # 统一按照物源区的临界值进行异常值剔除
-    cleaned_df_source = cleaned_df_source[(cleaned_df_source[column] <= upper_limit) & (cleaned_df_source[column] >= lower_limit)]
-    cleaned_df_aeolian = cleaned_df_aeolian[(cleaned_df_aeolian[column] <= upper_limit) & (cleaned_df_aeolian[column] >= lower_limit)]
+# 按物源样的临界值（Q1 - 2.2IQR, Q3 + 2.2IQR）统一剔除物源样和风沙样中的异常值
+# 如需按各物源区分别计算临界值，可传入group_column='Source'
+cleaned_df_source, cleaned_df_aeolian, outlier_report, outlier_limits = remove_outliers(
+    df_source, df_aeolian, data_columns_source, iqr_multiplier=2.2)
+outlier_report.to_csv('Outlier Report.csv', index=False, encoding='utf_8_sig')
 
 # 将处理后的数据保存到新的CSV文件中
 cleaned_df_source.to_csv('Cleaned Data_Source.csv', index=False, encoding='utf_8_sig')
@@ -95,35 +286,27 @@ print("异常值剔除完成")
 
 
 ###########################下述代码进行物源样的非参数检验###########################
-# 提取分类变量和数据
-df = pd.read_excel(file_path, sheet_name=sheet_name_source)
+# 对全部变量一次性进行Kruskal-Wallis H检验，直接使用上面已读取的物源数据，无需重新读取Excel
 source_column = 'Source'  # 分类变量列名
-data_columns = df.columns[5:49]  # F至AW列
-
-# 准备存储结果的列表
-results_list = []
-
-# 对每个变量进行Kruskal-Wallis H检验
-for column in data_columns:
-    # 分组数据
-    groups = [group.dropna().values for name, group in df.groupby(source_column)[column]]
-    # 只有当所有组都有数据时才进行检验
-    if all(len(group) > 0 for group in groups):
-        stat, p = kruskal(*groups)
-        significant = 'Yes' if p < 0.05 else 'No'
-        results_list.append({'Variable': column, 'H-Statistic': stat, 'P-Value': p, 'Significant': significant})
-
-# 将结果列表转换为DataFrame
-results = pd.DataFrame(results_list)
+data_columns = df_source.columns[5:49]  # F至AW列
+results = kruskal_screening(df_source, source_column, data_columns, alpha=0.05)
 
 # 保存结果到CSV文件
 results.to_csv('K-W Result_Source.csv', index=False)
 print("物源样非参数检验完成，结果储存在K-W Result_Source.csv")
 
 
-###########################最佳指纹因子提取通过SPSS实现###########################
+###########################下述代码通过逐步判别分析提取最佳指纹因子###########################
+# 以K-W检验显著的变量为候选，按Wilks' lambda最小逐步选择，结果可直接传入calculate_contributions
+significant_columns = results.loc[results['Significant'] == 'Yes', 'Variable']
+factors, dfa_steps, dfa_accuracy = stepwise_dfa(cleaned_df_source, source_column, significant_columns)
+dfa_steps.to_csv('DFA Steps_Source.csv', index=False)
+print(f"最佳指纹因子：{', '.join(factors)}")
+print(f"判别准确率：{dfa_accuracy}")
 
 """
 ###########################下述代码基于Walling等简化后的多元混合模型计算贡献率###########################
 # 示例调用函数，此处'factors'需要替换为实际的指纹因子名称列表
-calculate_contributions('Cleaned Data_Source.csv', 'Cleaned Data_AeolianSand.csv', ['Tb', 'Hf'])
\ No newline at end of file
+# 并行求解时子进程会重新导入本文件，因此示例调用需放在__main__判断内
+if __name__ == '__main__':
+    calculate_contributions('Cleaned Data_Source.csv', 'Cleaned Data_AeolianSand.csv', ['Tb', 'Hf'])
\ No newline at end of file
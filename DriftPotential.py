@@ -0,0 +1,167 @@
+"""
+根据逐小时u10/v10计算Fryberger输沙势：输沙势DP、合成输沙势RDP、合成输沙方向RDD、方向变率指数RDP/DP，以及各格点的风玫瑰
+计算沿时间维分块进行，16个方位的划分与累加对整个网格一次完成；结果可以叠加到Streamplot.py的流线图上，也可以提取样点处的数值
+
+以下是宝可能要修改的代码部分：
+    1. file_path列表：输入的nc文件（需为逐小时或逐日的原始风场，而非已求平均的风场）
+    2. sites_path：样点坐标文件，需包含Lon、Lat列
+"""
+
+import numpy as np
+import pandas as pd
+from netCDF4 import Dataset
+from scipy.interpolate import RegularGridInterpolator
+
+from Streamplot import extent_slice
+
+KNOTS_PER_MS = 1.943844  # 1 m/s = 1.943844 节
+
+
+def sector_centers(n_sectors=16):
+    # 各方位的中心方向（风的来向，自正北顺时针，单位°）
+    return np.arange(n_sectors) * 360 / n_sectors
+
+
+def drift_potential(data_path, xrange=None, yrange=None, threshold=12, n_sectors=16,
+                    speed_bins=(12, 18, 24, 30), margin=0.5, time_chunk=240):
+    """
+    计算各格点的Fryberger输沙势：DP = Σ V²(V - Vt)·t，V与起沙风速阈值Vt的单位为节（threshold默认12节），t为时间百分比
+    各方位按风的来向划分，输沙方向为风的去向；风玫瑰只统计超过起沙风速阈值的风，按来向和风速分级speed_bins（单位节，
+    默认从阈值开始）统计频率（%），不超过阈值的静风不计入任何方位，单独记为calm
+    返回字典：lon、lat、DP、RDP、RDD（合成输沙方向，即沙物质被搬运的方向，自正北顺时针）、UDI（RDP/DP）、
+             DP_sector（各方位的DP，形状为(方位数, 纬度, 经度)）、rose（形状为(方位数, 风速级数, 纬度, 经度)）、
+             calm（静风频率%，形状为(纬度, 经度)）
+    """
+    with Dataset(data_path, mode='r') as nc_data:
+        lat = np.asarray(nc_data.variables['latitude'][:])
+        lon = np.asarray(nc_data.variables['longitude'][:])
+        lat_slice = extent_slice(lat, yrange, margin)
+        lon_slice = extent_slice(lon, xrange, margin)
+        lat, lon = lat[lat_slice], lon[lon_slice]
+        n_cells = len(lat) * len(lon)
+        bins = np.asarray(speed_bins, dtype=float)
+        n_bins = len(bins)  # 最后一级为大于bins[-1]
+
+        dp_sector = np.zeros(n_sectors * n_cells)
+        rose = np.zeros(n_sectors * n_bins * n_cells)
+        n_valid = np.zeros(n_cells)
+        n_calm = np.zeros(n_cells)
+        cell = np.arange(n_cells)
+
+        u10, v10 = nc_data.variables['u10'], nc_data.variables['v10']
+        # 已求平均的风场（只有一个时次）会把各时刻的风速抵消，得到的输沙势没有意义
+        if u10.ndim != 3 or u10.shape[0] < 2:
+            raise ValueError(f'{data_path}只有一个时次，输沙势需要逐小时或逐日的原始风场，而非已求平均的风场')
+        for start in range(0, u10.shape[0], time_chunk):
+            u = np.ma.masked_invalid(u10[start:start + time_chunk, lat_slice, lon_slice]).reshape(-1, n_cells)
+            v = np.ma.masked_invalid(v10[start:start + time_chunk, lat_slice, lon_slice]).reshape(-1, n_cells)
+            valid = ~(np.ma.getmaskarray(u) | np.ma.getmaskarray(v))
+            u, v = np.ma.filled(u, 0.0), np.ma.filled(v, 0.0)
+
+            speed = np.hypot(u, v) * KNOTS_PER_MS
+            direction_from = np.degrees(np.arctan2(-u, -v)) % 360  # 风的来向
+            sector = np.floor((direction_from + 180 / n_sectors) % 360 / (360 / n_sectors)).astype(int) % n_sectors
+            speed_class = np.clip(np.searchsorted(bins, speed, side='right') - 1, 0, n_bins - 1)
+            q = np.where(speed > threshold, speed ** 2 * (speed - threshold), 0.0)
+
+            # 以(方位, 格点)的一维编号一次bincount完成分方位累加
+            cells = np.broadcast_to(cell, speed.shape)[valid]
+            dp_sector += np.bincount(sector[valid] * n_cells + cells, weights=q[valid], minlength=n_sectors * n_cells)
+            moving = valid & (speed > threshold)  # 静风的方向没有意义，只有起沙风计入风玫瑰
+            moving_cells = np.broadcast_to(cell, speed.shape)[moving]
+            rose += np.bincount((sector[moving] * n_bins + speed_class[moving]) * n_cells + moving_cells,
+                                minlength=n_sectors * n_bins * n_cells)
+            n_valid += valid.sum(axis=0)
+            n_calm += (valid & ~moving).sum(axis=0)
+
+    shape = (len(lat), len(lon))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        percent = np.where(n_valid > 0, 100 / n_valid, np.nan)
+    dp_sector = (dp_sector.reshape(n_sectors, n_cells) * percent).reshape((n_sectors,) + shape)
+    rose = (rose.reshape(n_sectors * n_bins, n_cells) * percent).reshape((n_sectors, n_bins) + shape)
+
+    # 合成输沙势：各方位DP按输沙方向（来向 + 180°）做矢量合成
+    toward = np.radians(sector_centers(n_sectors) + 180)[:, None, None]
+    rdp_x = np.sum(dp_sector * np.sin(toward), axis=0)
+    rdp_y = np.sum(dp_sector * np.cos(toward), axis=0)
+    DP = dp_sector.sum(axis=0)
+    RDP = np.hypot(rdp_x, rdp_y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        UDI = np.where(DP > 0, RDP / DP, np.nan)
+    return {'lon': lon, 'lat': lat, 'DP': DP, 'RDP': RDP, 'RDD': np.degrees(np.arctan2(rdp_x, rdp_y)) % 360,
+            'UDI': UDI, 'DP_sector': dp_sector, 'rose': rose, 'speed_bins': bins, 'calm': (n_calm * percent).reshape(shape)}
+
+
+def sample_at_sites(result, site_lon, site_lat):
+    """
+    在样点坐标处（双线性插值）提取DP、RDP、RDD、UDI、静风频率Calm及各方位的DP，返回DataFrame
+    RDD通过插值合成输沙势的两个分量再求方向，避免0°/360°处插值出错
+    """
+    lat, lon = result['lat'], result['lon']
+    lat_order, lon_order = np.argsort(lat), np.argsort(lon)
+    points = np.column_stack([np.asarray(site_lat, dtype=float), np.asarray(site_lon, dtype=float)])
+
+    def interpolate(field):
+        field = field[np.ix_(lat_order, lon_order)]
+        return RegularGridInterpolator((lat[lat_order], lon[lon_order]), field, bounds_error=False)(points)
+
+    rdd = np.radians(result['RDD'])
+    rdp_x = interpolate(result['RDP'] * np.sin(rdd))
+    rdp_y = interpolate(result['RDP'] * np.cos(rdd))
+    DP = interpolate(result['DP'])
+    RDP = np.hypot(rdp_x, rdp_y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        UDI = np.where(DP > 0, RDP / DP, np.nan)
+    sites = pd.DataFrame({'Lon': points[:, 1], 'Lat': points[:, 0], 'DP': DP, 'RDP': RDP,
+                          'RDD': np.degrees(np.arctan2(rdp_x, rdp_y)) % 360, 'UDI': UDI, 'Calm': interpolate(result['calm'])})
+    for center, field in zip(sector_centers(len(result['DP_sector'])), result['DP_sector']):
+        sites[f'DP_{center:g}'] = interpolate(field)
+    return sites
+
+
+def plot_drift_potential(ax, result, cmap='YlOrBr', arrow_color='k', scale=None):
+    """
+    在ax上绘制DP分布（填色）与合成输沙方向（箭头长度与RDP成正比），可以直接叠加在流线图的子图上
+    返回填色图对象，用于添加色阶
+    """
+    mesh = ax.pcolormesh(result['lon'], result['lat'], result['DP'], cmap=cmap, shading='auto', alpha=0.6)
+    rdd = np.radians(result['RDD'])
+    ax.quiver(result['lon'], result['lat'], result['RDP'] * np.sin(rdd), result['RDP'] * np.cos(rdd),
+              color=arrow_color, scale=scale, width=0.003)
+    return mesh
+
+
+def plot_drift_rose(ax, dp_sector, calm=None):
+    # 在极坐标子图ax上绘制某一样点的输沙玫瑰（各方位DP），方位为风的来向，正北朝上、顺时针
+    # 静风不属于任何方位，给出calm（%）时标注在图的中心
+    n_sectors = len(dp_sector)
+    ax.set_theta_zero_location('N')
+    ax.set_theta_direction(-1)
+    ax.bar(np.radians(sector_centers(n_sectors)), dp_sector, width=2 * np.pi / n_sectors * 0.9,
+           color='#dd62ab', edgecolor='k', linewidth=0.3)
+    if calm is not None:
+        ax.text(0, 0, f'Calm\n{calm:.1f}%', ha='center', va='center', fontsize=7)
+    return ax
+
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
+    # 各季节的逐小时ERA5 u10/v10（不能使用Streamplot.py的季节平均文件）
+    file_path = ['1-MAM_hourly.nc', '2-JJA_hourly.nc', '3-SON_hourly.nc', '4-DJF_hourly.nc']
+    sites_path = 'Sites.csv'
+    xrange = [115, 130]  # 与Streamplot.py的显示范围一致
+    yrange = [43, 50]
+
+    sites = pd.read_csv(sites_path, encoding='ISO-8859-1')
+    fig, axs = plt.subplots(2, 2, figsize=(25/2.54, 12/2.54), dpi=600, squeeze=False)
+    for ax, data_path in zip(axs.flat, file_path):
+        result = drift_potential(data_path, xrange, yrange)
+        mesh = plot_drift_potential(ax, result)
+        ax.set_xlim(xrange)
+        ax.set_ylim(yrange)
+        ax.set_title(data_path, loc='left', fontdict={'family': 'Times New Roman', 'weight': 'bold', 'size': 11})
+        fig.colorbar(mesh, ax=ax, label='DP (VU)')
+        sample_at_sites(result, sites['Lon'], sites['Lat']).to_csv(data_path.replace('.nc', '_DP_sites.csv'), index=False)
+        print(f'{data_path}的输沙势计算完成')
+    plt.savefig('Drift potential.png')
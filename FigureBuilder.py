@@ -0,0 +1,213 @@
+"""
+按任务清单批量生成论文插图，代替逐个手动运行Boxplot.py、Scatter plot*.py、Streamplot.py：
+    1. 同一个CSV只读取一次，在主进程中加载后通过进程池的初始化函数传给各子进程，多个图共用
+    2. 各图在子进程中并行绘制
+    3. 类似make的增量构建：由脚本内容、绘图函数、参数和输入文件内容计算每个图的哈希值，
+       与上次构建的记录一致且输出文件都存在时跳过，只重新绘制有改动的图
+
+任务清单为JSON列表（示例见figures.json），每一项为一个图：
+    {"script": "Boxplot.py",                 # 绘图脚本
+     "function": "plot_optimized_boxplots",  # 脚本中的绘图函数，调用方式为function(data, output, **params)
+     "data": "Data1_Zonal.csv",              # 输入数据，load为"csv"（默认）时传入读取好的DataFrame
+     "load": "csv",                          # 为"path"时直接传入data（文件路径或路径列表），如Streamplot.py的nc文件
+     "read_csv": {},                         # 可选，pd.read_csv的参数
+     "output": "Zonal.png",                  # 输出文件，一次导出多张图的函数可以是列表
+     "params": {},                           # 可选，传给绘图函数的其他参数
+     "depends": []}                          # 可选，其他影响结果的文件（如Cities.csv，以及脚本导入的本地模块
+                                             # ScatterEngine.py等），参与哈希值的计算
+
+以下是宝可能要修改的代码部分：
+    1. jobs_path：任务清单的路径
+    2. n_workers：并行的进程数，None时为CPU核数
+    3. force：为True时忽略构建记录，重新绘制所有图
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# 构建记录：各输出文件对应的哈希值，以及输入文件的哈希值缓存
+manifest_path = 'figure_build.json'
+
+REQUIRED_KEYS = ('script', 'function', 'data', 'output')
+
+
+def load_jobs(jobs_path):
+    # 读取任务清单并检查必需的字段
+    with open(jobs_path, encoding='utf-8') as f:
+        jobs = json.load(f)
+    for i, job in enumerate(jobs):
+        missing = [key for key in REQUIRED_KEYS if key not in job]
+        if missing:
+            raise ValueError(f"第{i + 1}个任务缺少字段：{', '.join(missing)}")
+        if job.get('load', 'csv') == 'csv' and not isinstance(job['data'], str):
+            raise ValueError(f"第{i + 1}个任务的load为csv，data应为单个CSV文件")
+    return jobs
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _dataset_key(job):
+    # 相同的文件和读取参数只读取一次
+    return json.dumps([job['data'], job.get('read_csv', {})], sort_keys=True)
+
+
+def file_digest(path, stamps, known=None):
+    """
+    计算文件内容的SHA1哈希值，按(路径, 大小, 修改时间)记录在stamps中
+    known为上次构建记录的stamps，文件未改动时直接取用，不重复计算
+    """
+    stat = os.stat(path)
+    stamp = f'{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}'
+    if stamp not in stamps and known and stamp in known:
+        stamps[stamp] = known[stamp]
+    elif stamp not in stamps:
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 24), b''):
+                sha1.update(block)
+        stamps[stamp] = sha1.hexdigest()
+    return stamps[stamp]
+
+
+def job_digest(job, stamps, known=None):
+    # 脚本、函数、参数、输出路径和所有输入文件的内容共同决定一个图，任何一项改变都需要重新绘制
+    inputs = _as_list(job['data']) + list(job.get('depends', []))
+    parts = {
+        'script': file_digest(job['script'], stamps, known),
+        'function': job['function'],
+        'load': job.get('load', 'csv'),
+        'read_csv': job.get('read_csv', {}),
+        'params': job.get('params', {}),
+        'output': job['output'],
+        'inputs': [file_digest(path, stamps, known) for path in inputs],
+    }
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+# 子进程中的共享数据与已导入的脚本
+_worker_datasets = {}
+_modules = {}
+
+
+def _init_worker(datasets):
+    # 进程池的初始化函数：每个子进程只接收一次读取好的数据，并使用不弹出窗口的Agg后端
+    global _worker_datasets
+    import matplotlib
+    matplotlib.use('Agg')
+    _worker_datasets = datasets
+
+
+def load_script(script):
+    """
+    导入绘图脚本（各脚本的示例调用都在__main__判断内，导入时不会执行）
+    文件名是合法模块名时按模块名导入，保证脚本内部的进程池可以在子进程中找到函数；文件名含空格时按路径导入
+    """
+    path = os.path.abspath(script)
+    if path not in _modules:
+        directory, filename = os.path.split(path)
+        name = os.path.splitext(filename)[0]
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+        if name.isidentifier():
+            module = importlib.import_module(name)
+        else:
+            spec = importlib.util.spec_from_file_location('_figure_' + hashlib.sha1(path.encode('utf-8')).hexdigest()[:8], path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        _modules[path] = module
+    return _modules[path]
+
+
+def _render(job):
+    # 在子进程中绘制一个图，成功时返回None，失败时返回错误信息
+    import matplotlib.pyplot as plt
+
+    try:
+        module = load_script(job['script'])
+        data = _worker_datasets[_dataset_key(job)] if job.get('load', 'csv') == 'csv' else job['data']
+        # 各脚本会修改rcParams（如sns.set），每个图结束后恢复，避免影响同一进程中的下一个图
+        with plt.rc_context():
+            getattr(module, job['function'])(data, job['output'], **job.get('params', {}))
+        return None
+    except Exception:
+        return traceback.format_exc()
+    finally:
+        plt.close('all')
+
+
+def build_figures(jobs, n_workers=None, force=False, manifest_path=manifest_path):
+    """
+    增量构建任务清单中的所有图，返回{'built': [...], 'skipped': [...], 'failed': {输出: 错误信息}}
+    只有绘制成功的图会写入构建记录，失败的图下次运行时会重新绘制
+    """
+    manifest = {'stamps': {}, 'outputs': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    stamps = {}  # 只记录本次用到的文件，文件改动前的旧记录随之清除
+
+    pending, skipped, failed = [], [], {}
+    for job in jobs:
+        outputs = _as_list(job['output'])
+        try:
+            digest = job_digest(job, stamps, manifest['stamps'])
+        except OSError as error:  # 输入文件不存在时只跳过这个图
+            failed.update({output: str(error) for output in outputs})
+            print(f"绘制失败：{', '.join(outputs)}\n{error}")
+            continue
+        if not force and all(os.path.exists(output) and manifest['outputs'].get(output) == digest for output in outputs):
+            skipped.append(job)
+        else:
+            pending.append((job, digest))
+    print(f"共{len(jobs)}个图，{len(skipped)}个未改动已跳过，{len(pending)}个待绘制\n")
+
+    # 只读取待绘制的图需要的CSV，每个文件只读取一次
+    datasets = {}
+    for job, _ in pending:
+        key = _dataset_key(job)
+        if job.get('load', 'csv') == 'csv' and key not in datasets:
+            datasets[key] = pd.read_csv(job['data'], **job.get('read_csv', {}))
+
+    built = []
+    if pending:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(datasets,)) as executor:
+            futures = [(job, digest, executor.submit(_render, job)) for job, digest in pending]
+            for job, digest, future in futures:
+                outputs = _as_list(job['output'])
+                error = future.result()
+                if error is None:
+                    manifest['outputs'].update({output: digest for output in outputs})
+                    built.append(job)
+                    print(f"已绘制：{', '.join(outputs)}")
+                else:
+                    for output in outputs:
+                        manifest['outputs'].pop(output, None)
+                        failed[output] = error
+                    print(f"绘制失败：{', '.join(outputs)}\n{error}")
+
+    # 写入临时文件后替换，避免中断时留下不完整的构建记录
+    manifest['stamps'] = stamps
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return {'built': built, 'skipped': skipped, 'failed': failed}
+
+
+# 子进程会重新导入本文件，因此示例调用需放在__main__判断内
+if __name__ == '__main__':
+    jobs_path = 'figures.json'  # 任务清单
+    n_workers = None  # 并行的进程数
+    force = False  # 为True时重新绘制所有图
+
+    result = build_figures(load_jobs(jobs_path), n_workers=n_workers, force=force)
+    print(f"\n完成：绘制{len(result['built'])}个，跳过{len(result['skipped'])}个，失败{len(result['failed'])}个文件")
@@ -0,0 +1,762 @@
+# -*- coding: utf-8 -*-
+"""
+基于Walling等简化后的多元混合模型的求解核心，供Code.py与TraceFinder.py共用
+
+目标函数：R_es = Σ((C_ssi - Σ C_si·P_s) / C_ssi)²，约束：ΣP_s = 1，P_s ≥ 0
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+
+def load_normalized_data(filepath_source, filepath_sand, factors):
+    # 读取数据
+    aeolian_sand_data = pd.read_csv(filepath_sand)
+    source_data = pd.read_csv(filepath_source)
+    return normalize_data(source_data, aeolian_sand_data, factors)
+
+
+def compute_max_values(source_data, aeolian_sand_data, factors):
+    # 标准化基准：物源样与风沙样合并后各指纹因子的最大值
+    return pd.concat([aeolian_sand_data[factors], source_data[factors]]).max()
+
+
+def normalize_data(source_data, aeolian_sand_data, factors):
+    # 标准化指纹因子浓度（以物源样与风沙样合并后的最大值为基准）
+    max_values = compute_max_values(source_data, aeolian_sand_data, factors)
+    aeolian_sand_data_norm = aeolian_sand_data[factors].div(max_values)
+    # pivot_table会按字母顺序重排列，这里按factors重新排列，保证与风沙样的因子顺序一致
+    source_data_norm = source_data.pivot_table(index='Source', values=factors, aggfunc='mean')[factors].div(max_values)
+    return aeolian_sand_data, aeolian_sand_data_norm, source_data_norm
+
+
+def objective_function(P, C_ssi, C_si):
+    R_es = np.sum(((C_ssi - np.dot(C_si, P)) / C_ssi) ** 2)
+    return R_es
+
+
+# 诊断信息的列：迭代次数、目标函数计算次数、求解耗时（秒）、是否收敛、求解器返回的状态
+DIAGNOSTIC_COLUMNS = ('Iterations', 'Evaluations', 'Solve_Time', 'Converged', 'Status')
+
+
+def _empty_info(n):
+    return {'Iterations': np.zeros(n, dtype=int), 'Evaluations': np.zeros(n, dtype=int), 'Solve_Time': np.zeros(n),
+            'Converged': np.ones(n, dtype=bool), 'Status': np.full(n, '', dtype=object)}
+
+
+def _valid_rows(C_ssi_all):
+    # 目标函数以C_ssi为分母，某个因子浓度为NaN、无穷或≤0的样品无法求解
+    return np.isfinite(C_ssi_all).all(axis=1) & (C_ssi_all > 0).all(axis=1)
+
+
+def _expand_rows(result, valid, return_info):
+    # 把有效样品的求解结果放回原来的位置，无效样品的贡献率为NaN，诊断信息记为未收敛
+    if valid.all():
+        return result
+    P_valid, info_valid = result if return_info else (result, None)
+    P = np.full((len(valid), P_valid.shape[1]), np.nan)
+    P[valid] = P_valid
+    if not return_info:
+        return P
+    info = _empty_info(len(valid))
+    for key in DIAGNOSTIC_COLUMNS:
+        info[key][valid] = info_valid[key]
+    info['Converged'][~valid] = False
+    info['Status'][~valid] = 'Invalid concentration (NaN, inf or <= 0)'
+    return P, info
+
+
+def solve_slsqp(C_ssi_all, C_si, P0=None, return_info=False):
+    """
+    逐个样品调用SLSQP求解，C_ssi_all为(样品数, 因子数)，C_si为(因子数, 物源区数)
+    P0为各样品的初始值（热启动，如上一次求解的结果），None时从均分开始
+    return_info=True时同时返回诊断信息：minimize返回的nit、nfev、success、message以及每个样品的求解耗时
+    """
+    m = C_si.shape[1]
+    cons = [{'type': 'eq', 'fun': lambda P: np.sum(P) - 1},  # 确保P_s的和为1
+            {'type': 'ineq', 'fun': lambda P: P}]            # 确保P_s的值非负
+    P_all = np.empty((C_ssi_all.shape[0], m))
+    info = _empty_info(len(C_ssi_all)) if return_info else None
+    for k, C_ssi in enumerate(C_ssi_all):
+        # 初始猜测，默认根据物源区数量 m 均分；热启动值无效（上次该样品无法求解）时也均分
+        initial_guess = P0[k] if P0 is not None and np.isfinite(P0[k]).all() else np.ones(m) / m
+        start = time.perf_counter()
+        res = minimize(objective_function, initial_guess, args=(C_ssi, C_si), constraints=cons, method='SLSQP')
+        P_all[k] = res.x
+        if return_info:
+            info['Solve_Time'][k] = time.perf_counter() - start
+            info['Iterations'][k], info['Evaluations'][k] = res.nit, res.nfev
+            info['Converged'][k], info['Status'][k] = res.success, res.message
+    return (P_all, info) if return_info else P_all
+
+
+def project_simplex(V):
+    """将V的每一行投影到单纯形{P | ΣP = 1, P ≥ 0}上（排序法）"""
+    n, m = V.shape
+    U = -np.sort(-V, axis=1)  # 每行降序排列
+    css = np.cumsum(U, axis=1) - 1
+    cond = U - css / np.arange(1, m + 1) > 0
+    rho = m - 1 - np.argmax(cond[:, ::-1], axis=1)  # 满足条件的最后一个位置
+    theta = css[np.arange(n), rho] / (rho + 1)
+    return np.maximum(V - theta[:, None], 0)
+
+
+def _quadratic_terms(C_ssi_all, C_si):
+    # 目标函数展开为 PᵀGP - 2cᵀP + 因子数，其中 G = C_siᵀ·diag(w²)·C_si，c = C_siᵀ·w，w = 1/C_ssi
+    n, m = C_si.shape
+    w = 1.0 / C_ssi_all
+    outer = (C_si[:, :, None] * C_si[:, None, :]).reshape(n, m * m)
+    G = ((w ** 2) @ outer).reshape(-1, m, m)
+    c = w @ C_si
+    return G, c
+
+
+def _active_set_polish(P, G, c, tol=1e-9):
+    """
+    按当前迭代点的非零分量（有效集）分组，在每组的有效集上直接解KKT方程得到精确解，
+    满足KKT条件的样品写回P，返回这些样品的布尔掩码
+    """
+    n_samples, m = P.shape
+    converged = np.zeros(n_samples, dtype=bool)
+    support = P > tol
+    patterns, inverse = np.unique(support, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    for g, pattern in enumerate(patterns):
+        rows = np.flatnonzero(inverse == g)
+        idx = np.flatnonzero(pattern)
+        s = len(idx)
+        if s == 0:
+            continue
+        K = np.zeros((len(rows), s + 1, s + 1))
+        K[:, :s, :s] = 2 * G[np.ix_(rows, idx, idx)]
+        K[:, :s, s] = 1
+        K[:, s, :s] = 1
+        rhs = np.concatenate([2 * c[np.ix_(rows, idx)], np.ones((len(rows), 1))], axis=1)
+        try:
+            sol = np.linalg.solve(K, rhs[:, :, None])[:, :, 0]
+        except np.linalg.LinAlgError:
+            continue  # 有效集上的方程奇异（物源区共线），继续迭代
+        P_s, mu = sol[:, :s], sol[:, s]
+        P_new = np.zeros((len(rows), m))
+        P_new[:, idx] = P_s
+        # KKT条件：有效集内P ≥ 0，有效集外梯度 + μ ≥ 0
+        grad = 2 * (np.einsum('kij,kj->ki', G[rows], P_new) - c[rows])
+        dual = (grad + mu[:, None])[:, ~pattern]
+        ok = (P_s >= -tol).all(axis=1) & (dual >= -tol * (1 + np.abs(mu[:, None]))).all(axis=1)
+        P_ok = np.maximum(P_new[ok], 0)
+        P[rows[ok]] = P_ok / P_ok.sum(axis=1, keepdims=True)
+        converged[rows[ok]] = True
+    return converged
+
+
+def solve_batch(C_ssi_all, C_si, P0=None, return_info=False, max_iter=5000, tol=1e-9, polish_every=20):
+    """
+    将全部样品视为一个批量的单纯形约束加权最小二乘问题，
+    使用解析梯度的加速投影梯度法（FISTA）迭代确定有效集，再在有效集上求KKT精确解
+    return_info=True时同时返回诊断信息，批量求解没有单个样品的耗时，Solve_Time为整批耗时按样品数平均
+    浓度含NaN、无穷或≤0的样品不参与求解，贡献率为NaN、Converged为False，不影响其余样品
+    """
+    start = time.perf_counter()
+    valid = _valid_rows(C_ssi_all)
+    G, c = _quadratic_terms(C_ssi_all[valid], C_si)
+    P0 = None if P0 is None else np.asarray(P0)[valid]
+    result = solve_quadratic(G, c, P0=P0, return_info=return_info, max_iter=max_iter, tol=tol, polish_every=polish_every)
+    result = _expand_rows(result, valid, return_info)
+    if return_info:
+        result[1]['Solve_Time'][:] = (time.perf_counter() - start) / max(len(C_ssi_all), 1)
+    return result
+
+
+def solve_quadratic(G, c, P0=None, return_info=False, max_iter=5000, tol=1e-9, polish_every=20):
+    """
+    批量求解 min PᵀGP - 2cᵀP，s.t. ΣP = 1，P ≥ 0；G为(问题数, m, m)，c为(问题数, m)
+    return_info=True时同时返回诊断信息：Iterations为收敛时的迭代次数（热启动直接满足KKT条件时为0），
+    Evaluations为梯度计算次数，达到max_iter仍未收敛的样品Converged为False
+    G或c含NaN、无穷的问题不参与求解，贡献率为NaN、Converged为False
+    """
+    valid = np.isfinite(G).all(axis=(1, 2)) & np.isfinite(c).all(axis=1)
+    if not valid.all():
+        P0 = None if P0 is None else np.asarray(P0)[valid]
+        result = solve_quadratic(G[valid], c[valid], P0, return_info, max_iter, tol, polish_every)
+        return _expand_rows(result, valid, return_info)
+    n_samples, m = c.shape
+    n_iter = np.full(n_samples, max_iter)
+    # 梯度 2(GP - c) 的Lipschitz常数为 2λmax(G)
+    step = 1.0 / (2 * np.linalg.eigvalsh(G)[:, -1])[:, None]
+    P = np.full((n_samples, m), 1.0 / m) if P0 is None else np.array(P0, dtype=float)
+    P[~np.isfinite(P).all(axis=1)] = 1.0 / m  # 热启动值无效（上次该样品无法求解）时从均分开始
+    active = np.arange(n_samples)  # 尚未收敛的样品
+    if P0 is not None:
+        # 热启动：初始值的有效集往往已是最优有效集，先直接检查KKT条件
+        done = _active_set_polish(P, G, c, tol)
+        n_iter[done] = 0
+        active = active[~done]
+    Y = P.copy()
+    t = np.ones(n_samples)
+    for it in range(1, max_iter + 1):
+        if active.size == 0:
+            break
+        Ya, Pa, ta = Y[active], P[active], t[active]
+        grad = 2 * (np.einsum('kij,kj->ki', G[active], Ya) - c[active])
+        P_next = project_simplex(Ya - step[active] * grad)
+        t_next = (1 + np.sqrt(1 + 4 * ta * ta)) / 2
+        Y[active] = P_next + ((ta - 1) / t_next)[:, None] * (P_next - Pa)
+        P[active] = P_next
+        t[active] = t_next
+        # 以有效集上的KKT条件作为收敛判据
+        if it % polish_every == 0:
+            P_active = P[active]
+            done = _active_set_polish(P_active, G[active], c[active], tol)
+            P[active] = P_active
+            n_iter[active[done]] = it
+            active = active[~done]
+            if active.size == 0:
+                break
+    if not return_info:
+        return P
+    info = _empty_info(n_samples)
+    info['Iterations'] = n_iter
+    info['Evaluations'] = n_iter
+    info['Converged'] = np.ones(n_samples, dtype=bool)
+    info['Converged'][active] = False
+    info['Status'] = np.where(info['Converged'], 'KKT conditions satisfied', 'Iteration limit reached').astype(object)
+    return P, info
+
+
+SOLVERS = {'slsqp': solve_slsqp, 'batch': solve_batch}
+
+
+def _check_method(method):
+    if method not in SOLVERS:
+        raise ValueError(f"未知的求解方法: {method}，可选: {', '.join(SOLVERS)}")
+
+
+# 进程池中每个工作进程持有的物源区矩阵C_si，由_init_worker在进程启动时写入一次
+_worker_C_si = None
+
+
+def _init_worker(C_si):
+    global _worker_C_si
+    _worker_C_si = C_si
+
+
+def _solve_chunk(method, C_ssi_chunk, P0_chunk=None, return_info=False):
+    return SOLVERS[method](C_ssi_chunk, _worker_C_si, P0_chunk, return_info)
+
+
+def _concat_info(infos):
+    return {key: np.concatenate([info[key] for info in infos]) for key in DIAGNOSTIC_COLUMNS}
+
+
+def solve_parallel(C_ssi_all, C_si, method='slsqp', n_workers=None, chunk_size=1000, return_info=False, executor=None):
+    """
+    将风沙样品矩阵按chunk_size分块，在进程池中并行求解，n_workers为None时使用全部CPU核心
+    C_si只在每个工作进程启动时传递一次，结果按原始样品顺序拼接
+    executor为已用_init_worker(C_si)初始化的进程池时直接使用（多次调用共用同一个进程池），否则临时创建
+    """
+    chunks = [C_ssi_all[start:start + chunk_size] for start in range(0, len(C_ssi_all), chunk_size)]
+    if not chunks:
+        P_all = np.empty((0, C_si.shape[1]))
+        return (P_all, _empty_info(0)) if return_info else P_all
+    # executor.map按提交顺序返回结果，保证与串行求解的样品顺序一致
+    n = len(chunks)
+    if executor is not None:
+        results = list(executor.map(_solve_chunk, [method] * n, chunks, [None] * n, [return_info] * n))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(C_si,)) as executor:
+            results = list(executor.map(_solve_chunk, [method] * n, chunks, [None] * n, [return_info] * n))
+    if return_info:
+        return np.vstack([P for P, _ in results]), _concat_info([info for _, info in results])
+    return np.vstack(results)
+
+
+def iter_solve_chunks(C_ssi_all, C_si, method='slsqp', n_workers=1, chunk_size=1000, P0=None, known=None,
+                      return_info=False):
+    """
+    按chunk_size分块求解，按样品顺序逐块返回(起始行, 该块的贡献率, 该块的诊断信息)，供需要显示进度或中途取消的调用方使用
+    n_workers=1时在当前进程中串行求解，否则在进程池中并行；生成器被提前关闭时取消尚未开始的分块
+    P0为各样品的初始值（热启动）；known为布尔掩码，为True的样品输入未变，直接取P0作为结果而不再求解
+    return_info=False时诊断信息为None；直接沿用的样品迭代次数与耗时记为0，Status为'Reused'
+    """
+    starts = range(0, len(C_ssi_all), chunk_size)
+    if known is None:
+        known = np.zeros(len(C_ssi_all), dtype=bool)
+
+    def split(start):
+        # 一个分块中需要求解的行及其初始值
+        rows = slice(start, start + chunk_size)
+        todo = ~known[rows]
+        return rows, todo, C_ssi_all[rows][todo], None if P0 is None else P0[rows][todo]
+
+    def merge(rows, todo, result):
+        P = np.empty((len(todo), C_si.shape[1])) if P0 is None else P0[rows].copy()
+        P_todo, info_todo = result if return_info else (result, None)
+        P[todo] = P_todo
+        if not return_info:
+            return P, None
+        info = _empty_info(len(todo))
+        info['Status'][:] = 'Reused'
+        if info_todo is not None:
+            for key in DIAGNOSTIC_COLUMNS:
+                info[key][todo] = info_todo[key]
+        return P, info
+
+    if n_workers == 1:
+        for start in starts:
+            rows, todo, C_ssi, P0_todo = split(start)
+            if todo.any():
+                result = SOLVERS[method](C_ssi, C_si, P0_todo, return_info)
+            else:
+                result = (P0_todo, None) if return_info else P0_todo
+            yield (start,) + merge(rows, todo, result)
+        return
+    executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(C_si,))
+    try:
+        futures = []
+        for start in starts:
+            rows, todo, C_ssi, P0_todo = split(start)
+            future = executor.submit(_solve_chunk, method, C_ssi, P0_todo, return_info) if todo.any() else None
+            futures.append((start, rows, todo, P0_todo, future))
+        for start, rows, todo, P0_todo, future in futures:
+            if future is not None:
+                result = future.result()
+            else:
+                result = (P0_todo, None) if return_info else P0_todo
+            yield (start,) + merge(rows, todo, result)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def build_results(specimens, sources, C_ssi_all, C_si, P_all, info=None):
+    """
+    创建结果表：Specimen、各物源区贡献率Contribution_*、拟合优度GOF
+    给出诊断信息info时，再增加DIAGNOSTIC_COLUMNS各列、约束违反量Constraint_Violation（|ΣP - 1| + Σmax(-P, 0)）
+    和最小标准化浓度Min_C_ssi（目标函数的分母，接近0时求解往往很慢或不收敛）
+    """
+    n_factors = C_si.shape[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        residual = np.abs((C_ssi_all - P_all @ C_si.T) / C_ssi_all)
+    results_df = pd.DataFrame({'Specimen': np.asarray(specimens)})
+    for j, source in enumerate(sources):
+        results_df[f'Contribution_{source}'] = P_all[:, j]
+    results_df['GOF'] = 1 - (1 / n_factors) * np.sum(residual, axis=1)
+    if info is not None:
+        for key in DIAGNOSTIC_COLUMNS:
+            results_df[key] = info[key]
+        results_df['Constraint_Violation'] = np.abs(P_all.sum(axis=1) - 1) + np.maximum(-P_all, 0).sum(axis=1)
+        results_df['Min_C_ssi'] = C_ssi_all.min(axis=1)
+    return results_df
+
+
+class SolveProfile:
+    """
+    记录一次计算各阶段的耗时（秒），阶段为load（读取）、normalize（标准化）、solve（求解）、write（写出结果），
+    同一阶段多次出现（如流式模式的各块）时累加
+    hook为可选的回调函数hook(事件, 耗时, 附加信息字典)，供外部的监控程序收集指标：每个阶段结束时以阶段名调用一次，
+    分块求解时每块结束再以'chunk'调用一次（附加信息含start、rows，以及给出诊断信息时的未收敛样品数与最长耗时）
+    """
+    def __init__(self, hook=None):
+        self.timings = {}
+        self.hook = hook
+
+    @contextmanager
+    def stage(self, name, **extra):
+        start = time.perf_counter()
+        yield
+        self.record(name, time.perf_counter() - start, **extra)
+
+    def record(self, name, elapsed, **extra):
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed
+        self.emit(name, elapsed, **extra)
+
+    def emit(self, event, elapsed, **extra):
+        if self.hook is not None:
+            self.hook(event, elapsed, extra)
+
+    def summary(self):
+        return ', '.join(f'{name} {elapsed:.3f} s' for name, elapsed in self.timings.items())
+
+
+def _chunk_extra(start, P, info):
+    extra = {'start': start, 'rows': len(P)}
+    if info is not None:
+        extra.update({'not_converged': int((~info['Converged'].astype(bool)).sum()),
+                      'max_solve_time': float(info['Solve_Time'].max()) if len(P) else 0.0})
+    return extra
+
+
+def draw_source_realizations(source_data, factors, max_values, sources, n_realizations, rng):
+    """
+    按各物源区每个指纹因子的均值与标准差（正态分布）抽取n_realizations组物源区浓度，
+    返回(实现数, 因子数, 物源区数)的三维数组，浓度为负的抽样截断为0
+    """
+    grouped = source_data[factors].div(max_values).groupby(source_data['Source'])
+    mean = grouped.mean().loc[sources, factors].values.T
+    std = grouped.std().loc[sources, factors].fillna(0).values.T  # 只有一个样品的物源区标准差记为0
+    draws = rng.normal(mean, std, size=(n_realizations,) + mean.shape)
+    return np.maximum(draws, 0)
+
+
+def iter_monte_carlo(C_ssi_all, C_si_draws, percentiles=(5, 95), block_size=200000):
+    """
+    对每个风沙样品在全部物源区浓度实现上求解贡献率，按样品顺序逐块返回(样品切片, 该块的统计量字典)
+    每次最多同时求解block_size个（样品×实现）问题，内存占用与样品数无关；实现数超过block_size时，
+    每块只含一个样品，并再按实现分批求解，此时除各实现的贡献率（实现数×物源区数，用于计算中位数和百分位数）外内存占用与实现数无关
+    """
+    n_samples, n_factors = C_ssi_all.shape
+    n_realizations, _, m = C_si_draws.shape
+    specimens_per_block = max(1, block_size // n_realizations)
+    realizations_per_block = min(n_realizations, block_size)
+    for start in range(0, n_samples, specimens_per_block):
+        C_ssi = C_ssi_all[start:start + specimens_per_block]
+        b = len(C_ssi)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w = 1.0 / C_ssi
+        w[~_valid_rows(C_ssi)] = np.nan  # 无效样品的二次项为NaN，solve_quadratic跳过这些问题，统计量为NaN
+        P = np.empty((b, n_realizations, m))
+        gof_sum = np.zeros(b)
+        for r_start in range(0, n_realizations, realizations_per_block):
+            draws = C_si_draws[r_start:r_start + realizations_per_block]
+            r = len(draws)
+            # 每个（样品, 实现）组合的二次项，形状为(b×r, m, m)与(b×r, m)
+            G = np.einsum('ki,rij,ril->krjl', w ** 2, draws, draws, optimize=True).reshape(-1, m, m)
+            c = np.einsum('ki,rij->krj', w, draws, optimize=True).reshape(-1, m)
+            P_block = solve_quadratic(G, c).reshape(b, r, m)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                residual = np.abs(C_ssi[:, None, :] - np.einsum('rij,krj->kri', draws, P_block)) / C_ssi[:, None, :]
+            gof_sum += (1 - residual.sum(axis=2) / n_factors).sum(axis=1)
+            P[:, r_start:r_start + r] = P_block
+        yield slice(start, start + b), {'mean': P.mean(axis=1), 'median': np.median(P, axis=1),
+                                        'percentiles': np.percentile(P, percentiles, axis=1),
+                                        'GOF': gof_sum / n_realizations}
+
+
+def solve_monte_carlo(C_ssi_all, C_si_draws, percentiles=(5, 95), block_size=200000):
+    # 汇总iter_monte_carlo的各块，返回各统计量数组组成的字典
+    n_samples, m = len(C_ssi_all), C_si_draws.shape[2]
+    stats = {'mean': np.empty((n_samples, m)), 'median': np.empty((n_samples, m)),
+             'percentiles': np.empty((len(percentiles), n_samples, m)), 'GOF': np.empty(n_samples)}
+    for block, block_stats in iter_monte_carlo(C_ssi_all, C_si_draws, percentiles, block_size):
+        stats['mean'][block] = block_stats['mean']
+        stats['median'][block] = block_stats['median']
+        stats['percentiles'][:, block] = block_stats['percentiles']
+        stats['GOF'][block] = block_stats['GOF']
+    return stats
+
+
+def build_monte_carlo_results(specimens, sources, stats, percentiles=(5, 95)):
+    # 每个物源区输出均值、中位数和百分位数区间，GOF为各次实现的平均拟合优度
+    results_df = pd.DataFrame({'Specimen': np.asarray(specimens)})
+    for j, source in enumerate(sources):
+        results_df[f'Contribution_{source}_Mean'] = stats['mean'][:, j]
+        results_df[f'Contribution_{source}_Median'] = stats['median'][:, j]
+        for q, values in zip(percentiles, stats['percentiles']):
+            results_df[f'Contribution_{source}_P{q:g}'] = values[:, j]
+    results_df['GOF'] = stats['GOF']
+    return results_df
+
+
+def solve_contributions_monte_carlo(filepath_source, filepath_sand, factors, n_realizations=1000,
+                                    percentiles=(5, 95), block_size=200000, seed=None, profile=None):
+    # 蒙特卡洛模式：物源区浓度不再取均值，而是按各因子的分布抽样，给出贡献率的不确定性
+    # profile为SolveProfile时记录读取与求解（含抽样）的耗时
+    profile = SolveProfile() if profile is None else profile
+    with profile.stage('load'):
+        aeolian_sand_data = pd.read_csv(filepath_sand)
+        source_data = pd.read_csv(filepath_source)
+    with profile.stage('solve', rows=len(aeolian_sand_data)):
+        return monte_carlo_contributions(source_data, aeolian_sand_data, factors, n_realizations=n_realizations,
+                                         percentiles=percentiles, block_size=block_size, seed=seed)
+
+
+def monte_carlo_contributions(source_data, aeolian_sand_data, factors, n_realizations=1000,
+                              percentiles=(5, 95), block_size=200000, seed=None, max_values=None):
+    # 与solve_contributions_monte_carlo相同，但直接使用已读取的数据（max_values可传入已算好的标准化基准）
+    if max_values is None:
+        max_values = compute_max_values(source_data, aeolian_sand_data, factors)
+    sources = np.sort(source_data['Source'].unique())  # 与pivot_table的物源区顺序一致
+    rng = np.random.default_rng(seed)
+    C_si_draws = draw_source_realizations(source_data, factors, max_values, sources, n_realizations, rng)
+    C_ssi_all = aeolian_sand_data[factors].div(max_values).values
+    stats = solve_monte_carlo(C_ssi_all, C_si_draws, percentiles=percentiles, block_size=block_size)
+    return build_monte_carlo_results(aeolian_sand_data['Specimen'], sources, stats, percentiles)
+
+
+def iter_monte_carlo_contributions(source_data, aeolian_sand_data, factors, n_realizations=1000,
+                                   percentiles=(5, 95), block_size=200000, seed=None, max_values=None):
+    # 与monte_carlo_contributions相同，但按样品顺序逐块返回结果表，拼接后与一次求解的结果一致
+    if max_values is None:
+        max_values = compute_max_values(source_data, aeolian_sand_data, factors)
+    sources = np.sort(source_data['Source'].unique())
+    rng = np.random.default_rng(seed)
+    C_si_draws = draw_source_realizations(source_data, factors, max_values, sources, n_realizations, rng)
+    C_ssi_all = aeolian_sand_data[factors].div(max_values).values
+    specimens = aeolian_sand_data['Specimen'].values
+    for block, block_stats in iter_monte_carlo(C_ssi_all, C_si_draws, percentiles, block_size):
+        yield build_monte_carlo_results(specimens[block], sources, block_stats, percentiles)
+
+
+def solve_contributions(filepath_source, filepath_sand, factors, method='slsqp', n_workers=1, chunk_size=1000,
+                        diagnostics=False, profile=None):
+    # n_workers=1时串行求解；大于1或为None（全部CPU核心）时分块在进程池中并行求解
+    # diagnostics=True时结果表增加各样品的诊断信息列；profile为SolveProfile时记录读取、标准化与求解的耗时
+    _check_method(method)
+    profile = SolveProfile() if profile is None else profile
+    with profile.stage('load'):
+        aeolian_sand_data = pd.read_csv(filepath_sand)
+        source_data = pd.read_csv(filepath_source)
+    with profile.stage('normalize'):
+        normalized = normalize_data(source_data, aeolian_sand_data, factors)
+    return solve_normalized(*normalized, method=method, n_workers=n_workers, chunk_size=chunk_size,
+                            diagnostics=diagnostics, profile=profile)
+
+
+def solve_normalized(aeolian_sand_data, aeolian_sand_data_norm, source_data_norm, method='slsqp', n_workers=1, chunk_size=1000,
+                     diagnostics=False, profile=None):
+    # 与solve_contributions相同，但直接使用normalize_data已标准化的数据
+    _check_method(method)
+    profile = SolveProfile() if profile is None else profile
+    C_ssi_all = aeolian_sand_data_norm.values
+    C_si = source_data_norm.values.T
+    with profile.stage('solve', rows=len(C_ssi_all)):
+        P_all, info = _solve_matrix(C_ssi_all, C_si, method, n_workers, chunk_size, diagnostics)
+    return build_results(aeolian_sand_data['Specimen'], source_data_norm.index, C_ssi_all, C_si, P_all, info)
+
+
+class WarmStartCache:
+    """
+    保存历次求解的各样品贡献率，按(样品, 物源区集合)索引，供更换指纹因子后重新求解时使用：
+        1. 求解方法、指纹因子、物源区矩阵与该样品的标准化浓度都未改变时，直接沿用上次的结果，不再求解
+        2. 其余在上次结果中出现过的样品以上次的贡献率作为初始值（热启动，可以跨求解方法）
+        3. 没有记录的样品从均分开始求解
+    同名样品按出现的先后次序区分；last_counts记录最近一次查询中三类样品的数量
+    """
+    def __init__(self):
+        self._runs = {}  # 物源区元组 -> {'keys', 'method', 'factors', 'C_si', 'C_ssi', 'P'}
+        self.last_counts = {'reused': 0, 'warm': 0, 'cold': 0}
+
+    @staticmethod
+    def _keys(specimens):
+        specimens = pd.Series(np.asarray(specimens))
+        return pd.MultiIndex.from_arrays([specimens, specimens.groupby(specimens).cumcount()])
+
+    def _same_problem(self, run, method, factors, C_si):
+        return run['method'] == method and run['factors'] == tuple(factors) and np.array_equal(run['C_si'], C_si)
+
+    def lookup(self, specimens, sources, factors, C_ssi_all, C_si, method, reuse=True):
+        # 返回(初始值P0, 可直接沿用的样品掩码known)，没有任何记录时P0为None；reuse=False时只热启动，不沿用结果
+        n = len(C_ssi_all)
+        run = self._runs.get(tuple(sources))
+        if run is None:
+            self.last_counts = {'reused': 0, 'warm': 0, 'cold': n}
+            return None, None
+        index = run['keys'].get_indexer(self._keys(specimens))
+        found = index >= 0
+        P0 = np.full((n, C_si.shape[1]), 1.0 / C_si.shape[1])
+        P0[found] = run['P'][index[found]]
+        known = np.zeros(n, dtype=bool)
+        if reuse and self._same_problem(run, method, factors, C_si):
+            known[found] = (run['C_ssi'][index[found]] == C_ssi_all[found]).all(axis=1)
+        self.last_counts = {'reused': int(known.sum()), 'warm': int((found & ~known).sum()), 'cold': int((~found).sum())}
+        return P0, known
+
+    def update(self, specimens, sources, factors, C_ssi_all, C_si, P_all, method):
+        """
+        记录已求解的样品（可以只是一部分，如中途取消时）；上次记录中本次未求解的样品仍保留作为热启动的初始值，
+        但求解方法、指纹因子或物源区矩阵改变后，这些样品不再满足直接沿用的条件
+        """
+        keys = self._keys(specimens)
+        C_ssi_all = np.asarray(C_ssi_all, dtype=float)
+        run = self._runs.get(tuple(sources))
+        if run is not None:
+            kept = ~run['keys'].isin(keys)
+            same = self._same_problem(run, method, factors, C_si)
+            old_C_ssi = run['C_ssi'][kept] if same else np.full((kept.sum(), C_ssi_all.shape[1]), np.nan)
+            keys = run['keys'][kept].append(keys)
+            C_ssi_all = np.vstack([old_C_ssi, C_ssi_all])
+            P_all = np.vstack([run['P'][kept], P_all])
+        self._runs[tuple(sources)] = {'keys': keys, 'method': method, 'factors': tuple(factors), 'C_si': np.array(C_si),
+                                      'C_ssi': C_ssi_all, 'P': np.asarray(P_all)}
+
+
+def iter_normalized(aeolian_sand_data, aeolian_sand_data_norm, source_data_norm, method='slsqp', n_workers=1, chunk_size=1000,
+                    warm_start=None, diagnostics=False, profile=None):
+    """
+    与solve_normalized相同，但每求解完chunk_size个样品就按顺序返回这一块的结果表
+    warm_start为WarmStartCache时，沿用输入未变的样品的结果、以上次的结果热启动其余样品，
+    并在结束（包括中途关闭生成器）时把已完成的样品写回缓存；diagnostics=True时不沿用上次的结果，
+    全部样品都重新求解（仍可热启动），诊断信息反映的是本次实际的求解过程
+    profile只计入求解各块的时间，不包括调用方处理各块结果的时间，结束（包括中途关闭或出错）时发出'solve'事件
+    """
+    _check_method(method)
+    C_ssi_all = aeolian_sand_data_norm.values
+    C_si = source_data_norm.values.T
+    specimens = aeolian_sand_data['Specimen'].values
+    sources, factors = list(source_data_norm.index), list(source_data_norm.columns)
+    P0, known = None, None
+    if warm_start is not None:
+        P0, known = warm_start.lookup(specimens, sources, factors, C_ssi_all, C_si, method, reuse=not diagnostics)
+    profile = SolveProfile() if profile is None else profile
+    solved = []
+    chunks = iter_solve_chunks(C_ssi_all, C_si, method, n_workers, chunk_size, P0, known, diagnostics)
+    try:
+        while True:
+            start_time = time.perf_counter()
+            try:
+                start, P, info = next(chunks)
+            except StopIteration:
+                break
+            elapsed = time.perf_counter() - start_time
+            profile.timings['solve'] = profile.timings.get('solve', 0.0) + elapsed
+            profile.emit('chunk', elapsed, **_chunk_extra(start, P, info))
+            solved.append(P)
+            rows = slice(start, start + len(P))
+            yield build_results(specimens[rows], source_data_norm.index, C_ssi_all[rows], C_si, P, info)
+    finally:
+        chunks.close()
+        n_done = sum(len(P) for P in solved)
+        profile.emit('solve', profile.timings.get('solve', 0.0), rows=n_done)
+        if warm_start is not None and solved:
+            warm_start.update(specimens[:n_done], sources, factors, C_ssi_all[:n_done], C_si, np.vstack(solved),
+                              method)
+
+
+def _solve_matrix(C_ssi_all, C_si, method, n_workers, chunk_size, return_info=False, executor=None):
+    # 返回(贡献率, 诊断信息)，return_info=False时诊断信息为None；executor见solve_parallel
+    if n_workers == 1:
+        result = SOLVERS[method](C_ssi_all, C_si, None, return_info)
+    else:
+        result = solve_parallel(C_ssi_all, C_si, method=method, n_workers=n_workers, chunk_size=chunk_size,
+                                return_info=return_info, executor=executor)
+    return result if return_info else (result, None)
+
+
+def sand_max_values(filepath_sand, factors, chunk_size=100000, sidecar_path=None):
+    """
+    分块扫描风沙样品文件，得到各指纹因子的最大值（流式模式下标准化所需的第一遍扫描）
+    给出sidecar_path时，记录全部数值列的最大值并保存，之后任意因子组合都可直接读取，
+    风沙样品文件比sidecar更新时重新计算
+    """
+    if sidecar_path is not None and os.path.exists(sidecar_path) \
+            and os.path.getmtime(sidecar_path) >= os.path.getmtime(filepath_sand):
+        sidecar = pd.read_csv(sidecar_path, index_col=0).iloc[:, 0]
+        if set(factors) <= set(sidecar.index):
+            return sidecar[factors]
+    usecols = None if sidecar_path is not None else factors
+    max_values = None
+    for chunk in pd.read_csv(filepath_sand, usecols=usecols, chunksize=chunk_size):
+        chunk_max = chunk.select_dtypes('number').max()
+        max_values = chunk_max if max_values is None else np.fmax(max_values, chunk_max)
+    if sidecar_path is not None:
+        max_values.rename('Max').to_csv(sidecar_path, index_label='Factor')
+    return max_values[factors]
+
+
+def _result_columns(sources, diagnostics):
+    # build_results输出的列名，用于续算前核对已有结果文件的表头
+    columns = ['Specimen'] + [f'Contribution_{source}' for source in sources] + ['GOF']
+    if diagnostics:
+        columns += list(DIAGNOSTIC_COLUMNS) + ['Constraint_Violation', 'Min_C_ssi']
+    return columns
+
+
+def _completed_rows(output_path, columns, settings, block_size=1 << 20):
+    """
+    统计已写出的结果行数：按固定大小的块读取文件、只统计换行符，不把整个文件读入内存；
+    若上次中断在某一行中间，先截掉不完整的最后一行
+    续算前核对表头与本次的列名columns一致，以及output_path + '.json'中记录的指纹因子与求解方法与settings一致，
+    不一致时抛出ValueError，避免把不同设置的结果追加到同一个文件中
+    """
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return 0
+    n_lines, end, offset = 0, 0, 0
+    with open(output_path, 'rb+') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            n_lines += block.count(b'\n')
+            last = block.rfind(b'\n')
+            if last >= 0:
+                end = offset + last + 1
+            offset += len(block)
+        f.truncate(end)
+    if n_lines == 0:
+        return 0
+    header = list(pd.read_csv(output_path, nrows=0).columns)
+    if header != columns:
+        raise ValueError(f"{output_path}的表头与本次计算的物源区或诊断列不一致，无法续算: {', '.join(header)}")
+    settings_path = output_path + '.json'
+    if os.path.exists(settings_path):
+        with open(settings_path, encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous != settings:
+            raise ValueError(f'{output_path}是用不同的指纹因子或求解方法计算的（{previous}），无法续算')
+    return n_lines - 1  # 不计表头
+
+
+def solve_contributions_streaming(filepath_source, filepath_sand, factors, output_path, method='batch',
+                                  read_chunk_size=10000, n_workers=1, chunk_size=1000,
+                                  sand_max_path=None, resume=False, diagnostics=False, profile=None):
+    """
+    流式模式：分块读取风沙样品文件（只读取Specimen与指纹因子列），逐块求解并追加写入output_path，
+    中途中断时已写出的结果不会丢失；resume=True时跳过output_path中已有的样品继续计算（指纹因子、求解方法与诊断设置须与上次相同）
+    diagnostics、profile同solve_contributions，各块的读取、求解与写出耗时分别累加到load、solve、write，
+    求解每块发出一次'chunk'事件，结束（包括出错）时发出一次'solve'事件
+    返回本次新计算的样品数
+    """
+    _check_method(method)
+    profile = SolveProfile() if profile is None else profile
+    # 标准化基准：物源样最大值与风沙样最大值（第一遍扫描或sidecar）中的较大者
+    with profile.stage('load'):
+        source_data = pd.read_csv(filepath_source)
+        sand_max = sand_max_values(filepath_sand, factors, read_chunk_size, sand_max_path)
+    with profile.stage('normalize'):
+        max_values = np.fmax(source_data[factors].max(), sand_max)
+        source_data_norm = source_data.pivot_table(index='Source', values=factors, aggfunc='mean')[factors].div(max_values)
+        C_si = source_data_norm.values.T
+
+    # 本次的指纹因子与求解方法记录在output_path + '.json'中，续算时核对
+    settings = {'factors': list(factors), 'method': method}
+    n_done = _completed_rows(output_path, _result_columns(source_data_norm.index, diagnostics), settings) if resume else 0
+    if not resume and os.path.exists(output_path):
+        os.remove(output_path)
+    if n_done == 0:
+        with open(output_path + '.json', 'w', encoding='utf-8') as f:
+            json.dump(settings, f, ensure_ascii=False)
+    n_new = 0
+    reader = pd.read_csv(filepath_sand, usecols=['Specimen'] + list(factors), chunksize=read_chunk_size,
+                         skiprows=range(1, n_done + 1))
+    # 并行求解时各块共用一个进程池，工作进程的启动与C_si的传递只进行一次
+    executor = None if n_workers == 1 else \
+        ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(C_si,))
+    try:
+        while True:
+            with profile.stage('load'):
+                chunk = next(reader, None)
+            if chunk is None:
+                break
+            with profile.stage('normalize'):
+                C_ssi_all = chunk[factors].div(max_values).values
+            start = time.perf_counter()
+            P_all, info = _solve_matrix(C_ssi_all, C_si, method, n_workers, chunk_size, diagnostics, executor)
+            elapsed = time.perf_counter() - start
+            profile.timings['solve'] = profile.timings.get('solve', 0.0) + elapsed
+            profile.emit('chunk', elapsed, **_chunk_extra(n_done + n_new, P_all, info))
+            with profile.stage('write'):
+                results_df = build_results(chunk['Specimen'], source_data_norm.index, C_ssi_all, C_si, P_all, info)
+                write_header = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+                results_df.to_csv(output_path, mode='a', header=write_header, index=False)
+            n_new += len(chunk)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        profile.emit('solve', profile.timings.get('solve', 0.0), rows=n_new)
+    return n_new
@@ -0,0 +1,267 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from 坐标转换 import detect_encoding
+
+# Semi-major axis (m) and flattening of the supported ellipsoids
+ELLIPSOIDS = {
+    'CGCS2000': (6378137.0, 1 / 298.257222101),
+    'WGS84': (6378137.0, 1 / 298.257223563),
+    'Xian80': (6378140.0, 1 / 298.257),
+    'Krassovsky': (6378245.0, 1 / 298.3),
+}
+
+
+def _krueger_coefficients(ellipsoid):
+    """Rectifying radius and the 6th-order Krüger series coefficients (Karney, 2011) of an ellipsoid."""
+    a, f = ELLIPSOIDS[ellipsoid]
+    n = f / (2 - f)
+    A = a / (1 + n) * (1 + n ** 2 / 4 + n ** 4 / 64 + n ** 6 / 256)
+    alpha = np.array([
+        n / 2 - 2 / 3 * n ** 2 + 5 / 16 * n ** 3 + 41 / 180 * n ** 4 - 127 / 288 * n ** 5 + 7891 / 37800 * n ** 6,
+        13 / 48 * n ** 2 - 3 / 5 * n ** 3 + 557 / 1440 * n ** 4 + 281 / 630 * n ** 5 - 1983433 / 1935360 * n ** 6,
+        61 / 240 * n ** 3 - 103 / 140 * n ** 4 + 15061 / 26880 * n ** 5 + 167603 / 181440 * n ** 6,
+        49561 / 161280 * n ** 4 - 179 / 168 * n ** 5 + 6601661 / 7257600 * n ** 6,
+        34729 / 80640 * n ** 5 - 3418889 / 1995840 * n ** 6,
+        212378941 / 319334400 * n ** 6,
+    ])
+    beta = np.array([
+        n / 2 - 2 / 3 * n ** 2 + 37 / 96 * n ** 3 - 1 / 360 * n ** 4 - 81 / 512 * n ** 5 + 96199 / 604800 * n ** 6,
+        1 / 48 * n ** 2 + 1 / 15 * n ** 3 - 437 / 1440 * n ** 4 + 46 / 105 * n ** 5 - 1118711 / 3870720 * n ** 6,
+        17 / 480 * n ** 3 - 37 / 840 * n ** 4 - 209 / 4480 * n ** 5 + 5569 / 90720 * n ** 6,
+        4397 / 161280 * n ** 4 - 11 / 504 * n ** 5 - 830251 / 7257600 * n ** 6,
+        4583 / 161280 * n ** 5 - 108847 / 3991680 * n ** 6,
+        20648693 / 638668800 * n ** 6,
+    ])
+    return np.sqrt(f * (2 - f)), A, alpha, beta
+
+
+def transverse_mercator(lon, lat, lon0, k0=1.0, ellipsoid='CGCS2000'):
+    """
+    Projects whole arrays of geographic coordinates with the transverse Mercator projection.
+
+    Parameters:
+        lon, lat (array-like): Decimal degrees.
+        lon0 (float or array-like): Central meridian of each point, so points in different zones are projected together.
+        k0 (float): Scale factor on the central meridian.
+        ellipsoid (str): A key of ELLIPSOIDS.
+
+    Returns:
+        tuple: x (m, east of the central meridian) and y (m, north of the equator), without false easting/northing.
+    """
+    e, A, alpha, _ = _krueger_coefficients(ellipsoid)
+    phi = np.radians(np.asarray(lat, dtype=float))
+    lam = np.radians(np.asarray(lon, dtype=float) - np.asarray(lon0, dtype=float))
+
+    # Conformal latitude
+    tau = np.tan(phi)
+    sigma = np.sinh(e * np.arctanh(e * tau / np.sqrt(1 + tau ** 2)))
+    tau_c = tau * np.sqrt(1 + sigma ** 2) - sigma * np.sqrt(1 + tau ** 2)
+    xi_c = np.arctan2(tau_c, np.cos(lam))
+    eta_c = np.arcsinh(np.sin(lam) / np.sqrt(tau_c ** 2 + np.cos(lam) ** 2))
+
+    # Krüger series, one term per row so that all points are evaluated at once
+    j2 = 2 * np.arange(1, 7).reshape((6,) + (1,) * np.ndim(xi_c))
+    xi = xi_c + np.sum(alpha.reshape(j2.shape) * np.sin(j2 * xi_c) * np.cosh(j2 * eta_c), axis=0)
+    eta = eta_c + np.sum(alpha.reshape(j2.shape) * np.cos(j2 * xi_c) * np.sinh(j2 * eta_c), axis=0)
+    return k0 * A * eta, k0 * A * xi
+
+
+def inverse_transverse_mercator(x, y, lon0, k0=1.0, ellipsoid='CGCS2000', max_iter=10, tol=1e-14):
+    """
+    Inverse of transverse_mercator: x, y (m, without false easting/northing) back to longitude and latitude in decimal degrees.
+    """
+    e, A, _, beta = _krueger_coefficients(ellipsoid)
+    xi = np.asarray(y, dtype=float) / (k0 * A)
+    eta = np.asarray(x, dtype=float) / (k0 * A)
+
+    j2 = 2 * np.arange(1, 7).reshape((6,) + (1,) * np.ndim(xi))
+    xi_c = xi - np.sum(beta.reshape(j2.shape) * np.sin(j2 * xi) * np.cosh(j2 * eta), axis=0)
+    eta_c = eta - np.sum(beta.reshape(j2.shape) * np.cos(j2 * xi) * np.sinh(j2 * eta), axis=0)
+    tau_c = np.sin(xi_c) / np.sqrt(np.sinh(eta_c) ** 2 + np.cos(xi_c) ** 2)
+    lam = np.arctan2(np.sinh(eta_c), np.cos(xi_c))
+
+    # Newton iteration for tan(latitude) from the conformal latitude, applied to all points together
+    tau = tau_c.copy()
+    for _ in range(max_iter):
+        sigma = np.sinh(e * np.arctanh(e * tau / np.sqrt(1 + tau ** 2)))
+        tau_i = tau * np.sqrt(1 + sigma ** 2) - sigma * np.sqrt(1 + tau ** 2)
+        step = ((tau_c - tau_i) / np.sqrt(1 + tau_i ** 2)
+                * (1 + (1 - e ** 2) * tau ** 2) / ((1 - e ** 2) * np.sqrt(1 + tau ** 2)))
+        tau = tau + step
+        if np.all(np.abs(step) <= tol * np.maximum(1, np.abs(tau))):
+            break
+    return np.degrees(lam) + np.asarray(lon0, dtype=float), np.degrees(np.arctan(tau))
+
+
+def gauss_kruger_zone(lon, zone_width=3):
+    """
+    Gauss–Krüger zone number and central meridian for each longitude.
+    3° zones: central meridian = 3 × zone; 6° zones: central meridian = 6 × zone − 3.
+    """
+    lon = np.asarray(lon, dtype=float)
+    if zone_width == 3:
+        zone = np.floor((lon + 1.5) / 3).astype(int)
+        return zone, 3.0 * zone
+    if zone_width == 6:
+        zone = np.floor(lon / 6).astype(int) + 1
+        return zone, 6.0 * zone - 3
+    raise ValueError("zone_width must be 3 or 6")
+
+
+def gauss_kruger(lon, lat, zone_width=3, zone=None, ellipsoid='CGCS2000', zone_prefix=True):
+    """
+    Projects longitude/latitude to Gauss–Krüger coordinates (CGCS2000 by default).
+
+    Parameters:
+        lon, lat (array-like): Decimal degrees.
+        zone_width (int): 3 or 6 degree zones.
+        zone (int or array-like): Force a zone; by default each point gets the zone it lies in.
+        zone_prefix (bool): Prefix the zone number to the easting (e.g. 39500000 m), as on Chinese topographic maps.
+
+    Returns:
+        tuple: easting (m), northing (m), zone.
+    """
+    if zone is None:
+        zone, lon0 = gauss_kruger_zone(lon, zone_width)
+    else:
+        zone = np.broadcast_to(np.asarray(zone, dtype=int), np.shape(lon))
+        lon0 = 3.0 * zone if zone_width == 3 else 6.0 * zone - 3
+    x, y = transverse_mercator(lon, lat, lon0, k0=1.0, ellipsoid=ellipsoid)
+    easting = x + 500000 + (zone * 1e6 if zone_prefix else 0)
+    return easting, y, zone
+
+
+def inverse_gauss_kruger(easting, northing, zone=None, zone_width=3, ellipsoid='CGCS2000', zone_prefix=True):
+    """
+    Inverse of gauss_kruger. With zone_prefix the zone number is read from the prefix of the easting unless zone is given.
+    Returns longitude and latitude in decimal degrees.
+    """
+    easting = np.asarray(easting, dtype=float)
+    if zone_prefix:
+        prefix = np.floor(easting / 1e6)
+        easting = easting - prefix * 1e6
+        zone = prefix if zone is None else zone
+    elif zone is None:
+        raise ValueError("zone is required when the easting has no zone prefix")
+    zone = np.asarray(zone, dtype=float)
+    lon0 = 3.0 * zone if zone_width == 3 else 6.0 * zone - 3
+    return inverse_transverse_mercator(easting - 500000, northing, lon0, k0=1.0, ellipsoid=ellipsoid)
+
+
+def utm_zone(lon, lat):
+    """UTM zone number for each point, including the Norway and Svalbard exceptions."""
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    zone = (np.floor((lon + 180) / 6).astype(int) % 60) + 1
+    zone = np.where((lat >= 56) & (lat < 64) & (lon >= 3) & (lon < 12), 32, zone)
+    svalbard = (lat >= 72) & (lat < 84)
+    for lon_min, lon_max, svalbard_zone in ((0, 9, 31), (9, 21, 33), (21, 33, 35), (33, 42, 37)):
+        zone = np.where(svalbard & (lon >= lon_min) & (lon < lon_max), svalbard_zone, zone)
+    return zone
+
+
+def utm(lon, lat, zone=None, ellipsoid='WGS84'):
+    """
+    Projects longitude/latitude to UTM (k0 = 0.9996, false northing 10000000 m in the southern hemisphere).
+    Returns easting (m), northing (m), zone and a boolean array that is True in the northern hemisphere.
+    """
+    lat = np.asarray(lat, dtype=float)
+    zone = utm_zone(lon, lat) if zone is None else np.broadcast_to(np.asarray(zone, dtype=int), lat.shape)
+    x, y = transverse_mercator(lon, lat, 6.0 * zone - 183, k0=0.9996, ellipsoid=ellipsoid)
+    north = lat >= 0
+    return x + 500000, np.where(north, y, y + 10000000), zone, north
+
+
+def inverse_utm(easting, northing, zone, north=True, ellipsoid='WGS84'):
+    """Inverse of utm. Returns longitude and latitude in decimal degrees."""
+    northing = np.asarray(northing, dtype=float)
+    northing = np.where(north, northing, northing - 10000000)
+    lon0 = 6.0 * np.asarray(zone, dtype=int) - 183
+    return inverse_transverse_mercator(np.asarray(easting, dtype=float) - 500000, northing, lon0,
+                                       k0=0.9996, ellipsoid=ellipsoid)
+
+
+def project_sites(input_csv_path, output_csv_path, system='gk3', lon_column='Longitude', lat_column='Latitude',
+                  ellipsoid=None, chunksize=100000, encoding=None):
+    """
+    Adds projected coordinates to a site table in decimal degrees (e.g. the output of convert_dms_to_decimal).
+    The table is processed in chunks and Easting, Northing and Zone columns are appended.
+
+    Parameters:
+        system (str): 'gk3' or 'gk6' for 3°/6° Gauss–Krüger (CGCS2000 by default), 'utm' for UTM (WGS84 by default).
+        ellipsoid (str): Override the default ellipsoid of the chosen system.
+    """
+    encoding = encoding or detect_encoding(input_csv_path)
+    reader = pd.read_csv(input_csv_path, encoding=encoding, chunksize=chunksize)
+    for i, data in enumerate(reader):
+        lon, lat = data[lon_column].to_numpy(dtype=float), data[lat_column].to_numpy(dtype=float)
+        with np.errstate(invalid='ignore'):  # NaN coordinates give NaN results
+            if system in ('gk3', 'gk6'):
+                easting, northing, zone = gauss_kruger(lon, lat, zone_width=int(system[2]), ellipsoid=ellipsoid or 'CGCS2000')
+            elif system == 'utm':
+                easting, northing, zone, north = utm(lon, lat, ellipsoid=ellipsoid or 'WGS84')
+                data['Hemisphere'] = np.where(np.isnan(lat), '', np.where(north, 'N', 'S'))
+            else:
+                raise ValueError("system must be 'gk3', 'gk6' or 'utm'")
+        # Rows without coordinates (e.g. rows convert_dms_to_decimal could not convert) keep an empty zone
+        data['Easting'], data['Northing'] = easting, northing
+        data['Zone'] = pd.Series(zone, index=data.index).where(np.isfinite(lon) & np.isfinite(lat)).astype('Int64')
+        data.to_csv(output_csv_path, index=False, encoding='utf-8', mode='w' if i == 0 else 'a', header=i == 0)
+    print(f"Projected coordinates saved to {output_csv_path}")
+
+
+def self_check(n_points=200000, seed=0):
+    """
+    Round-trip accuracy check: random points are projected and transformed back for every system.
+    Prints and returns the largest position error (m) of each system; raises AssertionError above 1 mm.
+    """
+    rng = np.random.default_rng(seed)
+    lon = rng.uniform(-180, 180, n_points)
+    lat = rng.uniform(-80, 84, n_points)
+    # Gauss–Krüger is checked over China and UTM over the whole UTM latitude range
+    lon_cn, lat_cn = rng.uniform(73, 136, n_points), rng.uniform(3, 54, n_points)
+
+    def error_m(lon1, lat1, lon2, lat2):
+        d_lon = (lon2 - lon1 + 180) % 360 - 180
+        return np.hypot(d_lon * np.cos(np.radians(lat1)), lat2 - lat1) * 111320
+
+    errors = {}
+    for zone_width in (3, 6):
+        e, n, _ = gauss_kruger(lon_cn, lat_cn, zone_width=zone_width)
+        errors[f'gk{zone_width}'] = error_m(lon_cn, lat_cn, *inverse_gauss_kruger(e, n, zone_width=zone_width)).max()
+    e, n, zone, north = utm(lon, lat)
+    errors['utm'] = error_m(lon, lat, *inverse_utm(e, n, zone, north)).max()
+
+    for name, error in errors.items():
+        print(f"{name}: max round-trip error {error:.3e} m")
+        assert error < 1e-3, f"{name} round-trip error {error} m exceeds 1 mm"
+    return errors
+
+
+def benchmark(n_points=1000000, seed=0):
+    """Throughput of the forward and inverse transforms (points per second)."""
+    rng = np.random.default_rng(seed)
+    lon, lat = rng.uniform(73, 136, n_points), rng.uniform(3, 54, n_points)
+    results = {}
+    start = time.perf_counter()
+    e, n, _ = gauss_kruger(lon, lat)
+    results['gauss_kruger'] = n_points / (time.perf_counter() - start)
+    start = time.perf_counter()
+    inverse_gauss_kruger(e, n)
+    results['inverse_gauss_kruger'] = n_points / (time.perf_counter() - start)
+    for name, rate in results.items():
+        print(f"{name}: {rate:,.0f} points/s")
+    return results
+
+
+if __name__ == '__main__':
+    self_check()
+    benchmark()
+
+    # Example usage: project the output of convert_dms_to_decimal to 3° Gauss–Krüger (CGCS2000)
+    input_csv_path = r'样点数据_New.csv'
+    output_csv_path = r'样点数据_GK.csv'
+    project_sites(input_csv_path, output_csv_path, system='gk3')
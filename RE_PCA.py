@@ -0,0 +1,243 @@
+"""
+稀土元素的主成分分析，RE_PCA.r的Python版本：KMO（MSA）、Bartlett球形检验、特征值、载荷、得分、碎石图与双标图
+    1. 标准化所需的均值、标准差与协方差在一次分块读取中累加完成，数据不需要全部读入内存
+    2. 只需要前几个主成分时，用随机SVD（随机投影 + 幂迭代）代替完整的特征分解
+    3. 主成分得分在第二次分块读取时计算
+结果与R中prcomp(scale. = TRUE)一致（主成分的正负号可能不同，这里统一为绝对值最大的系数为正）
+
+以下是宝可能要修改的代码部分：
+    1. data_path：输入的CSV文件，第一列为样品名（Specimen），最后一列为分组（class），其余列参与PCA
+    2. n_components：需要的主成分个数，None时计算全部
+"""
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.patches import Circle
+from scipy.stats import chi2
+
+
+def _chunks(source, chunksize):
+    # source可以是CSV路径或DataFrame，统一按块返回
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+
+def default_columns(source):
+    # 与RE_PCA.r相同：排除第一列（Specimen）和最后一列（class）
+    header = source.columns if isinstance(source, pd.DataFrame) else pd.read_csv(source, nrows=0).columns
+    return list(header[1:-1])
+
+
+def stream_moments(source, columns=None, chunksize=100000):
+    """
+    一次分块读取累加样本数、均值和离差平方和矩阵（Chan等的合并公式，数值上比直接累加x·xᵀ稳定）
+    含缺失值的行不参与计算（与prcomp一致）
+    返回字典：n、mean、std（ddof=1）、cov、corr、columns
+    """
+    columns = default_columns(source) if columns is None else list(columns)
+    n, mean, m2 = 0, np.zeros(len(columns)), np.zeros((len(columns), len(columns)))
+    for chunk in _chunks(source, chunksize):
+        x = chunk[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        x = x[np.isfinite(x).all(axis=1)]
+        if len(x) == 0:
+            continue
+        n_b, mean_b = len(x), x.mean(axis=0)
+        centered = x - mean_b
+        delta = mean_b - mean
+        total = n + n_b
+        m2 += centered.T @ centered + np.outer(delta, delta) * n * n_b / total
+        mean += delta * n_b / total
+        n = total
+    if n < 2:
+        raise ValueError('有效样本数少于2，无法计算协方差')
+    cov = m2 / (n - 1)
+    std = np.sqrt(np.diag(cov))
+    return {'n': n, 'mean': mean, 'std': std, 'cov': cov, 'corr': cov / np.outer(std, std), 'columns': columns}
+
+
+def kmo(corr):
+    """
+    Kaiser-Meyer-Olkin抽样适合性检验（同psych::KMO）：由相关矩阵的逆计算偏相关系数
+    返回总体MSA和各变量的MSA；相关矩阵奇异时使用伪逆
+    """
+    try:
+        inverse = np.linalg.inv(corr)
+    except np.linalg.LinAlgError:
+        inverse = np.linalg.pinv(corr)
+    d = np.sqrt(np.diag(inverse))
+    partial = -inverse / np.outer(d, d)
+    off = ~np.eye(len(corr), dtype=bool)
+    r2 = np.where(off, corr ** 2, 0)
+    p2 = np.where(off, partial ** 2, 0)
+    overall = r2.sum() / (r2.sum() + p2.sum())
+    per_variable = r2.sum(axis=0) / (r2.sum(axis=0) + p2.sum(axis=0))
+    return overall, per_variable
+
+
+def bartlett_sphericity(corr, n):
+    """
+    Bartlett球形检验（同psych::cortest.bartlett）：χ² = -(n - 1 - (2p + 5) / 6)·ln|R|，自由度p(p - 1) / 2
+    返回χ²、自由度和p值
+    """
+    p = len(corr)
+    sign, logdet = np.linalg.slogdet(corr)
+    statistic = -(n - 1 - (2 * p + 5) / 6) * logdet
+    df = p * (p - 1) / 2
+    return statistic, df, chi2.sf(statistic, df)
+
+
+def randomized_eigh(A, k, oversample=10, n_iter=7, seed=0):
+    """
+    对称半正定矩阵A的前k个特征值与特征向量（随机投影 + 幂迭代，Halko等，2011）
+    计算量约为O(p²·k)，p较大而k较小时远快于完整的特征分解
+    """
+    rng = np.random.default_rng(seed)
+    Q = A @ rng.standard_normal((A.shape[0], min(k + oversample, A.shape[0])))
+    for _ in range(n_iter):
+        Q, _ = np.linalg.qr(Q)
+        Q = A @ Q
+    Q, _ = np.linalg.qr(Q)
+    values, vectors = np.linalg.eigh(Q.T @ A @ Q)
+    order = np.argsort(values)[::-1][:k]
+    return values[order], Q @ vectors[:, order]
+
+
+def principal_components(corr, n_components=None, method='auto', oversample=10, n_iter=7, seed=0):
+    """
+    由相关矩阵计算主成分（即prcomp(scale. = TRUE)）
+    method：'full'为完整特征分解；'randomized'为随机SVD；'auto'在只需要少数主成分（不超过变量数的1/4）时使用随机SVD
+    返回特征值、旋转矩阵（prcomp的rotation）、载荷（rotation × 标准差）和方差贡献率（占全部p个变量的总方差）
+    """
+    p = len(corr)
+    k = p if n_components is None else min(n_components, p)
+    if method == 'randomized' or (method == 'auto' and k <= p // 4):
+        eigenvalues, rotation = randomized_eigh(corr, k, oversample, n_iter, seed)
+    elif method in ('full', 'auto'):
+        eigenvalues, rotation = np.linalg.eigh(corr)
+        order = np.argsort(eigenvalues)[::-1][:k]
+        eigenvalues, rotation = eigenvalues[order], rotation[:, order]
+    else:
+        raise ValueError("method必须为'auto'、'full'或'randomized'")
+
+    # 统一符号：每个主成分中绝对值最大的系数为正
+    signs = np.sign(rotation[np.abs(rotation).argmax(axis=0), np.arange(k)])
+    rotation = rotation * np.where(signs == 0, 1, signs)
+    eigenvalues = np.clip(eigenvalues, 0, None)
+    return {'eigenvalues': eigenvalues, 'sdev': np.sqrt(eigenvalues), 'rotation': rotation,
+            'loadings': rotation * np.sqrt(eigenvalues), 'proportion': eigenvalues / np.trace(corr)}
+
+
+def pca_scores(source, moments, rotation, chunksize=100000, keep_columns=None):
+    """
+    第二次分块读取，计算标准化数据的主成分得分（prcomp的x）
+    keep_columns：一并保留的列（如样品名、分组），返回DataFrame
+    """
+    columns = moments['columns']
+    keep_columns = [] if keep_columns is None else list(keep_columns)
+    parts = []
+    for chunk in _chunks(source, chunksize):
+        x = chunk[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        valid = np.isfinite(x).all(axis=1)
+        scores = (x[valid] - moments['mean']) / moments['std'] @ rotation
+        part = pd.DataFrame(scores, columns=[f'PC{i + 1}' for i in range(rotation.shape[1])], index=chunk.index[valid])
+        parts.append(pd.concat([chunk.loc[valid, keep_columns], part], axis=1))
+    return pd.concat(parts)
+
+
+def run_pca(source, columns=None, n_components=None, method='auto', chunksize=100000, keep_columns=None):
+    """
+    完整流程：一次读取累加协方差 → KMO与Bartlett检验 → 主成分 → 第二次读取计算得分
+    返回字典：moments、kmo、kmo_per_variable、bartlett（χ², 自由度, p值）、components、scores
+    """
+    moments = stream_moments(source, columns, chunksize)
+    overall, per_variable = kmo(moments['corr'])
+    components = principal_components(moments['corr'], n_components, method)
+    scores = pca_scores(source, moments, components['rotation'], chunksize, keep_columns)
+    return {'moments': moments, 'kmo': overall,
+            'kmo_per_variable': pd.Series(per_variable, index=moments['columns']),
+            'bartlett': bartlett_sphericity(moments['corr'], moments['n']),
+            'components': components, 'scores': scores}
+
+
+def plot_scree(eigenvalues, output_path='Scree.png'):
+    # 碎石图（同screeplot(type = "lines")）
+    fig, ax = plt.subplots(figsize=(6, 4.5))
+    ax.plot(np.arange(1, len(eigenvalues) + 1), eigenvalues, marker='o', color='k')
+    ax.set_xticks(np.arange(1, len(eigenvalues) + 1))
+    ax.set_xlabel('Component')
+    ax.set_ylabel('Variances')
+    ax.set_title('Scree Plot')
+    fig.savefig(output_path, dpi=300)
+    plt.close(fig)
+
+
+def _ellipse(points, prob=0.68, n=100):
+    # 正态分布数据椭圆（同ggbiplot的ellipse = TRUE）
+    if len(points) < 3:
+        return None
+    mean, cov = points.mean(axis=0), np.cov(points, rowvar=False)
+    values, vectors = np.linalg.eigh(cov)
+    theta = np.linspace(0, 2 * np.pi, n)
+    circle = np.column_stack([np.cos(theta), np.sin(theta)]) * np.sqrt(chi2.ppf(prob, 2))
+    return mean + circle * np.sqrt(np.clip(values, 0, None)) @ vectors.T
+
+
+def plot_biplot(scores, components, variable_names, groups=None, labels=None, output_path='PCA_Plot.png',
+                circle_prob=0.69, ellipse_prob=0.68):
+    """
+    PC1-PC2双标图，对应ggbiplot(obs.scale = 1, var.scale = 1, ellipse = TRUE, circle = TRUE)：
+    点为主成分得分，箭头为载荷，并按ggbiplot的方法缩放到相关圆的半径：缩放系数取载荷在全部保留的主成分上的最大行平方和，
+    而不只是PC1、PC2；labels为各点的标注文字，样品序号应与R的行名一样从1开始
+    """
+    u = np.asarray(scores, dtype=float)[:, :2]
+    loadings = components['loadings']
+    radius = np.sqrt(chi2.ppf(circle_prob, 2)) * np.prod(np.mean(u ** 2, axis=0)) ** 0.25
+    v = radius * loadings[:, :2] / np.sqrt(np.max(np.sum(loadings ** 2, axis=1)))
+
+    fig, ax = plt.subplots(figsize=(8, 6))
+    groups = np.full(len(u), '') if groups is None else np.asarray(groups)
+    for i, group in enumerate(pd.unique(groups)):
+        rows = groups == group
+        color = plt.get_cmap('tab10')(i % 10)
+        ax.scatter(u[rows, 0], u[rows, 1], s=12, color=color, label=str(group) if group != '' else None)
+        outline = _ellipse(u[rows], ellipse_prob)
+        if outline is not None:
+            ax.plot(outline[:, 0], outline[:, 1], color=color, linewidth=0.8)
+    if labels is not None:
+        for (x, y), label in zip(u, labels):
+            ax.text(x, y, str(label), fontsize=6, ha='center', va='bottom')
+    ax.add_patch(Circle((0, 0), radius, fill=False, color='0.5', linewidth=0.6))
+    for (x, y), name in zip(v, variable_names):
+        ax.annotate('', xy=(x, y), xytext=(0, 0), arrowprops={'arrowstyle': '->', 'color': 'darkred'})
+        ax.text(x * 1.08, y * 1.08, name, color='darkred', fontsize=6, ha='center', va='center')
+    proportion = components['proportion']
+    ax.set_xlabel(f'PC1 ({proportion[0] * 100:.1f}% explained var.)')
+    ax.set_ylabel(f'PC2 ({proportion[1] * 100:.1f}% explained var.)')
+    ax.set_title('PCA Biplot')
+    ax.set_aspect('equal', adjustable='datalim')
+    if len(pd.unique(groups)) > 1:
+        ax.legend(fontsize=8)
+    fig.savefig(output_path, dpi=300)
+    plt.close(fig)
+
+
+if __name__ == '__main__':
+    data_path = 'RareEarth.csv'
+    n_components = None
+
+    columns = default_columns(data_path)
+    header = pd.read_csv(data_path, nrows=0).columns
+    result = run_pca(data_path, columns, n_components, keep_columns=[header[0], header[-1]])
+
+    print(f"\nKMO Value:\n{result['kmo']:.4f}")
+    print(f"\nBartlett's Test of Sphericity p-value:\n{result['bartlett'][2]:.4g}")
+    print(f"\nEigenvalues:\n{np.round(result['components']['eigenvalues'], 4)}")
+
+    plot_scree(result['components']['eigenvalues'], 'Scree.png')
+    scores = result['scores']
+    plot_biplot(scores[['PC1', 'PC2']], result['components'], columns, groups=scores[header[-1]],
+                labels=scores.index + 1, output_path='PCA_Plot.png')
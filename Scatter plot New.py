@@ -4,9 +4,7 @@ import pandas as pd
 import numpy as np
 from matplotlib.font_manager import FontProperties
 
-# 由于无法直接访问外部文件路径，以下代码块假设数据已正确加载到data DataFrame中
-data_path = 'Data_New.csv'  # 请根据实际情况修改文件路径
-data = pd.read_csv(data_path)
+from ScatterEngine import scatter_figure
 
 # 定义顺序和标签，这些设置假定已正确定义
 source_order = ['H', 'K', 'L', 'N', 'T', 'S']
@@ -14,15 +12,6 @@ sedenvs_order = [1, 2, 3, 4, 6, 0]
 source_labels = {'H': '呼伦贝尔', 'K': '科尔沁', 'L': '拉林河及第二松花江', 'N': '嫩江及其支流', 'T': '洮儿河及大兴安岭山前', 'S': '风沙堆积'}
 sedenvs_labels = {1: '风沙相', 2: '洪流相', 3: '河床相', 4: '湖沼相', 6: '残坡积相', 0: '风沙堆积'}
 
-# 假设data是已经加载的DataFrame
-data['Source_label'] = data['Source'].map(source_labels)
-data['SedEnvs_label'] = data['SedEnvs'].map(sedenvs_labels)
-
-# 设置绘图风格
-sns.set(style="ticks")
-plt.rcParams['font.family'] = 'Times New Roman'
-plt.rcParams['font.size'] = 10
-
 # 定义坐标对和子图标题，坐标轴标签
 coords = [('X1', 'Y1'), ('X2', 'Y2')]
 titles = ['(b)', '(d)']
@@ -30,32 +19,35 @@ x_labels = ['Hf/Nb', '(La:Sm)$_{N}$']
 y_labels = ['Zr/Nb', '(Gd:Yb)$_{N}$']
 filenames = ['subplot_b.png', 'subplot_d.png']
 
-# 分别导出4张子图
-for i in range(2):
-    plt.figure(figsize=(7, 5), dpi=600)  # 单独设置每张图的大小
-    ax = sns.scatterplot(data=data, x=coords[i][0], y=coords[i][1], 
-                         hue='Source', hue_order=source_order,
-                         style='SedEnvs', style_order=sedenvs_order,
-                         palette='tab10')
-    ax.set_title(titles[i], fontdict={'fontsize': 11, 'fontweight': 'bold', 'fontname': 'Times New Roman'}, loc='left')
-    ax.set_xlabel(x_labels[i], fontsize=11, fontname='Times New Roman')
-    ax.set_ylabel(y_labels[i], fontsize=11, fontname='Times New Roman')
-    # 生成自定义图例
-    # Source图例
-    source_handles_labels = [(handle, label) for handle, label in zip(*ax.get_legend_handles_labels()) if label in source_labels]
-    source_handles, source_labels_ordered = zip(*[(handle, source_labels[label]) for handle, label in source_handles_labels])
-    # SedEnvs图例
-    sedenvs_handles_labels = [(handle, label) for handle, label in zip(*ax.get_legend_handles_labels()) if label.isdigit()]
-    sedenvs_handles, sedenvs_labels_ordered = zip(*[(handle, sedenvs_labels[int(label)]) for handle, label in sedenvs_handles_labels])
-    # 清除当前图例
-    ax.legend_.remove()
-    # 添加新图例
-    source_legend = ax.legend(source_handles, source_labels_ordered, title='', bbox_to_anchor=(1.05, 1), loc='upper left', prop={'family': 'SimSun', 'size': 10})
-    ax.add_artist(source_legend)
-    ax.legend(sedenvs_handles, sedenvs_labels_ordered, title='', bbox_to_anchor=(1.05, 0.5), loc='upper left', prop={'family': 'SimSun', 'size': 10})
-    plt.subplots_adjust(left=0.08, right=0.68, bottom=0.1, top=0.95)
-    plt.savefig(filenames[i])  # 保存每张图
-    plt.close()  # 关闭图形，以便开始下一个
+
+def plot_scatter_panels(data, filenames=filenames, coords=coords, titles=titles, x_labels=x_labels, y_labels=y_labels,
+                        density_threshold=20000):
+    """
+    每个坐标对单独导出一张散点图（按物源区上色、按沉积环境区分符号），保存为filenames中对应的文件
+    data为已加载的DataFrame（在FigureBuilder.py中多个图共用一次读取）；点数超过density_threshold时改为密度图
+    """
+    # 设置绘图风格
+    sns.set(style="ticks")
+    plt.rcParams['font.family'] = 'Times New Roman'
+    plt.rcParams['font.size'] = 10
+
+    # 分别导出各张子图
+    for i in range(len(filenames)):
+        fig = scatter_figure(data, [coords[i]], filenames[i], [titles[i]], [x_labels[i]], [y_labels[i]],
+                             hue='Source', hue_order=source_order, hue_labels=source_labels,
+                             style='SedEnvs', style_order=sedenvs_order, style_labels=sedenvs_labels,
+                             figsize=(7, 5), dpi=600,  # 单独设置每张图的大小
+                             subplots_adjust=dict(left=0.08, right=0.68, bottom=0.1, top=0.95),
+                             density_threshold=density_threshold)
+        plt.close(fig)  # 关闭图形，以便开始下一个
+
+
+if __name__ == '__main__':
+    # 由于无法直接访问外部文件路径，以下代码块假设数据已正确加载到data DataFrame中
+    data_path = 'Data_New.csv'  # 请根据实际情况修改文件路径
+    data = pd.read_csv(data_path)
+    plot_scatter_panels(data)
+
 
 
 
@@ -0,0 +1,117 @@
+"""
+散点图的统一绘图引擎，供Scatter plot.py、Scatter plot New.py、Scatter plot 2.py调用：
+    1. 每个(颜色分组, 符号分组)只调用一次ax.scatter，绘制为一个栅格化的PathCollection，代替seaborn逐点映射符号
+    2. 图例直接由标签字典生成，不再从ax.get_legend_handles_labels()中筛选
+    3. 点数超过density_threshold时改为按颜色分组绘制六边形密度图（hexbin）
+    4. 一次读取的数据可以绘制多个坐标对（X1/Y1…X4/Y4），既可以放在同一张图的子图中，也可以分别导出
+颜色与符号的顺序与seaborn相同（palette='tab10'，符号按seaborn默认的顺序），与原来的图保持一致
+"""
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.colors import LinearSegmentedColormap, to_rgba
+from matplotlib.lines import Line2D
+
+# seaborn默认的符号顺序（均为实心符号）
+MARKERS = ['o', 'X', (4, 0, 45), 'P', (4, 0, 0), (4, 1, 0), '^', (4, 1, 45), 'v']
+
+# 图例中符号分组使用的颜色（与seaborn相同的深灰色）
+STYLE_LEGEND_COLOR = '.2'
+
+
+def category_colors(order, palette='tab10'):
+    # 按order的顺序为各分组分配调色板中的颜色
+    colors = plt.get_cmap(palette).colors
+    return {level: colors[i % len(colors)] for i, level in enumerate(order)}
+
+
+def category_markers(order):
+    # 按order的顺序为各分组分配符号
+    return {level: MARKERS[i % len(MARKERS)] for i, level in enumerate(order)}
+
+
+def legend_handles(order, labels, colors=None, markers=None, s=36):
+    """
+    由标签字典生成图例的句柄和文字，只包含labels中有的分组
+    colors为None时使用STYLE_LEGEND_COLOR（符号图例），markers为None时使用圆点（颜色图例）
+    """
+    handles, texts = [], []
+    for level in order:
+        if level not in labels:
+            continue
+        handles.append(Line2D([], [], linestyle='', marker=markers[level] if markers else 'o', markersize=np.sqrt(s),
+                              markerfacecolor=colors[level] if colors else STYLE_LEGEND_COLOR,
+                              markeredgecolor='w', markeredgewidth=0.08 * np.sqrt(s)))
+        texts.append(labels[level])
+    return handles, texts
+
+
+def scatter_panel(ax, data, x, y, hue, hue_order, style=None, style_order=None, palette='tab10', s=36,
+                  density_threshold=20000, gridsize=60, rasterized=True):
+    """
+    在ax上绘制一个坐标对的散点图，返回颜色字典和符号字典（用于生成图例）
+    点数不超过density_threshold时，每个(hue, style)分组绘制为一个PathCollection；
+    超过时每个hue分组绘制一层六边形密度图，颜色由透明过渡到该组的颜色，此时不再区分符号
+    """
+    colors = category_colors(hue_order, palette)
+    markers = category_markers(style_order) if style is not None else None
+    xy = data[[x, y]].to_numpy(dtype=float)
+    valid = np.isfinite(xy).all(axis=1)
+    xy, data = xy[valid], data[valid]
+
+    if len(xy) > density_threshold:
+        extent = (xy[:, 0].min(), xy[:, 0].max(), xy[:, 1].min(), xy[:, 1].max())
+        hue_groups = data.groupby(hue, sort=False).indices
+        for level in hue_order:
+            if level not in hue_groups:
+                continue
+            rows = hue_groups[level]
+            cmap = LinearSegmentedColormap.from_list(str(level), [to_rgba(colors[level], 0.1), to_rgba(colors[level], 1)])
+            ax.hexbin(xy[rows, 0], xy[rows, 1], gridsize=gridsize, extent=extent, mincnt=1, bins='log', cmap=cmap,
+                      linewidths=0, rasterized=rasterized)
+        return colors, None
+
+    groups = data.groupby(hue if style is None else [hue, style], sort=False).indices
+    # 按hue_order、style_order的顺序绘制，保证图层的上下关系固定
+    order = [(h, st) for h in hue_order for st in (style_order if style is not None else [None])]
+    for h, st in order:
+        rows = groups.get((h, st) if style is not None else h)
+        if rows is None:
+            continue
+        ax.scatter(xy[rows, 0], xy[rows, 1], s=s, color=colors[h], marker=markers[st] if markers else 'o',
+                   edgecolor='w', linewidths=0.08 * np.sqrt(s), rasterized=rasterized)
+    return colors, markers
+
+
+def scatter_figure(data, coords, output_path, titles, x_labels, y_labels, hue, hue_order, hue_labels,
+                   style=None, style_order=None, style_labels=None, style_legend=True, nrows=1, ncols=1,
+                   figsize=(7, 5), dpi=600, subplots_adjust=None, s=36, density_threshold=20000, gridsize=60):
+    """
+    在一张图中绘制多个坐标对（nrows×ncols个子图），每个子图右侧添加颜色图例和符号图例，保存到output_path并返回Figure
+    coords：[('X1', 'Y1'), ...]；titles、x_labels、y_labels与coords一一对应
+    """
+    fig, axs = plt.subplots(nrows, ncols, figsize=figsize, dpi=dpi, squeeze=False)
+    for i, (ax, (x, y)) in enumerate(zip(axs.flat, coords)):
+        colors, markers = scatter_panel(ax, data, x, y, hue, hue_order, style, style_order, s=s,
+                                        density_threshold=density_threshold, gridsize=gridsize)
+        ax.set_title(titles[i], fontdict={'fontsize': 11, 'fontweight': 'bold', 'fontname': 'Times New Roman'}, loc='left')
+        ax.set_xlabel(x_labels[i], fontsize=11, fontname='Times New Roman')
+        ax.set_ylabel(y_labels[i], fontsize=11, fontname='Times New Roman')
+
+        # 颜色图例
+        handles, texts = legend_handles(hue_order, hue_labels, colors=colors, s=s)
+        hue_legend = ax.legend(handles, texts, title='', bbox_to_anchor=(1.05, 1), loc='upper left', prop={'family': 'SimSun', 'size': 10})
+        # 符号图例（密度图模式下没有符号）
+        if style_legend and markers is not None:
+            ax.add_artist(hue_legend)
+            handles, texts = legend_handles(style_order, style_labels, markers=markers, s=s)
+            ax.legend(handles, texts, title='', bbox_to_anchor=(1.05, 0.5), loc='upper left', prop={'family': 'SimSun', 'size': 10})
+
+    # 多余的子图位置不显示
+    for ax in axs.flat[len(coords):]:
+        fig.delaxes(ax)
+
+    if subplots_adjust:
+        fig.subplots_adjust(**subplots_adjust)
+    fig.savefig(output_path)
+    return fig
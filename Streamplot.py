@@ -1,45 +1,130 @@
 """
 以下是宝可能要修改的代码部分：
-    1. 第52-55行：输入文件的名字（这里已经采用了相对路径），需要注意使用右斜杠“/”
-    2. 第142行：输出文件的路径，同样需要使用右斜杠“/”
+    1. file_path列表：输入文件的名字（这里已经采用了相对路径），需要注意使用右斜杠“/”
+    2. output_path：输出文件的路径，同样需要使用右斜杠“/”
 其余参数已经给宝进行了尽可能详细的注释，可以根据实际效果来进行相应的调整
 """
 
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import matplotlib.pyplot as plt
 from netCDF4 import Dataset
-from scipy.interpolate import griddata
 import pandas as pd
 
-# 封装一个函数streamplot_data用于计算绘制流线图所需的数据，传入该函数的参数是nc文件路径
-def streamplot_data(data_path):
-    nc_data = Dataset(data_path, mode='r')  # 读取nc文件
+# 不规则散点网格的三角剖分缓存，键为经纬度坐标的哈希值，同一网格的u、v以及多个nc文件共用一次剖分
+_triangulation_cache = {}
 
-    # 读取风速数据
-    u_wind = nc_data.variables['u10'][:]
-    v_wind = nc_data.variables['v10'][:]
 
-    # 计算时间维的平均值
-    u_mean = np.mean(u_wind, axis=0)
-    v_mean = np.mean(v_wind, axis=0)
+def _is_uniform(axis):
+    # 判断一维坐标轴是否等间距（升序或降序均可）
+    step = np.diff(axis)
+    return len(axis) < 3 or np.allclose(step, step[0], rtol=1e-6, atol=0)
 
-    # 读取经纬度坐标
-    lat = nc_data.variables['latitude'][:]
-    lon = nc_data.variables['longitude'][:]
 
-    nc_data.close()  # 数据读取完毕，关闭nc文件
+def regrid_to_uniform(lon, lat, fields, lon_new, lat_new, method='cubic'):
+    """
+    将fields（与经纬网同形的二维数组列表）插值到等间距经纬网(lon_new, lat_new)上
+        1. 经纬度为等间距一维坐标（如ERA5）：新网格与原网格的格点完全相同，只需把纬度（和经度）调整为升序，无需插值
+        2. 经纬度为非等间距一维坐标：使用可分离的规则网格插值RegularGridInterpolator
+        3. 经纬度为二维散点坐标：Delaunay三角剖分只构建一次，u、v及同一网格的其他文件共用
+    """
+    fields = [np.ma.filled(np.ma.asarray(field, dtype=float), np.nan) for field in fields]
 
-    # 创建新的等间距经纬网
-    lon_new = np.linspace(lon.min(), lon.max(), len(lon))  # 保持原始点数
-    lat_new = np.linspace(lat.min(), lat.max(), len(lat))  # 保持原始点数
+    if lon.ndim == 1 and lat.ndim == 1:
+        # 先把坐标轴调整为升序
+        lon_order = np.argsort(lon)
+        lat_order = np.argsort(lat)
+        lon_sorted, lat_sorted = lon[lon_order], lat[lat_order]
+        fields = [field[np.ix_(lat_order, lon_order)] for field in fields]
+        if _is_uniform(lon_sorted) and _is_uniform(lat_sorted) \
+                and len(lon_sorted) == len(lon_new) and len(lat_sorted) == len(lat_new):
+            return fields
+        from scipy.interpolate import RegularGridInterpolator
+        # 三次插值每个方向至少需要4个点
+        grid_method = method if min(len(lon_sorted), len(lat_sorted)) >= 4 else 'linear'
+        Lat_new, Lon_new = np.meshgrid(lat_new, lon_new, indexing='ij')
+        points = np.stack([Lat_new.ravel(), Lon_new.ravel()], axis=-1)
+        return [RegularGridInterpolator((lat_sorted, lon_sorted), field, method=grid_method,
+                                        bounds_error=False)(points).reshape(Lat_new.shape) for field in fields]
+
+    # 二维散点坐标：三角剖分按坐标缓存
+    from scipy.interpolate import CloughTocher2DInterpolator, LinearNDInterpolator
+    from scipy.spatial import Delaunay
+    points = np.column_stack([np.ravel(lon), np.ravel(lat)])
+    key = hash(points.tobytes())
+    if key not in _triangulation_cache:
+        _triangulation_cache[key] = Delaunay(points)
+    tri = _triangulation_cache[key]
+    values = np.stack([field.ravel() for field in fields], axis=-1)
+    interpolator = CloughTocher2DInterpolator(tri, values) if method == 'cubic' else LinearNDInterpolator(tri, values)
     Lon_new, Lat_new = np.meshgrid(lon_new, lat_new)
+    result = interpolator(Lon_new, Lat_new)
+    return [result[..., i] for i in range(len(fields))]
+
+
+def extent_slice(axis, bounds, margin):
+    # 根据显示范围bounds（外扩margin度）计算坐标轴上需要读取的连续索引范围，bounds为None时读取全部
+    if bounds is None:
+        return slice(None)
+    inside = np.flatnonzero((axis >= min(bounds) - margin) & (axis <= max(bounds) + margin))
+    if inside.size == 0:
+        raise ValueError(f'显示范围{bounds}与nc文件的坐标范围[{axis.min()}, {axis.max()}]没有交集')
+    return slice(inside.min(), inside.max() + 1)
+
+
+def read_wind_mean(data_path, xrange=None, yrange=None, margin=0.5, time_chunk=240):
+    """
+    读取nc文件中u10、v10的时间平均值
+        1. 先根据显示范围xrange、yrange（外扩margin度）计算经纬度的索引范围，只读取该范围内的数据
+        2. 沿时间维每次读取time_chunk个时次，累加求和与有效值个数，内存占用与时次数无关
+        3. 缺测值（_FillValue或NaN）不参与平均，某格点全部缺测时结果为NaN
+    返回经度、纬度和u、v的时间平均值
+    """
+    with Dataset(data_path, mode='r') as nc_data:
+        lat = np.asarray(nc_data.variables['latitude'][:])
+        lon = np.asarray(nc_data.variables['longitude'][:])
+        if lat.ndim == 1 and lon.ndim == 1:
+            lat_slice = extent_slice(lat, yrange, margin)
+            lon_slice = extent_slice(lon, xrange, margin)
+        else:
+            lat_slice = lon_slice = slice(None)  # 二维散点坐标无法按索引裁剪，读取全部
+
+        means = []
+        for name in ('u10', 'v10'):
+            variable = nc_data.variables[name]
+            n_time = variable.shape[0]
+            total = count = None
+            for start in range(0, n_time, time_chunk):
+                block = np.ma.masked_invalid(variable[start:start + time_chunk, lat_slice, lon_slice])
+                block_sum = block.sum(axis=0, dtype=float).filled(0)  # 以双精度累加，避免float32变量多时次累加的误差
+                block_count = block.count(axis=0)
+                total = block_sum if total is None else total + block_sum
+                count = block_count if count is None else count + block_count
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means.append(np.where(count > 0, total / count, np.nan))
+
+    if lat.ndim == 1 and lon.ndim == 1:
+        return lon[lon_slice], lat[lat_slice], means[0], means[1]
+    return lon, lat, means[0], means[1]
+
 
-    # 使用原始经纬网格作为插值源点
-    Lon, Lat = np.meshgrid(lon, lat)
+# 封装一个函数streamplot_data用于计算绘制流线图所需的数据，传入该函数的参数是nc文件路径
+# xrange、yrange为显示范围，给出时只读取该范围（外扩margin度）内的数据；time_chunk为每次读取的时次数
+def streamplot_data(data_path, xrange=None, yrange=None, margin=0.5, time_chunk=240, method='cubic'):
+    # 读取风速数据并计算时间维的平均值（按显示范围裁剪、沿时间维分块累加）
+    lon, lat, u_mean, v_mean = read_wind_mean(data_path, xrange, yrange, margin, time_chunk)
+
+    # 创建新的等间距经纬网
+    lon_new = np.linspace(lon.min(), lon.max(), np.shape(lon)[-1])  # 保持原始点数
+    lat_new = np.linspace(lat.min(), lat.max(), np.shape(lat)[0])  # 保持原始点数
 
-    # 对u_mean和v_mean进行插值，确保与新的Lon_new和Lat_new网格匹配
-    u_mean_new = griddata((Lon.flatten(), Lat.flatten()), u_mean.flatten(), (Lon_new, Lat_new), method='cubic')
-    v_mean_new = griddata((Lon.flatten(), Lat.flatten()), v_mean.flatten(), (Lon_new, Lat_new), method='cubic')
+    # 对u_mean和v_mean进行插值，确保与新的等间距经纬网匹配
+    # ERA5等规则网格只需把纬度调整为升序，不再逐点进行三角剖分插值
+    u_mean_new, v_mean_new = regrid_to_uniform(np.asarray(lon), np.asarray(lat), [u_mean, v_mean], lon_new, lat_new, method)
 
     # 计算风速大小
     speed_new = np.sqrt(u_mean_new**2 + v_mean_new**2)
@@ -48,101 +133,343 @@ def streamplot_data(data_path):
     # 因此，在这里我们将这五个变量构成一个元组，作为函数的返回值（也就是函数要输出给我们的结果）
     return lon_new, lat_new, u_mean_new, v_mean_new, speed_new
 
-# 首先，在这个列表中输入我们所需可视化的所有nc文件
-file_path = ['1-MAM.nc',
-             '2-JJA.nc',
-             '3-SON.nc',
-             '4-DJF.nc']
-print(f"待绘制{len(file_path)}个文件\n")
-
-# 接着，读取主要城市的坐标
-df = pd.read_csv('Cities.csv', encoding='ISO-8859-1')  # 不要更改encoding参数，避免读取文件时编码报错
-
-# 设置图片尺寸
-# 创建图片时，传入figsize参数的默认长度单位是英寸，因此在第66行进行了单位转换，即除以2.54
-width_cm = 25  # 宽度为25cm
-height_cm = 12  # 高度为12cm
-dpi_value = 600  # 分辨率为600dpi
-fig, axs = plt.subplots(2, 2, figsize=(width_cm/2.54, height_cm/2.54), dpi=dpi_value)  # 创建2x2布局的子图
-
-# 统一设置子图的显示范围
-xrange = [115, 130]  # 经度为115°E-130°E
-yrange = [43, 50]  # 纬度为43°N-50°N
-
-# 设置各个子图的小标题
-plot_labels = ['(a) MAM', '(b) JJA', '(c) SON', '(d) DJF']
-
-# 逐一绘制流线图
-i = 0  # 变量i的实际作用在于标记一个顺序，这个序号既表示了子图绘制的顺序、也表示了nc文件读取的顺序、还表示了小标题的顺序
-for ax in axs.flat:
-    data_path = file_path[i]  # 逐个读取file_path列表中的nc文件
-    
-    # 绘图
-    lon_new, lat_new, u_mean_new, v_mean_new, speed_new = streamplot_data(data_path)  # 通过streamplot_data函数获取插值所需的数据
-    strm = ax.streamplot(lon_new, lat_new, u_mean_new, v_mean_new,  # 绘图所需的数据
-                         color=speed_new,  # 表示按风速大小为流线上色
-                         cmap='Blues',  # 表示色阶的样式，这是一个从白色过渡到深蓝色的色阶
-                         # 更多色阶样式可以访问https://zhuanlan.zhihu.com/p/158871093
-                         linewidth=1,  # 表示流线的宽度
-                         minlength=0.4,  # 表示流线长度的最小值（默认0.1），适当加大这个值可以减少图中不连贯的流线
-                         density=1.25  # 表示流线的密度
-                         )
-    
-    # 添加主要的城市
-    for index, row in df.iterrows():
-        ax.scatter(row['Lon'], row['Lat'], s=10, color='#dd62ab')  # 添加点
-        
-        # 添加标签
-        if row['Name_Short'] == 'MD' or row['Name_Short'] == 'WL' or row['Name_Short'] == 'CC':
-            ax.text(row['Lon']-1.15, row['Lat'], row['Name_Short'], ha='left', va='center', fontsize=10, family='Times New Roman')
+
+def place_labels(x, y, labels, xrange, yrange, ax, fontsize=10, offset_pt=3, marker_pt=3):
+    """
+    快速的标签避让：依次尝试点的右、左、上、下四个位置，选择第一个不与已放置的标签、其他点以及图框重叠的位置
+    四个位置都有重叠时不丢弃标签，改用重叠最少的位置（优先在图框内，重叠数相同时按右、左、上、下的顺序）
+    标签大小按字号估算并换算为经纬度
+    返回[(x, y, 文字, ha, va), ...]
+    """
+    fig = ax.get_figure()
+    bbox = ax.get_position()
+    # 每磅对应的经度、纬度
+    deg_per_pt_x = (xrange[1] - xrange[0]) / (bbox.width * fig.get_figwidth() * 72)
+    deg_per_pt_y = (yrange[1] - yrange[0]) / (bbox.height * fig.get_figheight() * 72)
+    half_h = 0.6 * fontsize * deg_per_pt_y
+    gap_x, gap_y = (offset_pt + marker_pt) * deg_per_pt_x, (offset_pt + marker_pt) * deg_per_pt_y
+    marker_x, marker_y = marker_pt * deg_per_pt_x, marker_pt * deg_per_pt_y
+
+    placed = np.empty((0, 4))  # 已放置标签的[x0, x1, y0, y1]
+    result = []
+    for xi, yi, label in zip(x, y, labels):
+        width = 0.6 * fontsize * len(str(label)) * deg_per_pt_x
+        candidates = [(xi + gap_x, yi, 'left', 'center', [xi + gap_x, xi + gap_x + width, yi - half_h, yi + half_h]),
+                      (xi - gap_x, yi, 'right', 'center', [xi - gap_x - width, xi - gap_x, yi - half_h, yi + half_h]),
+                      (xi, yi + gap_y, 'center', 'bottom', [xi - width / 2, xi + width / 2, yi + gap_y, yi + gap_y + 2 * half_h]),
+                      (xi, yi - gap_y, 'center', 'top', [xi - width / 2, xi + width / 2, yi - gap_y - 2 * half_h, yi - gap_y])]
+        best, best_cost = None, None
+        for candidate in candidates:
+            x0, x1, y0, y1 = candidate[4]
+            outside = x0 < xrange[0] or x1 > xrange[1] or y0 < yrange[0] or y1 > yrange[1]
+            n_overlaps = np.count_nonzero((placed[:, 0] < x1) & (placed[:, 1] > x0) & (placed[:, 2] < y1) & (placed[:, 3] > y0)) + \
+                         np.count_nonzero((x > x0 - marker_x) & (x < x1 + marker_x) & (y > y0 - marker_y) & (y < y1 + marker_y))
+            cost = (outside, n_overlaps)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = candidate, cost
+            if cost == (False, 0):
+                break
+        tx, ty, ha, va, box = best
+        placed = np.vstack([placed, box])
+        result.append((tx, ty, label, ha, va))
+    return result
+
+
+def draw_point_overlay(ax, lon, lat, labels=None, xrange=None, yrange=None, s=10, color='#dd62ab', marker='o',
+                       fontsize=10, family='Times New Roman', rasterized=False):
+    """
+    在ax上叠加城市或采样点：显示范围外的点先剔除，所有点用一次scatter绘制（一个PathCollection）
+    labels不为None时，用place_labels自动避让放置标签
+    """
+    lon, lat = np.asarray(lon, dtype=float), np.asarray(lat, dtype=float)
+    xrange = xrange if xrange is not None else ax.get_xlim()
+    yrange = yrange if yrange is not None else ax.get_ylim()
+    inside = (lon >= xrange[0]) & (lon <= xrange[1]) & (lat >= yrange[0]) & (lat <= yrange[1])
+    lon, lat = lon[inside], lat[inside]
+    points = ax.scatter(lon, lat, s=s, color=color, marker=marker, rasterized=rasterized)
+    if labels is not None:
+        labels = np.asarray(labels)[inside]
+        for tx, ty, label, ha, va in place_labels(lon, lat, labels, xrange, yrange, ax, fontsize=fontsize,
+                                                  marker_pt=np.sqrt(s) / 2):
+            ax.text(tx, ty, label, ha=ha, va=va, fontsize=fontsize, family=family)
+    return points
+
+
+# 流线图数据的磁盘缓存目录，缓存文件名由nc文件内容的哈希值、显示范围和插值方法决定
+cache_dir = 'Streamplot cache'
+
+
+def file_hash(data_path):
+    """
+    计算nc文件内容的SHA1哈希值；按(路径, 大小, 修改时间)记录在缓存目录的索引中，文件未改动时不重复计算
+    """
+    stat = os.stat(data_path)
+    stamp = f'{os.path.abspath(data_path)}|{stat.st_size}|{stat.st_mtime_ns}'
+    index_path = os.path.join(cache_dir, 'hash_index.json')
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+    if stamp not in index:
+        sha1 = hashlib.sha1()
+        with open(data_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 24), b''):
+                sha1.update(block)
+        index[stamp] = sha1.hexdigest()
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(index_path + '.tmp', index_path)
+    return index[stamp]
+
+
+def cache_path(data_path, xrange=None, yrange=None, method='cubic'):
+    key = f'{file_hash(data_path)}|{xrange}|{yrange}|{method}'
+    return os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.npz')
+
+
+def load_cache(path):
+    with np.load(path) as cached:
+        return tuple(cached[name] for name in ('lon_new', 'lat_new', 'u_mean_new', 'v_mean_new', 'speed_new'))
+
+
+def save_cache(path, **arrays):
+    # 先写入临时文件再替换，中断或多个进程同时写入时不会留下不完整的缓存文件
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _compute_and_cache(data_path, xrange, yrange, method, path):
+    result = streamplot_data(data_path, xrange, yrange, method=method)
+    save_cache(path, **dict(zip(('lon_new', 'lat_new', 'u_mean_new', 'v_mean_new', 'speed_new'), result)))
+    return result
+
+
+def cached_streamplot_data(data_path, xrange=None, yrange=None, method='cubic'):
+    # 与streamplot_data相同，但结果保存为.npz缓存，之后只修改绘图样式时无需重新读取和插值
+    path = cache_path(data_path, xrange, yrange, method)
+    if os.path.exists(path):
+        return load_cache(path)
+    return _compute_and_cache(data_path, xrange, yrange, method, path)
+
+
+def compute_streamplot_data(file_paths, xrange=None, yrange=None, method='cubic', n_workers=None):
+    """
+    在进程池中同时计算多个nc文件的流线图数据，按file_paths的顺序返回结果列表
+    已有缓存的文件直接读取缓存；缓存文件名在主进程中确定，子进程只负责计算
+    """
+    paths = [cache_path(data_path, xrange, yrange, method) for data_path in file_paths]
+    missing = [i for i, path in enumerate(paths) if not os.path.exists(path)]
+    results = [None if i in missing else load_cache(path) for i, path in enumerate(paths)]
+    if missing:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {i: executor.submit(_compute_and_cache, file_paths[i], xrange, yrange, method, paths[i]) for i in missing}
+            for i, future in futures.items():
+                results[i] = future.result()
+    return results
+
+
+
+def streamline_geometry(lon_new, lat_new, u_mean_new, v_mean_new, speed_new, density=1, minlength=0.1, maxlength=4.0):
+    """
+    在离屏的Figure中积分一次流线，提取每一小段线段的端点、风速以及每条流线的起始线段编号
+    返回字典：segments（形状为(线段数, 2, 2)）、speeds、starts、vmin、vmax，可以用draw_streamlines反复绘制
+    """
+    from matplotlib.figure import Figure
+
+    ax = Figure().add_subplot()
+    strm = ax.streamplot(lon_new, lat_new, u_mean_new, v_mean_new, color=speed_new,
+                         density=density, minlength=minlength, maxlength=maxlength)
+    segments = np.asarray(strm.lines.get_segments(), dtype=float).reshape(-1, 2, 2)
+    speeds = np.ma.filled(np.ma.asarray(strm.lines.get_array(), dtype=float), np.nan)
+    # 前一段的终点不是后一段的起点时，说明是新的一条流线
+    breaks = np.flatnonzero(np.any(segments[1:, 0] != segments[:-1, 1], axis=1)) + 1
+    starts = np.concatenate([[0], breaks]) if len(segments) else np.zeros(0, dtype=int)
+    norm = strm.lines.norm
+    return {'segments': segments, 'speeds': speeds, 'starts': starts, 'vmin': norm.vmin, 'vmax': norm.vmax}
+
+
+def cached_streamline_geometry(lon_new, lat_new, u_mean_new, v_mean_new, speed_new, density=1, minlength=0.1, maxlength=4.0):
+    # 与streamline_geometry相同，但按风场数据与积分参数缓存为.npz，之后只修改线宽、色阶等样式时无需重新积分
+    sha1 = hashlib.sha1()
+    for array in (lon_new, lat_new, u_mean_new, v_mean_new, speed_new):
+        sha1.update(np.ascontiguousarray(np.ma.filled(array, np.nan), dtype=float).tobytes())
+    sha1.update(f'{density}|{minlength}|{maxlength}'.encode('utf-8'))
+    path = os.path.join(cache_dir, 'streamlines_' + sha1.hexdigest() + '.npz')
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return {name: cached[name] if cached[name].ndim else cached[name].item() for name in cached.files}
+    geometry = streamline_geometry(lon_new, lat_new, u_mean_new, v_mean_new, speed_new, density, minlength, maxlength)
+    save_cache(path, **geometry)
+    return geometry
+
+
+def draw_streamlines(ax, geometry, cmap='viridis', linewidth=1, arrowsize=1, arrowstyle='-|>', num_arrows=1):
+    """
+    用一个LineCollection绘制预先积分好的流线，箭头的位置与颜色按ax.streamplot的规则确定
+    返回LineCollection，可以直接用于添加色阶
+    """
+    from matplotlib.collections import LineCollection
+    from matplotlib.colors import Normalize
+    from matplotlib.patches import FancyArrowPatch
+
+    segments, speeds = geometry['segments'], geometry['speeds']
+    norm = Normalize(geometry['vmin'], geometry['vmax'])
+    lines = LineCollection(segments, linewidths=linewidth, cmap=cmap, norm=norm, zorder=2)
+    lines.set_array(np.ma.masked_invalid(speeds))
+    ax.add_collection(lines)
+
+    cmap = lines.get_cmap()
+    ends = np.append(geometry['starts'][1:], len(segments))
+    for start, end in zip(geometry['starts'], ends):
+        tx = np.append(segments[start:end, 0, 0], segments[end - 1, 1, 0])
+        ty = np.append(segments[start:end, 0, 1], segments[end - 1, 1, 1])
+        s = np.cumsum(np.hypot(np.diff(tx), np.diff(ty)))
+        for k in range(1, num_arrows + 1):
+            idx = np.searchsorted(s, s[-1] * (k / (num_arrows + 1)))
+            arrow = FancyArrowPatch((tx[idx], ty[idx]), (np.mean(tx[idx:idx + 2]), np.mean(ty[idx:idx + 2])),
+                                    arrowstyle=arrowstyle, mutation_scale=10 * arrowsize, linewidth=linewidth,
+                                    color=cmap(norm(speeds[start + idx])), zorder=2, transform=ax.transData)
+            ax.add_patch(arrow)
+    ax.autoscale_view()
+    return lines
+
+def plot_streamplot(file_path, output_path, cities_path='Cities.csv', sites_path=None, xrange=(115, 130), yrange=(43, 50),
+                    plot_labels=('(a) MAM', '(b) JJA', '(c) SON', '(d) DJF'), use_streamline_cache=True, n_workers=None):
+    """
+    绘制多个nc文件的流线图并保存到output_path，返回Figure
+    file_path：nc文件列表；cities_path：主要城市坐标；sites_path：采样点坐标（需包含Lon、Lat列），不需要时为None
+    use_streamline_cache：True时流线积分一次后保存在cache_dir中，之后用LineCollection直接绘制；False时每次调用ax.streamplot
+    """
+    print(f"待绘制{len(file_path)}个文件\n")
+    xrange, yrange = list(xrange), list(yrange)  # 与缓存键的写法保持一致
+
+    # 读取主要城市的坐标
+    df = pd.read_csv(cities_path, encoding='ISO-8859-1')  # 不要更改encoding参数，避免读取文件时编码报错
+
+    # 可选：叠加采样点
+    sites = pd.read_csv(sites_path, encoding='ISO-8859-1') if sites_path is not None else None
+
+    # 在进程池中同时计算所有nc文件的流线图数据，结果缓存在cache_dir中
+    # 之后只修改字体、色阶、密度等绘图样式时直接读取缓存，不再重复读取和插值
+    all_data = compute_streamplot_data(file_path, xrange, yrange, method='cubic', n_workers=n_workers)
+    print("流线图数据计算完成\n")
+
+    # 设置图片尺寸
+    # 子图数量由file_path中的文件个数决定，每行2个子图
+    # 创建图片时，传入figsize参数的默认长度单位是英寸，因此在plt.subplots中进行了单位转换，即除以2.54
+    n_cols = 2 if len(file_path) > 1 else 1
+    n_rows = (len(file_path) + n_cols - 1) // n_cols
+    width_cm = 25  # 宽度为25cm
+    height_cm = 6 * n_rows  # 高度为每行6cm（2行即12cm）
+    dpi_value = 600  # 分辨率为600dpi
+    fig, axs = plt.subplots(n_rows, n_cols, figsize=(width_cm/2.54, height_cm/2.54), dpi=dpi_value, squeeze=False)
+
+    # 设置各个子图的小标题，文件数多于小标题个数时，按文件名自动生成
+    plot_labels = list(plot_labels or [])
+    plot_labels += [f'({chr(ord("a") + i)}) {os.path.splitext(os.path.basename(p))[0]}' for i, p in enumerate(file_path)][len(plot_labels):]
+
+    # 调节页边距，数字代表色阶距图片边缘的比例（在绘图前确定，标签避让需要用到子图的实际大小）
+    plt.subplots_adjust(left=0.05, right=0.85, top=0.95, bottom=0.05, wspace=0.2, hspace=0.35)
+
+    # 多余的子图位置不显示
+    for ax in axs.flat[len(file_path):]:
+        fig.delaxes(ax)
+
+    # 逐一绘制流线图
+    # 变量i既表示了子图绘制的顺序、也表示了nc文件读取的顺序、还表示了小标题的顺序
+    for i, (ax, data_path) in enumerate(zip(axs.flat, file_path)):
+        # 绘图
+        lon_new, lat_new, u_mean_new, v_mean_new, speed_new = all_data[i]  # 进程池中计算好的插值数据
+        if use_streamline_cache:
+            # 流线只在风场数据或积分参数（density、minlength）改变时重新积分，修改线宽、色阶时直接读取缓存
+            geometry = cached_streamline_geometry(lon_new, lat_new, u_mean_new, v_mean_new, speed_new,
+                                                  density=1.25, minlength=0.4)
+            lines = draw_streamlines(ax, geometry, cmap='Blues', linewidth=1)
         else:
-            ax.text(row['Lon']+0.2, row['Lat'], row['Name_Short'], ha='left', va='center', fontsize=10, family='Times New Roman')
+            lines = ax.streamplot(lon_new, lat_new, u_mean_new, v_mean_new,  # 绘图所需的数据
+                                  color=speed_new,  # 表示按风速大小为流线上色
+                                  cmap='Blues',  # 表示色阶的样式，这是一个从白色过渡到深蓝色的色阶
+                                  # 更多色阶样式可以访问https://zhuanlan.zhihu.com/p/158871093
+                                  linewidth=1,  # 表示流线的宽度
+                                  minlength=0.4,  # 表示流线长度的最小值（默认0.1），适当加大这个值可以减少图中不连贯的流线
+                                  density=1.25  # 表示流线的密度
+                                  ).lines
     
-    # 固定显示的范围
-    ax.set_xlim(xrange)
-    ax.set_ylim(yrange)
-    
-    # 添加网格
-    ax.grid(color='gray', linestyle='--', linewidth=0.25)
+        # 添加采样点（点数多，不加标签，栅格化以加快600dpi保存）
+        if sites is not None:
+            draw_point_overlay(ax, sites['Lon'], sites['Lat'], xrange=xrange, yrange=yrange,
+                               s=2, color='k', marker='^', rasterized=True)
+
+        # 添加主要的城市，标签位置自动避让（优先放在点的右侧，放不下时依次尝试左、上、下）
+        draw_point_overlay(ax, df['Lon'], df['Lat'], labels=df['Name_Short'], xrange=xrange, yrange=yrange,
+                           s=10, color='#dd62ab', fontsize=10, family='Times New Roman')
     
-    # 设置刻度标签与字体
-    ax.set_xticks([115, 118, 121, 124, 127, 130])
-    ax.set_xticklabels(['115°E', '118°E', '121°E', '124°E', '127°E', '130°E'], fontname='Times New Roman', fontsize=10)
-    ax.set_yticks([44, 46, 48, 50])
-    ax.set_yticklabels(['44°N', '46°N', '48°N', '50°N'], fontname='Times New Roman', fontsize=10)
+        # 固定显示的范围
+        ax.set_xlim(xrange)
+        ax.set_ylim(yrange)
     
-    # 设置坐标轴标题与字体（暂略去）
-    # ax.set_xlabel("经度", fontname='SimSun', fontsize=10)
-    # ax.set_ylabel("纬度", fontname='SimSun', fontsize=10)
+        # 添加网格
+        ax.grid(color='gray', linestyle='--', linewidth=0.25)
     
-    # 为当前绘制的子图添加标题
-    title = plot_labels[i]
-    ax.set_title(title, loc='left', fontdict={'family':'Times New Roman', 'weight':'bold', 'size':11})
+        # 设置刻度标签与字体
+        ax.set_xticks([115, 118, 121, 124, 127, 130])
+        ax.set_xticklabels(['115°E', '118°E', '121°E', '124°E', '127°E', '130°E'], fontname='Times New Roman', fontsize=10)
+        ax.set_yticks([44, 46, 48, 50])
+        ax.set_yticklabels(['44°N', '46°N', '48°N', '50°N'], fontname='Times New Roman', fontsize=10)
     
-    i = i + 1  # 序号+1
+        # 设置坐标轴标题与字体（暂略去）
+        # ax.set_xlabel("经度", fontname='SimSun', fontsize=10)
+        # ax.set_ylabel("纬度", fontname='SimSun', fontsize=10)
     
-    print(f'第{i}/{len(file_path)}个子图（{title}）绘制完成')  # 输出提示
+        # 为当前绘制的子图添加标题
+        title = plot_labels[i]
+        ax.set_title(title, loc='left', fontdict={'family':'Times New Roman', 'weight':'bold', 'size':11})
     
-    if i >= len(file_path): break  # 检查下一个序号是否超过file_path列表中的文件个数，超过则跳出循环
-
-# 调节页边距，数字代表色阶距图片边缘的比例
-plt.subplots_adjust(left=0.05, right=0.85, top=0.95, bottom=0.05, wspace=0.2, hspace=0.35)
-
-# 添加色阶，调整其位置
-cbar_ax = fig.add_axes([0.9, 0.15, 0.03, 0.7])  # 数字代表色阶距图片边缘的比例
-cbar = fig.colorbar(strm.lines, cax=cbar_ax)
-cbar.set_label('风速（m/s）', fontsize=12, fontname='SimSun')  # 设置色阶标题和字体
-cbar.ax.tick_params(labelsize=11)  # 设置色阶数字标签的字体大小
-for l in cbar.ax.get_yticklabels():
-    l.set_family('Times New Roman')
+        print(f'第{i + 1}/{len(file_path)}个子图（{title}）绘制完成')  # 输出提示
+
+    # 添加色阶，调整其位置
+    cbar_ax = fig.add_axes([0.9, 0.15, 0.03, 0.7])  # 数字代表色阶距图片边缘的比例
+    cbar = fig.colorbar(lines, cax=cbar_ax)
+    cbar.set_label('风速（m/s）', fontsize=12, fontname='SimSun')  # 设置色阶标题和字体
+    cbar.ax.tick_params(labelsize=11)  # 设置色阶数字标签的字体大小
+    for l in cbar.ax.get_yticklabels():
+        l.set_family('Times New Roman')
     
-print("\n色阶绘制完成")  # 输出提示
+    print("\n色阶绘制完成")  # 输出提示
+
+    # 保存生成的图片
+    plt.savefig(output_path)
+
+    # 输出提示
+    print(f'\n文件已经保存到{output_path} \n大小：{width_cm}×{height_cm} cm \n分辨率：{dpi_value} dpi')
+    return fig
+
+
+# 计算流线图数据时使用了进程池，子进程会重新导入本文件，因此绘图部分放在__main__判断内
+if __name__ == '__main__':
+    # 首先，在这个列表中输入我们所需可视化的所有nc文件
+    file_path = ['1-MAM.nc',
+                 '2-JJA.nc',
+                 '3-SON.nc',
+                 '4-DJF.nc']
+
+    # 统一设置子图的显示范围
+    xrange = [115, 130]  # 经度为115°E-130°E
+    yrange = [43, 50]  # 纬度为43°N-50°N
 
-# 保存生成的图片
-output_path = 'F:/Windspeed streamplot/Streamplot.png'
-plt.savefig(output_path)
+    # 可选：叠加采样点，文件需包含Lon、Lat列；不需要时设为None
+    sites_path = None
 
-# 输出提示
-print(f'\n文件已经保存到{output_path} \n大小：{width_cm}×{height_cm} cm \n分辨率：{dpi_value} dpi')
+    # 输出文件的路径
+    output_path = 'F:/Windspeed streamplot/Streamplot.png'
 
-plt.show()
\ No newline at end of file
+    plot_streamplot(file_path, output_path, cities_path='Cities.csv', sites_path=sites_path, xrange=xrange, yrange=yrange)
+    plt.show()
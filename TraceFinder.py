@@ -1,10 +1,119 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import Canvas, Scrollbar, Toplevel, Checkbutton, IntVar, Button, filedialog, messagebox
+from tkinter import Canvas, Scrollbar, Toplevel, Checkbutton, IntVar, Button, filedialog, messagebox, ttk
 import pandas as pd
-import numpy as np
-from scipy.optimize import minimize
+from MixingModel import (compute_max_values, normalize_data, iter_normalized, iter_monte_carlo_contributions,
+                         WarmStartCache, SolveProfile)
+
+class SessionDataset:
+    """
+    本次会话中读取过的数据缓存：每个文件只读取一次，标准化结果按(文件路径, 修改时间, 指纹因子)缓存，
+    文件被修改后自动重新读取并丢弃相关的标准化结果
+    """
+    def __init__(self):
+        self._frames = {}  # 文件路径 -> (文件标识, DataFrame)
+        self._normalized = {}  # (物源文件标识, 风沙文件标识, 指纹因子) -> normalize_data的结果
+        self._max_values = {}  # 同上 -> 标准化基准max_values
+
+    @staticmethod
+    def _stamp(filepath):
+        # 文件标识：绝对路径 + 修改时间 + 文件大小
+        stat = os.stat(filepath)
+        return os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size
+
+    def peek_columns(self, filepath):
+        # 已读取的文件直接返回列名，否则只读取表头
+        stamp = self._stamp(filepath)
+        cached = self._frames.get(stamp[0])
+        if cached is not None and cached[0] == stamp:
+            return cached[1].columns
+        return pd.read_csv(filepath, nrows=0).columns
+
+    def load(self, filepath):
+        stamp = self._stamp(filepath)
+        cached = self._frames.get(stamp[0])
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        if cached is not None:
+            # 文件已被修改，丢弃旧文件对应的标准化结果
+            for cache in (self._normalized, self._max_values):
+                for key in [key for key in cache if cached[0] in key[:2]]:
+                    del cache[key]
+        data = pd.read_csv(filepath)
+        self._frames[stamp[0]] = (stamp, data)
+        return data
+
+    def normalized(self, filepath_source, filepath_sand, factors):
+        # 返回(aeolian_sand_data, aeolian_sand_data_norm, source_data_norm)
+        source_data = self.load(filepath_source)
+        aeolian_sand_data = self.load(filepath_sand)
+        key = (self._stamp(filepath_source), self._stamp(filepath_sand), tuple(factors))
+        if key not in self._normalized:
+            self._normalized[key] = normalize_data(source_data, aeolian_sand_data, list(factors))
+        return self._normalized[key]
+
+    def max_values(self, filepath_source, filepath_sand, factors):
+        source_data = self.load(filepath_source)
+        aeolian_sand_data = self.load(filepath_sand)
+        key = (self._stamp(filepath_source), self._stamp(filepath_sand), tuple(factors))
+        if key not in self._max_values:
+            self._max_values[key] = compute_max_values(source_data, aeolian_sand_data, list(factors))
+        return self._max_values[key]
+
+session = SessionDataset()
+warm_start = WarmStartCache()  # 上次求解的各样品结果，更换指纹因子后重新计算时用于热启动
+session_lock = threading.Lock()  # session与warm_start由后台线程和界面回调共用，访问时须持有此锁
+
+class CalculationWorker:
+    """
+    在后台线程中求解贡献率，界面线程通过root.after定时读取消息队列更新进度条，计算期间窗口不会卡住
+    求解按分块进行，每完成一块报告一次进度并检查是否取消；取消后保存已完成的样品的结果
+    消息：('progress', 已完成样品数, 样品总数)、('done', 已完成样品数, 样品总数, 热启动统计, 各阶段耗时)、('error', 错误信息)
+    """
+    def __init__(self):
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = None
+        self.started = None
+
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, *args):
+        self.messages = queue.Queue()
+        self.cancel_event.clear()
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, args=args, daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _run(self, *args):
+        try:
+            with session_lock:
+                result = calculate_contributions(*args, progress=lambda done, total: self.messages.put(('progress', done, total)),
+                                                 cancel_event=self.cancel_event)
+            self.messages.put(('done',) + result)
+        except Exception as e:
+            self.messages.put(('error', str(e)))
+
+worker = CalculationWorker()
+
+def refuse_while_running():
+    # 计算期间不允许更换文件或重新打开选择窗口，避免界面与后台线程同时修改会话缓存和窗口控件
+    if worker.running():
+        messagebox.showinfo("提示", "正在计算，请等待计算结束或取消后再操作")
+        return True
+    return False
 
 def select_file(file_type):
+    if refuse_while_running():
+        return
     filepath = filedialog.askopenfilename()
     if file_type == 'source':
         entry_source_file.delete(0, tk.END)
@@ -20,7 +129,8 @@ def select_file(file_type):
 
 def display_source_areas(filepath_source):
     try:
-        source_data = pd.read_csv(filepath_source)
+        with session_lock:
+            source_data = session.load(filepath_source)
         source_areas = source_data['Source'].unique()
         text_source_areas.delete('1.0', tk.END)
         text_source_areas.insert(tk.END, ', '.join(source_areas))
@@ -28,6 +138,8 @@ def display_source_areas(filepath_source):
         messagebox.showerror("错误", "读取物源样品文件失败: {}".format(e))
 
 def open_element_selection_window():
+    if refuse_while_running():
+        return
     selection_window = Toplevel(root)
     selection_window.title("最佳指纹因子选择")
     selection_window.iconbitmap('ProvenanceTracer.ico')
@@ -47,8 +159,8 @@ def open_element_selection_window():
     scrollbar.pack(side="bottom", fill="x")
 
     try:
-        data = pd.read_csv(source_file_path)
-        columns = data.columns[2:]  # 从C列开始读取元素列
+        with session_lock:
+            columns = session.peek_columns(source_file_path)[2:]  # 从C列开始读取元素列（只读取表头）
     except Exception as e:
         messagebox.showerror("错误", f"读取物源样品文件失败: {e}")
         return
@@ -68,9 +180,15 @@ def open_element_selection_window():
 
 
 def open_output_dialog():
+    if refuse_while_running():
+        return
     output_window = Toplevel(root)
     output_window.title("结果输出")
     output_window.iconbitmap('ProvenanceTracer.ico')
+    # 模态窗口：打开期间不能操作其他窗口，避免打开第二个输出窗口
+    output_window.transient(root)
+    output_window.grab_set()
+    output_window.protocol("WM_DELETE_WINDOW", lambda: close_output_dialog(output_window))
 
     tk.Label(output_window, text="输出文件位置:").grid(row=0, column=0, padx=10, pady=5)
     entry_output_file = tk.Entry(output_window, width=50)
@@ -79,113 +197,249 @@ def open_output_dialog():
                                      command=lambda: select_output_file(entry_output_file))
     button_select_output.grid(row=0, column=2, padx=10, pady=5)
 
-    Button(output_window, text="开始计算", 
-           command=lambda: start_calculation(entry_output_file.get())).grid(row=1, column=1, padx=10, pady=20)
+    # 求解方法：逐个样品SLSQP，或全部样品批量求解（大样品量时更快）
+    tk.Label(output_window, text="求解方法:").grid(row=1, column=0, padx=10, pady=5)
+    method_var = tk.StringVar(value='slsqp')
+    method_frame = tk.Frame(output_window)
+    method_frame.grid(row=1, column=1, padx=10, pady=5, sticky='w')
+    tk.Radiobutton(method_frame, text="逐个样品（SLSQP）", variable=method_var, value='slsqp').pack(side='left')
+    tk.Radiobutton(method_frame, text="批量求解", variable=method_var, value='batch').pack(side='left')
+
+    # 并行设置：进程数为1时串行计算，分块大小为每个并行任务包含的样品数
+    tk.Label(output_window, text="并行进程数:").grid(row=2, column=0, padx=10, pady=5)
+    entry_n_workers = tk.Entry(output_window, width=10)
+    entry_n_workers.insert(0, '1')
+    entry_n_workers.grid(row=2, column=1, padx=10, pady=5, sticky='w')
+    tk.Label(output_window, text="分块大小:").grid(row=3, column=0, padx=10, pady=5)
+    entry_chunk_size = tk.Entry(output_window, width=10)
+    entry_chunk_size.insert(0, '1000')
+    entry_chunk_size.grid(row=3, column=1, padx=10, pady=5, sticky='w')
+
+    # 蒙特卡洛次数为0时不启用，大于0时输出贡献率的均值、中位数和5%-95%区间
+    tk.Label(output_window, text="蒙特卡洛次数:").grid(row=4, column=0, padx=10, pady=5)
+    entry_n_realizations = tk.Entry(output_window, width=10)
+    entry_n_realizations.insert(0, '0')
+    entry_n_realizations.grid(row=4, column=1, padx=10, pady=5, sticky='w')
+
+    # 求解诊断：结果中增加每个样品的迭代次数、函数计算次数、求解耗时与收敛状态（蒙特卡洛模式不输出）
+    diagnostics_var = IntVar(value=0)
+    Checkbutton(output_window, text="输出求解诊断信息（迭代次数、耗时、收敛状态）",
+                variable=diagnostics_var).grid(row=5, column=1, padx=10, pady=5, sticky='w')
+
+    # 进度：已完成样品数、速度与预计剩余时间，计算期间可以取消
+    global progress_bar, label_progress, button_start, button_cancel
+    progress_bar = ttk.Progressbar(output_window, length=360, mode='determinate')
+    progress_bar.grid(row=6, column=0, columnspan=3, padx=10, pady=(15, 0))
+    label_progress = tk.Label(output_window, text="")
+    label_progress.grid(row=7, column=0, columnspan=3, padx=10, pady=5)
+
+    button_frame = tk.Frame(output_window)
+    button_frame.grid(row=8, column=1, padx=10, pady=15)
+    button_start = Button(button_frame, text="开始计算",
+                          command=lambda: start_calculation(entry_output_file.get(), method_var.get(),
+                                                            entry_n_workers.get(), entry_chunk_size.get(),
+                                                            entry_n_realizations.get(), diagnostics_var.get() == 1))
+    button_start.pack(side='left', padx=10)
+    button_cancel = Button(button_frame, text="取消", state='disabled', command=cancel_calculation)
+    button_cancel.pack(side='left', padx=10)
+
+def close_output_dialog(output_window):
+    # 计算期间关闭窗口时先确认并取消计算，后台线程结束后的消息仍由poll_calculation处理
+    if worker.running():
+        if not messagebox.askyesno("确认", "正在计算，是否取消计算并关闭窗口？", parent=output_window):
+            return
+        worker.cancel()
+    output_window.destroy()
 
 def select_output_file(entry):
     filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
     entry.delete(0, tk.END)
     entry.insert(0, filepath)
 
-def calculate_contributions(filepath_source, filepath_sand, factors, output_path):
-    messagebox.showinfo("指纹因子确认", "使用的指纹因子：\n" + "\n".join(factors))
-    
-    # 读取数据
-    aeolian_sand_data = pd.read_csv(filepath_sand)
-    source_data = pd.read_csv(filepath_source)
-
-    # 自动判断物源区数量 m
-    m = len(source_data['Source'].unique())
-
-    # 标准化指纹因子浓度
-    max_values = pd.concat([aeolian_sand_data[factors], source_data[factors]]).max()
-    aeolian_sand_data_norm = aeolian_sand_data[factors].div(max_values)
-    source_data_norm = source_data.pivot_table(index='Source', values=factors, aggfunc='mean').div(max_values)
-
-    # 定义目标函数和约束条件
-    def objective_function(P, C_ssi, C_si):
-        R_es = np.sum(((C_ssi - np.dot(C_si, P)) / C_ssi) ** 2)
-        return R_es
-    cons = [{'type': 'eq', 'fun': lambda P: np.sum(P) - 1},  # 确保P_s的和为1
-            {'type': 'ineq', 'fun': lambda P: P}]            # 确保P_s的值非负
-
-    # 初始化结果列表
-    results_list = []
-
-    # 遍历每个风沙样品进行计算
-    for index, row in aeolian_sand_data_norm.iterrows():
-        C_ssi = row.values
-        C_si = source_data_norm.values.T
-        initial_guess = np.ones(m) / m  # 初始猜测，根据物源区数量 m 分配
-
-        # 执行最小化过程
-        res = minimize(objective_function, initial_guess, args=(C_ssi, C_si), constraints=cons, method='SLSQP')
-
-        # 创建结果字典并添加到列表中
-        result_dict = {
-            'Specimen': aeolian_sand_data.loc[index, 'Specimen'],
-            **{f'Contribution_{source}': p for source, p in zip(source_data_norm.index, res.x)},
-            'GOF': 1 - (1 / len(factors)) * np.sum(np.abs((C_ssi - np.dot(C_si, res.x)) / C_ssi))
-        }
-        results_list.append(result_dict)
-
-    # 转换结果列表为DataFrame并保存
-    results_df = pd.DataFrame(results_list)
+def calculate_contributions(filepath_source, filepath_sand, factors, output_path, method='slsqp', n_workers=1, chunk_size=1000,
+                            n_realizations=0, diagnostics=False, hook=None, progress=None, cancel_event=None):
+    """
+    读取数据、标准化并逐块求解，method为'slsqp'（逐个样品）或'batch'（批量投影梯度）
+    n_realizations > 0 时改用蒙特卡洛模式，输出贡献率的不确定性区间
+    数据读取与标准化结果均来自会话缓存，文件未修改时不重复读取
+    非蒙特卡洛模式下沿用上次计算中输入未变的样品的结果，其余样品以上次的结果热启动（输出诊断信息时不沿用，全部重新求解）
+    diagnostics=True时结果中增加每个样品的诊断信息列；hook为监控回调hook(事件, 耗时, 附加信息)，见MixingModel.SolveProfile
+    每完成一块调用progress(已完成样品数, 样品总数)；cancel_event被设置后停止求解，只保存已完成的样品
+    返回(已完成样品数, 样品总数, 热启动统计, 各阶段耗时)，热启动统计为{'reused', 'warm', 'cold'}，蒙特卡洛模式下为None
+    """
+    counts = None
+    profile = SolveProfile(hook)
+    with profile.stage('load'):
+        source_data = session.load(filepath_source)
+        aeolian_sand_data = session.load(filepath_sand)
+    if n_realizations > 0:
+        with profile.stage('normalize'):
+            max_values = session.max_values(filepath_source, filepath_sand, factors)
+        blocks = iter_monte_carlo_contributions(source_data, aeolian_sand_data, factors,
+                                                n_realizations=n_realizations, max_values=max_values)
+    else:
+        with profile.stage('normalize'):
+            normalized = session.normalized(filepath_source, filepath_sand, factors)
+        blocks = iter_normalized(*normalized, method=method, n_workers=n_workers, chunk_size=chunk_size,
+                                 warm_start=warm_start, diagnostics=diagnostics, profile=profile)
+
+    n_total = len(aeolian_sand_data)
+    results, n_done = [], 0
+    loop_start = time.perf_counter()
     try:
-        results_df.to_csv(output_path, index=False)
+        for block in blocks:
+            if counts is None and n_realizations == 0:
+                counts = dict(warm_start.last_counts)  # 第一块求解前已查询缓存
+            results.append(block)
+            n_done += len(block)
+            if progress is not None:
+                progress(n_done, n_total)
+            if cancel_event is not None and cancel_event.is_set():
+                break
+    finally:
+        blocks.close()  # 并行求解时取消尚未开始的分块
+    if n_realizations > 0:
+        profile.record('solve', time.perf_counter() - loop_start, rows=n_done)  # 批量模式的求解耗时由iter_normalized记录
+
+    # 保存结果（取消时为已完成的部分）
+    if results:
+        with profile.stage('write'):
+            pd.concat(results, ignore_index=True).to_csv(output_path, index=False)
         print(f'结果已保存到{output_path}')
-        return True  # 表示成功完成计算和保存
-    except Exception as e:
-        print(f'保存结果时出现错误: {e}')
-        return False  # 表示在保存时遇到问题
+    if counts is not None:
+        print(f"沿用{counts['reused']}个，热启动{counts['warm']}个，从头求解{counts['cold']}个样品")
+    print(f'耗时：{profile.summary()}')
+    return n_done, n_total, counts, profile.timings
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}' if hours else f'{minutes:02d}:{seconds:02d}'
+
+def dialog_alive():
+    # 输出窗口可能在计算期间被关闭，更新控件前检查
+    return label_progress.winfo_exists()
+
+def show_progress(n_done, n_total):
+    # 更新进度条与速度、预计剩余时间
+    if not dialog_alive():
+        return
+    elapsed = time.perf_counter() - worker.started
+    rate = n_done / elapsed if elapsed > 0 else 0
+    eta = format_seconds((n_total - n_done) / rate) if rate > 0 else '--:--'
+    progress_bar['maximum'] = max(n_total, 1)
+    progress_bar['value'] = n_done
+    label_progress.config(text=f"已完成 {n_done}/{n_total} 个样品，{rate:.1f} 个/秒，预计剩余 {eta}")
+
+def set_running(running):
+    if not dialog_alive():
+        return
+    button_start.config(state='disabled' if running else 'normal')
+    button_cancel.config(state='normal' if running else 'disabled')
+
+def poll_calculation():
+    # 界面线程定时读取后台线程的消息，计算结束后恢复按钮状态，窗口保持打开以便更换指纹因子重新计算
+    try:
+        while True:
+            message = worker.messages.get_nowait()
+            if message[0] == 'progress':
+                show_progress(*message[1:])
+            elif message[0] == 'done':
+                n_done, n_total, counts, timings = message[1:]
+                set_running(False)
+                report = "" if counts is None else \
+                    f"\n沿用上次结果{counts['reused']}个，热启动{counts['warm']}个，从头求解{counts['cold']}个样品"
+                report += "\n耗时：" + "，".join(f"{name} {elapsed:.2f} 秒" for name, elapsed in timings.items())
+                if n_done < n_total:
+                    if dialog_alive():
+                        label_progress.config(text=f"已取消，已完成 {n_done}/{n_total} 个样品")
+                    messagebox.showinfo("已取消", (f"已保存前{n_done}个样品的结果" if n_done else "没有已完成的样品，未输出结果") + report)
+                else:
+                    show_progress(n_done, n_total)
+                    messagebox.showinfo("完成", "结果输出完毕" + report)
+                return
+            else:
+                set_running(False)
+                if dialog_alive():
+                    label_progress.config(text="计算失败")
+                messagebox.showerror("错误", f"计算或保存过程中发生错误: {message[1]}")
+                return
+    except queue.Empty:
+        pass
+    root.after(100, poll_calculation)
+
+def cancel_calculation():
+    worker.cancel()
+    if not dialog_alive():
+        return
+    button_cancel.config(state='disabled')
+    label_progress.config(text="正在取消，等待当前分块完成…")
 
-def start_calculation(output_path):
+def start_calculation(output_path, method='slsqp', n_workers='1', chunk_size='1000', n_realizations='0', diagnostics=False):
+    if worker.running():
+        return
     if not output_path:
         messagebox.showerror("错误", "请选择输出文件位置")
         return
-    factors = [factor[0] for factor in selected_factors if factor[1].get() == 1]
+    try:
+        n_workers = int(n_workers)
+        chunk_size = int(chunk_size)
+        if n_workers < 1 or chunk_size < 1:
+            raise ValueError
+    except ValueError:
+        messagebox.showerror("错误", "并行进程数和分块大小必须为正整数")
+        return
+    try:
+        n_realizations = int(n_realizations)
+        if n_realizations < 0:
+            raise ValueError
+    except ValueError:
+        messagebox.showerror("错误", "蒙特卡洛次数必须为非负整数")
+        return
+    factors = [factor for factor, var in selected_factors if var.get() == 1]
     if not factors:
         messagebox.showerror("错误", "未选择任何指纹因子")
         return
-    # 从GUI获取的变量值
+    messagebox.showinfo("指纹因子确认", "使用的指纹因子：\n" + "\n".join(factors))
+
+    # 从GUI获取的变量值，在后台线程中计算，界面线程定时读取进度
     filepath_source = entry_source_file.get()
     filepath_sand = entry_sand_file.get()
-    factors = [factor for factor, var in selected_factors if var.get() == 1]
-
-    # 调用 calculate_contributions 函数，传入用户选择的输出路径
-    success = calculate_contributions(filepath_source, filepath_sand, factors, output_path)
-
-    if success:
-        # 如果计算和保存成功，显示消息并关闭所有窗口
-        messagebox.showinfo("完成", "结果输出完毕")
-        root.destroy()  # 关闭主窗口
-    else:
-        messagebox.showerror("错误", "计算或保存过程中发生错误")
-
-root = tk.Tk()
-root.title("ProvenanceTracer")
-root.iconbitmap('ProvenanceTracer.ico')
-
-source_file_path = ""
-sand_file_path = ""
-
-tk.Label(root, text="物源样品文件:").grid(row=0, column=0, padx=10, pady=10)
-entry_source_file = tk.Entry(root, width=50)
-entry_source_file.grid(row=0, column=1, padx=10, pady=10)
-button_source_file = tk.Button(root, text="选择文件", command=lambda: select_file('source'))
-button_source_file.grid(row=0, column=2, padx=10, pady=10)
-
-tk.Label(root, text="风沙样品文件:").grid(row=1, column=0, padx=10, pady=10)
-entry_sand_file = tk.Entry(root, width=50)
-entry_sand_file.grid(row=1, column=1, padx=10, pady=10)
-button_sand_file = tk.Button(root, text="选择文件", command=lambda: select_file('sand'))
-button_sand_file.grid(row=1, column=2, padx=10, pady=10)
-
-tk.Label(root, text="物源区列表:").grid(row=2, column=0, padx=10, pady=10, sticky='nw')
-text_source_areas = tk.Text(root, height=4, width=37)
-text_source_areas.grid(row=2, column=1, padx=10, pady=10)
-
-button_next_step = tk.Button(root, text="下一步", command=open_element_selection_window)
-button_next_step.grid(row=3, column=1, padx=10, pady=10, sticky='e')
-
-root.mainloop()
\ No newline at end of file
+    set_running(True)
+    progress_bar['value'] = 0
+    label_progress.config(text="正在读取数据…")
+    worker.start(filepath_source, filepath_sand, factors, output_path, method, n_workers, chunk_size, n_realizations,
+                 diagnostics)
+    root.after(100, poll_calculation)
+
+# 并行计算时子进程会重新导入本文件，界面只在主进程中创建
+if __name__ == '__main__':
+    multiprocessing.freeze_support()  # 打包为exe后使用进程池所需
+
+    root = tk.Tk()
+    root.title("ProvenanceTracer")
+    root.iconbitmap('ProvenanceTracer.ico')
+
+    source_file_path = ""
+    sand_file_path = ""
+
+    tk.Label(root, text="物源样品文件:").grid(row=0, column=0, padx=10, pady=10)
+    entry_source_file = tk.Entry(root, width=50)
+    entry_source_file.grid(row=0, column=1, padx=10, pady=10)
+    button_source_file = tk.Button(root, text="选择文件", command=lambda: select_file('source'))
+    button_source_file.grid(row=0, column=2, padx=10, pady=10)
+
+    tk.Label(root, text="风沙样品文件:").grid(row=1, column=0, padx=10, pady=10)
+    entry_sand_file = tk.Entry(root, width=50)
+    entry_sand_file.grid(row=1, column=1, padx=10, pady=10)
+    button_sand_file = tk.Button(root, text="选择文件", command=lambda: select_file('sand'))
+    button_sand_file.grid(row=1, column=2, padx=10, pady=10)
+
+    tk.Label(root, text="物源区列表:").grid(row=2, column=0, padx=10, pady=10, sticky='nw')
+    text_source_areas = tk.Text(root, height=4, width=37)
+    text_source_areas.grid(row=2, column=1, padx=10, pady=10)
+
+    button_next_step = tk.Button(root, text="下一步", command=open_element_selection_window)
+    button_next_step.grid(row=3, column=1, padx=10, pady=10, sticky='e')
+
+    root.mainloop()
\ No newline at end of file
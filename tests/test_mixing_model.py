@@ -0,0 +1,34 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MixingModel import solve_batch, solve_monte_carlo
+
+
+def test_batch_skips_invalid_rows():
+    # 浓度含NaN或0的样品贡献率为NaN、未收敛，其余样品的结果与只求解有效样品时一致
+    rng = np.random.default_rng(0)
+    C_si = rng.uniform(0.1, 1, (8, 4))
+    C_ssi_all = rng.uniform(0.2, 1, (200, 8))
+    C_ssi_all[5, 2] = np.nan
+    C_ssi_all[9, 0] = 0
+    P, info = solve_batch(C_ssi_all, C_si, return_info=True)
+    assert np.isnan(P[[5, 9]]).all()
+    assert not info['Converged'][[5, 9]].any()
+    valid = np.ones(len(C_ssi_all), dtype=bool)
+    valid[[5, 9]] = False
+    assert np.allclose(P[valid].sum(axis=1), 1)
+    assert np.allclose(P[valid], solve_batch(C_ssi_all[valid], C_si))
+
+
+def test_monte_carlo_skips_invalid_rows():
+    rng = np.random.default_rng(1)
+    C_ssi_all = rng.uniform(0.2, 1, (6, 8))
+    C_ssi_all[1, 3] = np.nan
+    C_ssi_all[4, 0] = 0
+    stats = solve_monte_carlo(C_ssi_all, rng.uniform(0.1, 1, (30, 8, 4)))
+    assert np.isnan(stats['mean'][[1, 4]]).all()
+    assert np.isfinite(stats['mean'][[0, 2, 3, 5]]).all()
@@ -1,45 +1,108 @@
+import codecs
+import re
+
 import pandas as pd
 
-def convert_dms_to_decimal(input_csv_path, output_csv_path):
+# One pattern for the common DMS variants: 116°23′45.6″E, 116°23'45.6"E, 116°23.76′E, 116 23 45.6 E,
+# W116°23′45.6″, -116°23′45.6″, 116度23分45.6秒 and plain decimal degrees such as 116.3958
+DMS_PATTERN = re.compile(
+    r"^\s*(?P<prefix>[NSEWnsew+-])?\s*"
+    r"(?P<degrees>\d+(?:\.\d+)?)\s*[°º˚度]?\s*"
+    r"(?:(?P<minutes>\d+(?:\.\d+)?)\s*(?:[′'’分]|:)?\s*"
+    r"(?:(?P<seconds>\d+(?:\.\d+)?)\s*(?:[″\"”秒]|''|′′)?)?)?\s*"
+    r"(?P<suffix>[NSEWnsew])?\s*$"
+)
+
+# Allowed hemisphere letters and the largest absolute value for each kind of coordinate
+HEMISPHERES = {'lon': ('EW', 180), 'lat': ('NS', 90)}
+
+
+def dms_to_decimal(values, kind):
+    """
+    Converts a whole column of DMS strings to decimal degrees with one vectorized regex extraction.
+
+    Parameters:
+        values (pd.Series): DMS strings (numbers are accepted as decimal degrees).
+        kind (str): 'lon' or 'lat', used to check the hemisphere letter and the value range.
+
+    Returns:
+        pd.Series: Decimal degrees, negative for the southern and western hemispheres.
+                   Rows that do not match or are out of range are NaN.
+    """
+    letters, limit = HEMISPHERES[kind]
+    parts = values.astype(str).str.extract(DMS_PATTERN)
+    degrees = pd.to_numeric(parts['degrees'])
+    minutes = pd.to_numeric(parts['minutes']).fillna(0)
+    seconds = pd.to_numeric(parts['seconds']).fillna(0)
+    prefix = parts['prefix'].fillna('').str.upper()
+    suffix = parts['suffix'].fillna('').str.upper()
+    hemisphere = prefix.where(prefix.str.isalpha(), '') + suffix
+
+    decimal = degrees + minutes / 60 + seconds / 3600
+    negative = (prefix == '-') | hemisphere.isin([letters[1]])
+    decimal = decimal.where(~negative, -decimal)
+
+    valid = (degrees.notna() & (minutes < 60) & (seconds < 60) & (decimal.abs() <= limit)
+             # At most one hemisphere letter, it must belong to this axis and cannot be combined with a sign
+             & (hemisphere.str.len() <= 1) & (hemisphere.isin(['', *letters]))
+             & ~((hemisphere != '') & prefix.isin(['+', '-']))
+             # Fractional degrees or minutes cannot be followed by a smaller unit
+             & ~(parts['degrees'].str.contains('.', regex=False) & parts['minutes'].notna())
+             & ~(parts['minutes'].fillna('').str.contains('.', regex=False) & parts['seconds'].notna()))
+    return decimal.where(valid)
+
+
+def detect_encoding(path, candidates=('utf-8', 'gbk', 'gb18030'), sample_size=1 << 16):
+    """Detects the file encoding once from a byte sample instead of re-reading the whole file on failure."""
+    with open(path, 'rb') as f:
+        sample = f.read(sample_size)
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    for encoding in candidates:
+        try:
+            # final=False so that a multi-byte character cut at the end of the sample is not an error
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Could not detect the encoding of {path} (tried {', '.join(candidates)})")
+
+
+def convert_dms_to_decimal(input_csv_path, output_csv_path, lon_column='Longitude', lat_column='Latitude',
+                           chunksize=100000, encoding=None):
     """
     Converts geographic coordinates from DMS (Degrees, Minutes, Seconds) format to decimal degrees.
-    
+    The table is read and written in chunks, so large site tables do not need to fit in memory.
+
     Parameters:
         input_csv_path (str): The file path for the input CSV containing the DMS coordinates.
         output_csv_path (str): The file path for the output CSV with the coordinates in decimal degrees.
+        lon_column, lat_column (str): Names of the longitude and latitude columns.
+        chunksize (int): Number of rows converted at a time.
+        encoding (str): Encoding of the input CSV, detected from the first bytes if None.
+
+    Returns:
+        list: Row indices (0-based, excluding the header) that could not be converted.
     """
-    def dms_to_dd(dms_str):
-        """Convert DMS string to decimal degrees, removing directional symbols."""
-        dms_str = dms_str.replace("E", "").replace("N", "").strip()
-        try:
-            degrees, rest = dms_str.split("°")
-            minutes, seconds = rest.split("′")
-            degrees = float(degrees)
-            minutes = float(minutes) / 60
-            seconds = float(seconds.replace('″', '')) / 3600
-        except ValueError:  # Handle potential format issues
-            return None
-        return degrees + minutes + seconds
-    
-    # Try loading the CSV with UTF-8 first, then GBK if UTF-8 fails
-    try:
-        data = pd.read_csv(input_csv_path, encoding='utf-8')
-    except UnicodeDecodeError:
-        data = pd.read_csv(input_csv_path, encoding='gbk')
-    
-    # Apply the conversion
-    data['Longitude'] = data['Longitude'].apply(dms_to_dd)
-    data['Latitude'] = data['Latitude'].apply(dms_to_dd)
-    
-    # Check for conversion issues
-    if data[['Longitude', 'Latitude']].isnull().any(axis=1).sum() > 0:
-        print("Warning: Some rows could not be converted.")
-    
-    # Save the modified data
-    data.to_csv(output_csv_path, index=False, encoding='utf-8')
+    encoding = encoding or detect_encoding(input_csv_path)
+    bad_rows = []
+    reader = pd.read_csv(input_csv_path, encoding=encoding, chunksize=chunksize, dtype={lon_column: str, lat_column: str})
+    for i, data in enumerate(reader):
+        data[lon_column] = dms_to_decimal(data[lon_column], 'lon')
+        data[lat_column] = dms_to_decimal(data[lat_column], 'lat')
+        bad_rows.extend(data.index[data[[lon_column, lat_column]].isnull().any(axis=1)].tolist())
+        data.to_csv(output_csv_path, index=False, encoding='utf-8', mode='w' if i == 0 else 'a', header=i == 0)
+
+    # Report the rows that could not be converted
+    if bad_rows:
+        shown = ', '.join(str(row) for row in bad_rows[:20]) + (' ...' if len(bad_rows) > 20 else '')
+        print(f"Warning: {len(bad_rows)} rows could not be converted (row index: {shown})")
     print(f"Data converted and saved to {output_csv_path}")
+    return bad_rows
+
 
-# Example usage
-input_csv_path = r'样点数据2.csv'  # Replace with your input CSV file path
-output_csv_path = r'样点数据_New.csv'  # Replace with your desired output CSV file path
-convert_dms_to_decimal(input_csv_path, output_csv_path)
\ No newline at end of file
+if __name__ == '__main__':
+    # Example usage
+    input_csv_path = r'样点数据2.csv'  # Replace with your input CSV file path
+    output_csv_path = r'样点数据_New.csv'  # Replace with your desired output CSV file path
+    convert_dms_to_decimal(input_csv_path, output_csv_path)